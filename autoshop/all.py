@@ -4,6 +4,9 @@ from . import (
 from . import environment as env
 from . import (
     google,
+    optimize,
+    plan,
+    rate,
     selenium,
     tesco,
     unit,
@@ -20,6 +23,9 @@ __all__ = [
     "chrome",
     "env",
     "google",
+    "optimize",
+    "plan",
+    "rate",
     "selenium",
     "tesco",
     "unit",
@@ -1,11 +1,84 @@
+import base64
+import contextlib
+import fnmatch
+import json
+import queue
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, NoReturn, Optional
+
 import undetected_chromedriver
 
+from autoshop.util.logging import logger as get_logger
 from autoshop.util.typing import WebDriver
 
-__all__ = ["driver"]
+__all__ = [
+    "PRESETS_BLOCK",
+    "DriverPool",
+    "block_urls",
+    "driver",
+    "get_json_responses",
+    "load_cookies",
+    "save_cookies",
+]
+
+LOGGER = get_logger(__name__)
+
+# Seconds get_json_responses waits for the bodies of responses to finish loading
+TIMEOUT_RESPONSES_DEFAULT = 5.0
+POLL_INTERVAL_RESPONSES_DEFAULT = 0.1
+
+# Patterns for CDP Network.setBlockedURLs, * matches any run of characters
+PRESETS_BLOCK = {
+    "images": [
+        "*.jpg*",
+        "*.jpeg*",
+        "*.png*",
+        "*.gif*",
+        "*.webp*",
+        "*.avif*",
+        "*.svg*",
+        "*.ico*",
+    ],
+    "fonts": [
+        "*.woff*",
+        "*.woff2*",
+        "*.ttf*",
+        "*.otf*",
+        "*.eot*",
+    ],
+    "trackers": [
+        "*google-analytics.com*",
+        "*googletagmanager.com*",
+        "*doubleclick.net*",
+        "*googlesyndication.com*",
+        "*facebook.net*",
+        "*hotjar.com*",
+        "*adobedtm.com*",
+        "*omtrdc.net*",
+        "*demdex.net*",
+        "*criteo.com*",
+        "*criteo.net*",
+        "*bing.com/bat*",
+        "*tiktok.com*",
+        "*quantummetric.com*",
+    ],
+}
 
 
-def driver() -> WebDriver:
+def driver(
+    path_profile: Optional[Path] = None,
+    path_cookies: Optional[Path] = None,
+    block: Optional[Iterable[str]] = None,
+    log_performance: bool = False,
+) -> WebDriver:
+    """
+    Starts Chrome, reusing the profile in path_profile and the cookies exported to
+    path_cookies if given, so an earlier session can carry on without logging in.
+
+    block takes names of PRESETS_BLOCK or URL patterns that are never fetched.
+    log_performance keeps the network events get_json_responses reads.
+    """
     options = undetected_chromedriver.ChromeOptions()
     options.add_argument("--start-maximized")
     options.add_argument("--password-store=basic")
@@ -16,7 +89,332 @@ def driver() -> WebDriver:
             "profile.password_manager_enabled": False,
         },
     )
+    if log_performance:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    kwargs = {}
+    if path_profile is not None:
+        kwargs["user_data_dir"] = str(path_profile)
     # Set if needed version_main=145
-    driver = undetected_chromedriver.Chrome(options=options, version_main=145)
-    driver.delete_all_cookies()
+    driver = undetected_chromedriver.Chrome(options=options, version_main=145, **kwargs)
+    if path_profile is None:
+        driver.delete_all_cookies()
+    if path_cookies is not None and Path(path_cookies).exists():
+        load_cookies(driver=driver, path=path_cookies)
+    if block is not None:
+        block_urls(driver=driver, block=block)
     return driver
+
+
+def get_blocked_urls(
+    block: Iterable[str],
+) -> list[str]:
+    urls = []
+    for value in block:
+        urls.extend(PRESETS_BLOCK.get(value, [value]))
+    return urls
+
+
+def block_urls(
+    driver: WebDriver,
+    block: Iterable[str],
+) -> NoReturn:
+    """
+    Stops the driver fetching URLs matching the presets or patterns in block.
+    """
+    urls = get_blocked_urls(block=block)
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": urls})
+    LOGGER.info(f"Blocking {len(urls)} URL patterns")
+
+
+# The fields of a CDP Network.Cookie that Network.setCookies accepts back
+KEYS_COOKIE = (
+    "name",
+    "value",
+    "domain",
+    "path",
+    "secure",
+    "httpOnly",
+    "sameSite",
+    "expires",
+    "priority",
+    "sourceScheme",
+    "sourcePort",
+)
+
+
+def save_cookies(
+    driver: WebDriver,
+    path: Path,
+) -> NoReturn:
+    """
+    Exports the cookies of every domain, not just the current page's.
+    """
+    cookies = driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+    Path(path).write_text(json.dumps(cookies, indent=2))
+    LOGGER.info(f"Saved {len(cookies)} cookies to {path=}")
+
+
+def load_cookies(
+    driver: WebDriver,
+    path: Path,
+) -> NoReturn:
+    """
+    Imports cookies exported by save_cookies, no page needs to be loaded first.
+    """
+    cookies = [
+        {
+            key: value
+            for key, value in cookie.items()
+            if key in KEYS_COOKIE and not (key == "expires" and cookie.get("session"))
+        }
+        for cookie in json.loads(Path(path).read_text())
+    ]
+    driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+    LOGGER.info(f"Loaded {len(cookies)} cookies from {path=}")
+
+
+def get_json_responses(
+    driver: WebDriver,
+    patterns: Iterable[str],
+    timeout: Optional[float] = None,
+    poll_interval: Optional[float] = None,
+) -> list[dict]:
+    """
+    Gets the parsed JSON bodies of the responses since the last call whose URL
+    matches any of patterns, needs a driver started with log_performance.
+
+    Reading the log empties it, so responses whose body has not finished loading
+    are polled for up to timeout seconds rather than lost. Those still loading
+    after it are logged and skipped.
+
+    Each response is a dict of url, status and payload.
+    """
+    if timeout is None:
+        timeout = TIMEOUT_RESPONSES_DEFAULT
+
+    if poll_interval is None:
+        poll_interval = POLL_INTERVAL_RESPONSES_DEFAULT
+
+    patterns = list(patterns)
+    responses = {}
+    finished = set()
+    deadline = time.monotonic() + timeout
+    while True:
+        for entry in driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            params = message.get("params", {})
+            if message["method"] == "Network.responseReceived":
+                response = params["response"]
+                if "json" in response.get("mimeType", "") and any(
+                    fnmatch.fnmatch(response["url"], pattern) for pattern in patterns
+                ):
+                    responses[params["requestId"]] = response
+            elif message["method"] in [
+                "Network.loadingFinished",
+                "Network.loadingFailed",
+            ]:
+                finished.add(params["requestId"])
+
+        unfinished = responses.keys() - finished
+        if not unfinished or time.monotonic() >= deadline:
+            break
+        time.sleep(poll_interval)
+
+    for request_id in unfinished:
+        LOGGER.warning(
+            f"Skipping response still loading after {timeout=}, "
+            f"{responses[request_id]['url']=}"
+        )
+        del responses[request_id]
+
+    results = []
+    for request_id, response in responses.items():
+        try:
+            body = driver.execute_cdp_cmd(
+                "Network.getResponseBody", {"requestId": request_id}
+            )
+            text = (
+                base64.b64decode(body["body"]).decode()
+                if body.get("base64Encoded")
+                else body["body"]
+            )
+            payload = json.loads(text)
+        except Exception as exception:
+            LOGGER.warning(f"Skipping response from {response['url']=}, {exception=}")
+            continue
+        results.append(
+            dict(url=response["url"], status=response["status"], payload=payload)
+        )
+
+    LOGGER.debug(f"Captured {len(results)} JSON responses matching {patterns=}")
+    return results
+
+
+SCRIPT_HEAP_SIZE = (
+    "return performance.memory ? performance.memory.usedJSHeapSize : null;"
+)
+
+
+class PooledDriver:
+    """
+    A driver owned by a DriverPool along with what is needed to decide when to
+    recycle it.
+    """
+
+    def __init__(self, driver: WebDriver) -> None:
+        self.driver = driver
+        self.navigations = 0
+        self.heap_size_baseline = heap_size(driver=driver)
+
+        # Count navigations without the callers having to report them
+        get = driver.get
+
+        def get_counted(url: str) -> None:
+            self.navigations += 1
+            return get(url)
+
+        driver.get = get_counted
+
+
+def heap_size(driver: WebDriver) -> Optional[int]:
+    try:
+        return driver.execute_script(SCRIPT_HEAP_SIZE)
+    except Exception:
+        return None
+
+
+def is_healthy(driver: WebDriver) -> bool:
+    try:
+        return driver.execute_script("return 1;") == 1
+    except Exception:
+        return False
+
+
+class DriverPool:
+    """
+    Keeps size warmed up drivers to lease out, so jobs can share browsers without
+    paying for the start up of a new one.
+
+    setup is run on every new driver, e.g. tesco.login. A driver is recycled once
+    it has made max_navigations or its JS heap has grown by max_memory_growth
+    bytes since it was set up.
+    """
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        factory: Optional[Callable[[], WebDriver]] = None,
+        setup: Optional[Callable[[WebDriver], object]] = None,
+        max_navigations: Optional[int] = None,
+        max_memory_growth: Optional[int] = None,
+    ) -> None:
+        if size is None:
+            size = 1
+
+        if factory is None:
+            factory = driver
+
+        self.size = size
+        self.factory = factory
+        self.setup = setup
+        self.max_navigations = max_navigations
+        self.max_memory_growth = max_memory_growth
+        self.idle: queue.Queue[PooledDriver] = queue.Queue()
+        self.closed = False
+
+        for _ in range(size):
+            self.idle.put(self.create())
+
+    def create(self) -> PooledDriver:
+        driver_new = self.factory()
+        if self.setup is not None:
+            self.setup(driver_new)
+        LOGGER.debug(f"Created pooled driver {driver_new=}")
+        return PooledDriver(driver=driver_new)
+
+    def retire(self, pooled: PooledDriver) -> NoReturn:
+        try:
+            pooled.driver.quit()
+        except Exception as exception:
+            LOGGER.warning(f"Failed to quit pooled driver, {exception=}")
+
+    def needs_recycling(self, pooled: PooledDriver) -> bool:
+        if (
+            self.max_navigations is not None
+            and pooled.navigations >= self.max_navigations
+        ):
+            LOGGER.debug(f"Recycling after {pooled.navigations=}")
+            return True
+        if self.max_memory_growth is not None:
+            size = heap_size(driver=pooled.driver)
+            if (
+                size is not None
+                and pooled.heap_size_baseline is not None
+                and size - pooled.heap_size_baseline >= self.max_memory_growth
+            ):
+                LOGGER.debug(f"Recycling after heap grew to {size=}")
+                return True
+        return False
+
+    @contextlib.contextmanager
+    def lease(
+        self,
+        timeout: Optional[float] = None,
+    ) -> Iterator[WebDriver]:
+        """
+        Leases a healthy driver, waiting up to timeout for one to be returned.
+        """
+        if self.closed:
+            raise RuntimeError("DriverPool is closed")
+
+        pooled = self.idle.get(timeout=timeout)
+        if not is_healthy(driver=pooled.driver):
+            LOGGER.warning("Replacing unhealthy pooled driver")
+            try:
+                pooled_new = self.create()
+            except Exception:
+                # Keep the slot so the next lease tries to replace it again
+                self.idle.put(pooled)
+                raise
+            self.retire(pooled=pooled)
+            pooled = pooled_new
+
+        try:
+            yield pooled.driver
+        finally:
+            if self.closed:
+                self.retire(pooled=pooled)
+            elif self.needs_recycling(pooled=pooled):
+                self.replace(pooled=pooled)
+            else:
+                self.idle.put(pooled)
+
+    def replace(self, pooled: PooledDriver) -> NoReturn:
+        """
+        Puts a new driver in place of pooled, or pooled back if none can be started
+        so the pool never loses a slot.
+        """
+        try:
+            pooled_new = self.create()
+        except Exception as exception:
+            LOGGER.error(f"Failed to replace pooled driver, {exception=}")
+            self.idle.put(pooled)
+            return
+        self.retire(pooled=pooled)
+        self.idle.put(pooled_new)
+
+    def close(self) -> NoReturn:
+        self.closed = True
+        while True:
+            try:
+                pooled = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            self.retire(pooled=pooled)
+
+    def __enter__(self) -> "DriverPool":
+        return self
+
+    def __exit__(self, *args) -> NoReturn:
+        self.close()
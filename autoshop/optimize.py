@@ -0,0 +1,202 @@
+import math
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from autoshop.util.logging import logger as get_logger
+
+__all__ = [
+    "OBJECTIVE_COST",
+    "OBJECTIVE_WASTE",
+    "optimize_packs",
+    "solve",
+]
+
+LOGGER = get_logger(__name__)
+
+OBJECTIVE_COST = "cost"
+OBJECTIVE_WASTE = "waste"
+OBJECTIVE_DEFAULT = OBJECTIVE_COST
+# Grams per step of the dynamic programme, pack sizes are rounded down to it
+RESOLUTION_DEFAULT = 1.0
+MAX_PACKS_DEFAULT = 24
+COLUMNS_PACKS = ["food", "link", "amountGramPack", "price", "packs", "cost"]
+COST_INFINITE = np.iinfo(np.int64).max // 2
+
+
+def split_bounds(
+    bounds: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Splits up to bounds[i] copies of each pack i into items of 1, 2, 4, ... copies
+    so that any count up to the bound is a sum of distinct items.
+    """
+    types = []
+    multiples = []
+    for index, bound in enumerate(bounds):
+        multiple = 1
+        while bound > 0:
+            take = min(multiple, bound)
+            types.append(index)
+            multiples.append(take)
+            bound -= take
+            multiple *= 2
+    return np.array(types, dtype=np.int64), np.array(multiples, dtype=np.int64)
+
+
+def solve(
+    requirement: float,
+    sizes: np.ndarray,
+    prices: np.ndarray,
+    bounds: Optional[np.ndarray] = None,
+    objective: Optional[str] = None,
+    resolution: Optional[float] = None,
+) -> Optional[np.ndarray]:
+    """
+    Gets how many of each pack, of sizes grams for prices, to buy so they weigh
+    at least requirement grams. bounds caps the count of each pack.
+
+    The objective is the lowest cost then the least waste, or the least waste
+    then the lowest cost. Returns None if the bounds cannot cover requirement, or
+    requirement is not a finite number.
+    """
+    if objective is None:
+        objective = OBJECTIVE_DEFAULT
+
+    if resolution is None:
+        resolution = RESOLUTION_DEFAULT
+
+    if objective not in [OBJECTIVE_COST, OBJECTIVE_WASTE]:
+        raise ValueError(f"Unknown {objective=}")
+
+    sizes = np.asarray(sizes, dtype=float)
+    prices = np.asarray(prices, dtype=float)
+    bounds = (
+        np.full(len(sizes), MAX_PACKS_DEFAULT)
+        if bounds is None
+        else np.asarray(bounds, dtype=np.int64)
+    )
+    counts = np.zeros(len(sizes), dtype=np.int64)
+    if not np.isfinite(requirement):
+        return None
+
+    target = math.ceil(requirement / resolution)
+    if target <= 0:
+        return counts
+
+    weights = np.floor(np.nan_to_num(sizes, nan=0.0) / resolution).astype(np.int64)
+    usable = (weights > 0) & np.isfinite(prices) & (bounds > 0)
+    if not usable.any():
+        return None
+
+    # More copies of a single pack than cover the requirement on their own are
+    # never needed, neither are totals a whole pack over the requirement
+    bounds_usable = np.where(
+        usable, np.minimum(bounds, -(-target // np.maximum(weights, 1))), 0
+    )
+    types, multiples = split_bounds(bounds_usable)
+    item_weights = weights[types] * multiples
+    item_costs = np.round(prices[types] * 100).astype(np.int64) * multiples
+    states = target + int(weights[usable].max())
+
+    # cost[c] is the lowest cost of packs weighing exactly c steps
+    cost = np.full(states, COST_INFINITE, dtype=np.int64)
+    cost[0] = 0
+    taken = np.zeros((len(types), states), dtype=bool)
+    for item, (weight, item_cost) in enumerate(zip(item_weights, item_costs)):
+        if weight >= states:
+            continue
+        candidate = cost[:-weight] + item_cost
+        better = candidate < cost[weight:]
+        taken[item, weight:] = better
+        cost[weight:] = np.where(better, candidate, cost[weight:])
+
+    covering = cost[target:]
+    feasible = covering < COST_INFINITE
+    if not feasible.any():
+        return None
+    if objective == OBJECTIVE_COST:
+        # argmin takes the first of equal costs, which is the least waste
+        state = target + int(np.argmin(covering))
+    else:
+        state = target + int(np.argmax(feasible))
+
+    for item in range(len(types) - 1, -1, -1):
+        if taken[item, state]:
+            counts[types[item]] += multiples[item]
+            state -= item_weights[item]
+    return counts
+
+
+def optimize_packs(
+    requirements: pd.DataFrame,
+    candidates: pd.DataFrame,
+    objective: Optional[str] = None,
+    max_packs: Optional[int] = None,
+    resolution: Optional[float] = None,
+) -> pd.DataFrame:
+    """
+    Gets the packs to buy for every food in requirements, a frame of food and
+    amountGram, out of candidates, a frame of food, link, amountGram and price and
+    optionally out_of_stock and stock, the most of a pack that can be bought.
+
+    Returns a row per pack bought with its count as packs, foods that cannot be
+    covered, or whose amountGram is not a finite number, are left out.
+    """
+    if max_packs is None:
+        max_packs = MAX_PACKS_DEFAULT
+
+    # The food map sheet gives the prices as text
+    candidates = candidates.assign(
+        price=pd.to_numeric(candidates["price"], errors="coerce")
+    )
+    bounds = pd.Series(max_packs, index=candidates.index)
+    if "stock" in candidates:
+        bounds = candidates["stock"].fillna(max_packs).clip(upper=max_packs)
+    if "out_of_stock" in candidates:
+        bounds = bounds.where(
+            ~candidates["out_of_stock"].astype("boolean").fillna(False), 0
+        )
+    bounds = bounds.astype(int).to_numpy()
+    sizes = candidates["amountGram"].to_numpy(dtype=float)
+    prices = candidates["price"].to_numpy(dtype=float)
+    # Positions of the candidates of every food, the frame is only built at the end
+    groups = candidates.groupby("food", sort=False).indices
+
+    positions = []
+    packs = []
+    missing = []
+    for food, requirement in zip(requirements["food"], requirements["amountGram"]):
+        index = groups.get(food)
+        counts = (
+            None
+            if index is None
+            else solve(
+                requirement=requirement,
+                sizes=sizes[index],
+                prices=prices[index],
+                bounds=bounds[index],
+                objective=objective,
+                resolution=resolution,
+            )
+        )
+        if counts is None:
+            missing.append(food)
+            continue
+        positions.append(index[counts > 0])
+        packs.append(counts[counts > 0])
+
+    if missing:
+        LOGGER.warning(f"Cannot cover {missing=}")
+    if not positions:
+        return pd.DataFrame(columns=COLUMNS_PACKS)
+    return (
+        candidates.iloc[np.concatenate(positions)]
+        .assign(
+            amountGramPack=lambda x: x["amountGram"],
+            packs=np.concatenate(packs),
+            cost=lambda x: x["packs"] * x["price"],
+        )[COLUMNS_PACKS]
+        .reset_index(drop=True)
+    )
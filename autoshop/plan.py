@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+from autoshop.unit import parse_many
+from autoshop.util.logging import logger as get_logger
+
+__all__ = [
+    "COLUMNS_PLAN",
+    "DIAGNOSTIC_NO_GRAMS",
+    "DIAGNOSTIC_UNCONVERTED",
+    "DIAGNOSTIC_UNMAPPED",
+    "build_shopping_plan",
+    "prepare_food_map",
+    "prepare_shop",
+]
+
+LOGGER = get_logger(__name__)
+
+# The amount of the shop has no conversion to grams
+DIAGNOSTIC_UNCONVERTED = "unconverted"
+# The food map has no product for the food
+DIAGNOSTIC_UNMAPPED = "unmapped"
+# The food map has products for the food but none measured in grams
+DIAGNOSTIC_NO_GRAMS = "no_grams"
+COLUMNS_PLAN = [
+    "food",
+    "nameFood",
+    "amountGram",
+    "quantityUnderlying",
+    "link",
+    "amountGramTesco",
+    "packs",
+    "diagnostic",
+]
+
+
+def prepare_food_map(
+    food_map: pd.DataFrame,
+    conversion: pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    Gets the food map with amountGram, from the unit or else the conversion of
+    the food, and amountMilliliter, sorted by food then order.
+    """
+    order = range(len(food_map))
+    if "order" in food_map:
+        # The food map sheet gives the order as text
+        order = pd.to_numeric(food_map["order"], errors="coerce")
+    df = (
+        food_map.assign(order=order)
+        .dropna(subset=["amount"])
+        .assign(unit=lambda x: x["unit"].where(x["unit"] != "pack", ""))
+        .merge(
+            conversion[["food", "unit", "toGram"]],
+            how="left",
+            on=["food", "unit"],
+        )
+    )
+    amount_gram, _ = parse_many(amounts=df["amount"], units=df["unit"], unit_to="g")
+    amount_milliliter, _ = parse_many(
+        amounts=df["amount"], units=df["unit"], unit_to="ml"
+    )
+    return (
+        df.assign(
+            amountGram=pd.Series(amount_gram, index=df.index).fillna(
+                df["amount"] * df["toGram"]
+            ),
+            amountMilliliter=amount_milliliter,
+        )
+        .sort_values(["food", "order"], kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+def prepare_shop(
+    shop: pd.DataFrame,
+    conversion: pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    Gets the amount in grams of every food of the shop, NaN if any of its amounts
+    has no conversion, with the amounts it sums up as quantityUnderlying.
+    """
+    df = shop.merge(
+        conversion[["food", "unit", "toGram"]], how="left", on=["food", "unit"]
+    ).assign(
+        amountGram=lambda x: x["amount"].where(
+            x["unit"] == "g", x["amount"] * x["toGram"]
+        ),
+        quantityUnderlying=lambda x: x["amount"].astype(str) + " " + x["unit"],
+    )
+    groups = df.groupby(["food", "nameFood"], sort=True)
+    return (
+        groups["amountGram"]
+        .sum()
+        .mask(df["amountGram"].isna().groupby([df["food"], df["nameFood"]]).any())
+        .to_frame()
+        .assign(quantityUnderlying=groups["quantityUnderlying"].agg(", ".join))
+        .reset_index()
+    )
+
+
+def build_shopping_plan(
+    shop: pd.DataFrame,
+    conversion: pd.DataFrame,
+    food_map: pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    Gets a row per food of the shop, with the link and amountGramTesco of its
+    first product in grams of the food map and the packs that cover it.
+
+    Foods that cannot be bought have no link and say why in diagnostic.
+    """
+    food_map_prepared = prepare_food_map(food_map=food_map, conversion=conversion)
+
+    df_shop = prepare_shop(shop=shop, conversion=conversion)
+    # Already sorted by food then order, so the first row of a food is its product
+    in_grams = food_map_prepared[
+        food_map_prepared["amountGram"].gt(0)
+        & food_map_prepared["amountMilliliter"].isna()
+    ]
+    first = in_grams[~in_grams["food"].duplicated()].set_index("food")
+    chosen = first.reindex(df_shop["food"])
+
+    df = df_shop.assign(
+        link=chosen["link"].to_numpy(),
+        amountGramTesco=chosen["amountGram"].to_numpy(),
+    ).assign(
+        packs=lambda x: (
+            np.ceil(x["amountGram"] / x["amountGramTesco"])
+            .clip(lower=1)
+            .astype("Int64")
+        ),
+        diagnostic=lambda x: np.select(
+            [
+                x["amountGram"].isna(),
+                ~x["food"].isin(food_map["food"]),
+                x["link"].isna(),
+            ],
+            [DIAGNOSTIC_UNCONVERTED, DIAGNOSTIC_UNMAPPED, DIAGNOSTIC_NO_GRAMS],
+            default=None,
+        ),
+    )
+
+    counts = df["diagnostic"].value_counts()
+    if not counts.empty:
+        LOGGER.warning(f"Cannot plan {counts.to_dict()=}")
+    return df[COLUMNS_PLAN]
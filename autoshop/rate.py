@@ -0,0 +1,175 @@
+import functools
+import math
+import threading
+import time
+from typing import Callable, NoReturn, Optional
+
+from autoshop.util.logging import logger as get_logger
+from autoshop.util.typing import WebDriver
+
+__all__ = [
+    "TEXTS_CHALLENGE",
+    "TokenBucket",
+    "is_challenge",
+    "limiter",
+    "navigate",
+    "pace",
+]
+
+LOGGER = get_logger(__name__)
+
+# Actions per second once the site has been responsive for a while
+RATE_DEFAULT = 1.0
+BURST_DEFAULT = 3
+# Never slow down to less than one action every this many seconds
+RATE_MIN_DEFAULT = 1 / 30
+FACTOR_BACKOFF = 0.5
+# Share of the full rate won back after every action that was not challenged
+STEP_RECOVER = 0.1
+MAX_RETRIES_CHALLENGE = 2
+# Titles of bot challenges and error pages served instead of the page asked for
+TEXTS_CHALLENGE = [
+    "Access Denied",
+    "Attention Required",
+    "Just a moment",
+    "Pardon Our Interruption",
+    "Request unsuccessful",
+    "Too Many Requests",
+    "Service Unavailable",
+]
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket, every action takes a token and tokens come back at
+    rate per second up to burst.
+
+    backoff halves the rate down to rate_min and drops the saved up tokens,
+    recover wins the rate back a step at a time.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        rate_min: Optional[float] = None,
+        clock: Optional[Callable[[], float]] = None,
+        sleep: Optional[Callable[[float], object]] = None,
+    ) -> None:
+        if rate is None:
+            rate = RATE_DEFAULT
+
+        if burst is None:
+            burst = BURST_DEFAULT
+
+        if rate_min is None:
+            rate_min = min(rate, RATE_MIN_DEFAULT)
+
+        if clock is None:
+            clock = time.monotonic
+
+        if sleep is None:
+            sleep = time.sleep
+
+        self.rate_max = rate
+        self.rate = rate
+        self.rate_min = rate_min
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self) -> float:
+        """
+        Takes a token, waiting until there is one. Returns the seconds waited.
+        """
+        if math.isinf(self.rate):
+            return 0.0
+
+        with self.lock:
+            self.refill(now=self.clock())
+            # Reserve the token now so waiting threads queue up behind each other
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    def backoff(self) -> NoReturn:
+        with self.lock:
+            self.refill(now=self.clock())
+            self.rate = max(self.rate_min, self.rate * FACTOR_BACKOFF)
+            self.tokens = min(self.tokens, 0.0)
+        LOGGER.warning(f"Backing off to {self.rate=:.3f}/s")
+
+    def recover(self) -> NoReturn:
+        with self.lock:
+            if self.rate >= self.rate_max:
+                return
+            self.refill(now=self.clock())
+            self.rate = min(self.rate_max, self.rate + self.rate_max * STEP_RECOVER)
+        LOGGER.debug(f"Recovering to {self.rate=:.3f}/s")
+
+
+@functools.cache
+def limiter() -> TokenBucket:
+    """
+    The bucket shared by every thread and driver of the process.
+    """
+    return TokenBucket()
+
+
+def pace(
+    bucket: Optional[TokenBucket] = None,
+) -> float:
+    """
+    Waits for a token before an action such as a click.
+    """
+    if bucket is None:
+        bucket = limiter()
+    return bucket.acquire()
+
+
+def is_challenge(
+    driver: WebDriver,
+) -> bool:
+    title = driver.title
+    return any(text.casefold() in title.casefold() for text in TEXTS_CHALLENGE)
+
+
+def navigate(
+    driver: WebDriver,
+    url: str,
+    bucket: Optional[TokenBucket] = None,
+    max_retries: Optional[int] = None,
+) -> bool:
+    """
+    Loads url once the bucket allows it. A challenge or error page makes the
+    bucket back off before trying again, up to max_retries times.
+
+    Returns whether the page was loaded without a challenge.
+    """
+    if bucket is None:
+        bucket = limiter()
+
+    if max_retries is None:
+        max_retries = MAX_RETRIES_CHALLENGE
+
+    for attempt in range(max_retries + 1):
+        bucket.acquire()
+        driver.get(url)
+        if not is_challenge(driver=driver):
+            bucket.recover()
+            return True
+        LOGGER.warning(f"Challenged on {url=}, {attempt=}")
+        bucket.backoff()
+
+    LOGGER.error(f"Still challenged on {url=} after {max_retries=}")
+    return False
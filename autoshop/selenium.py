@@ -1,19 +1,33 @@
-import time
-from typing import NoReturn, Optional
-
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from typing import Callable, NoReturn, Optional, Union
+
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions
 from selenium.webdriver.support.ui import WebDriverWait
 
+from autoshop.rate import TokenBucket, pace
 from autoshop.util.logging import logger as get_logger
 from autoshop.util.typing import WebDriver, WebElement
 
 __all__ = [
     "by",
     "keys",
+    "STRATEGY_CLICKABLE",
+    "STRATEGY_NETWORK_IDLE",
+    "STRATEGY_PRESENT",
+    "STRATEGY_STABLE",
+    "STRATEGY_VISIBLE",
     "TimeoutException",
+    "extract_all",
+    "observe_and_check_exists",
+    "observe_and_get",
+    "wait_until_ready",
     "wait_and_check_exists",
     "wait_and_click",
     "wait_and_delete_and_send_keys",
@@ -22,14 +36,200 @@ __all__ = [
     "wait_and_get_all",
     "wait_and_select_all_and_send_keys",
     "wait_and_send_keys",
+    "wait_for_any",
 ]
 
 TIMEOUT_DEFAULT = 10
 LOGGER = get_logger(__name__)
 
+STRATEGY_PRESENT = "present"
+STRATEGY_VISIBLE = "visible"
+STRATEGY_CLICKABLE = "clickable"
+STRATEGY_STABLE = "stable"
+STRATEGY_NETWORK_IDLE = "network_idle"
+# Read on every call so it can be changed at runtime, e.g.
+# autoshop.selenium.STRATEGY_DEFAULT = autoshop.selenium.STRATEGY_STABLE
+STRATEGY_DEFAULT = STRATEGY_PRESENT
+POLL_INTERVAL_DEFAULT = 0.1
+
+SCRIPT_SNAPSHOT_ELEMENT = """
+const rect = arguments[0].getBoundingClientRect();
+return [rect.x, rect.y, rect.width, rect.height, arguments[0].innerText];
+"""
+SCRIPT_SNAPSHOT_NETWORK = """
+return [document.readyState, performance.getEntriesByType('resource').length];
+"""
+
+SCRIPT_EXTRACT_ALL = """
+const [value, byXpath, xpathsText, prefixSponsored] = arguments;
+const nodes = [];
+if (byXpath) {
+    const snapshot = document.evaluate(
+        value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+    );
+    for (let i = 0; i < snapshot.snapshotLength; i++) {
+        nodes.push(snapshot.snapshotItem(i));
+    }
+} else {
+    nodes.push(...document.querySelectorAll(value));
+}
+const textOf = (node) => (node.innerText || node.textContent || "").trim();
+return nodes.map((node) => {
+    const parent = node.parentElement || node;
+    const image = parent.querySelector("img");
+    const record = {
+        text: textOf(node),
+        href: node.href || node.getAttribute("href"),
+        srcset: image ? image.getAttribute("srcset") : null,
+        sponsored: prefixSponsored ? textOf(parent).startsWith(prefixSponsored) : false,
+    };
+    for (const [key, xpath] of Object.entries(xpathsText)) {
+        const match = document.evaluate(
+            xpath, parent, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+        ).singleNodeValue;
+        record[key] = match ? textOf(match) : null;
+    }
+    return record;
+});
+"""
+
+SCRIPT_OBSERVE = """
+const [value, byXpath, timeout, done] = arguments;
+const find = () => byXpath
+    ? document.evaluate(
+        value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+    ).singleNodeValue
+    : document.querySelector(value);
+const found = find();
+if (found) {
+    done(found);
+    return;
+}
+const observer = new MutationObserver(() => {
+    const node = find();
+    if (node) {
+        observer.disconnect();
+        clearTimeout(timer);
+        done(node);
+    }
+});
+const timer = setTimeout(() => {
+    observer.disconnect();
+    done(null);
+}, timeout);
+observer.observe(
+    document.documentElement,
+    {childList: true, subtree: true, attributes: true, characterData: true},
+);
+"""
+SELECTORS_CSS = {
+    By.ID: "[id='{value}']",
+    By.NAME: "[name='{value}']",
+    By.CLASS_NAME: ".{value}",
+    By.TAG_NAME: "{value}",
+    By.CSS_SELECTOR: "{value}",
+}
+
 by = By
 keys = Keys
 
+Condition = Callable[[WebDriver], Union[WebElement, bool]]
+
+
+def condition_present(by: By, value: str) -> Condition:
+    return expected_conditions.presence_of_element_located((by, value))
+
+
+def condition_visible(by: By, value: str) -> Condition:
+    return expected_conditions.visibility_of_element_located((by, value))
+
+
+def condition_clickable(by: By, value: str) -> Condition:
+    return expected_conditions.element_to_be_clickable((by, value))
+
+
+def condition_stable(by: By, value: str) -> Condition:
+    """
+    Element is present and its bounding box and text are the same on two
+    consecutive polls.
+    """
+
+    previous = []
+
+    def condition(driver: WebDriver) -> Union[WebElement, bool]:
+        try:
+            element = driver.find_element(by=by, value=value)
+            snapshot = driver.execute_script(SCRIPT_SNAPSHOT_ELEMENT, element)
+        except (NoSuchElementException, StaleElementReferenceException):
+            previous.clear()
+            return False
+        stable = previous == [snapshot]
+        previous[:] = [snapshot]
+        return element if stable else False
+
+    return condition
+
+
+def condition_network_idle(by: By, value: str) -> Condition:
+    """
+    Element is present, the document has loaded and no new resources were
+    fetched since the previous poll.
+    """
+
+    previous = []
+    present = condition_present(by=by, value=value)
+
+    def condition(driver: WebDriver) -> Union[WebElement, bool]:
+        element = present(driver)
+        if not element:
+            return False
+        snapshot = driver.execute_script(SCRIPT_SNAPSHOT_NETWORK)
+        idle = snapshot[0] == "complete" and previous == [snapshot]
+        previous[:] = [snapshot]
+        return element if idle else False
+
+    return condition
+
+
+CONDITIONS = {
+    STRATEGY_PRESENT: condition_present,
+    STRATEGY_VISIBLE: condition_visible,
+    STRATEGY_CLICKABLE: condition_clickable,
+    STRATEGY_STABLE: condition_stable,
+    STRATEGY_NETWORK_IDLE: condition_network_idle,
+}
+
+
+def wait_until_ready(
+    driver: WebDriver,
+    value: str,
+    by: Optional[By] = None,
+    timeout: Optional[int] = None,
+    strategy: Optional[str] = None,
+    poll_interval: Optional[float] = None,
+) -> NoReturn:
+    """
+    Waits until the first element found is ready according to the strategy.
+    """
+
+    if by is None:
+        by = By.XPATH
+
+    if timeout is None:
+        timeout = TIMEOUT_DEFAULT
+
+    if strategy is None:
+        strategy = STRATEGY_DEFAULT
+
+    if poll_interval is None:
+        poll_interval = POLL_INTERVAL_DEFAULT
+
+    if strategy not in CONDITIONS:
+        raise ValueError(f"Unknown {strategy=}, expected one of {list(CONDITIONS)}")
+
+    wait = CONDITIONS[strategy](by=by, value=value)
+    WebDriverWait(driver, timeout, poll_frequency=poll_interval).until(wait)
+
 
 def wait_and_check_exists(
     driver: WebDriver,
@@ -68,6 +268,8 @@ def wait_and_get(
     by: Optional[By] = None,
     timeout: Optional[int] = None,
     log: Optional[bool] = None,
+    strategy: Optional[str] = None,
+    poll_interval: Optional[float] = None,
 ) -> WebElement:
     """
     Waits and gets the first element found.
@@ -83,16 +285,22 @@ def wait_and_get(
         log = True
 
     if log:
-        LOGGER.debug(f"{wait_and_get.__name__} {by=}, {value=}, {timeout=}")
+        LOGGER.debug(
+            f"{wait_and_get.__name__} {by=}, {value=}, {timeout=}, {strategy=}"
+        )
 
-    wait = expected_conditions.presence_of_element_located((by, value))
-    WebDriverWait(driver, timeout).until(wait)
+    wait_until_ready(
+        driver=driver,
+        value=value,
+        by=by,
+        timeout=timeout,
+        strategy=strategy,
+        poll_interval=poll_interval,
+    )
 
     if log:
         LOGGER.debug(f"Waited for: {by=}, {value=}")
 
-    time.sleep(1)
-
     return driver.find_element(by=by, value=value)
 
 
@@ -102,6 +310,8 @@ def wait_and_get_all(
     by: Optional[By] = None,
     timeout: Optional[int] = None,
     log: Optional[bool] = None,
+    strategy: Optional[str] = None,
+    poll_interval: Optional[float] = None,
 ) -> list[WebElement]:
     """
     Waits and gets all elements found.
@@ -117,16 +327,22 @@ def wait_and_get_all(
         log = True
 
     if log:
-        LOGGER.debug(f"{wait_and_get_all.__name__} {by=}, {value=}, {timeout=}")
+        LOGGER.debug(
+            f"{wait_and_get_all.__name__} {by=}, {value=}, {timeout=}, {strategy=}"
+        )
 
-    wait = expected_conditions.presence_of_element_located((by, value))
-    WebDriverWait(driver, timeout).until(wait)
+    wait_until_ready(
+        driver=driver,
+        value=value,
+        by=by,
+        timeout=timeout,
+        strategy=strategy,
+        poll_interval=poll_interval,
+    )
 
     if log:
         LOGGER.debug(f"Waited to get all for: {by=}, {value=}")
 
-    time.sleep(1)
-
     return driver.find_elements(by=by, value=value)
 
 
@@ -136,12 +352,26 @@ def wait_and_click(
     by: Optional[By] = None,
     timeout: Optional[int] = None,
     log: Optional[bool] = None,
+    strategy: Optional[str] = None,
+    poll_interval: Optional[float] = None,
+    bucket: Optional[TokenBucket] = None,
 ) -> NoReturn:
     """
-    Waits and clicks the first element found via itself.
+    Waits and clicks the first element found via itself, once bucket allows it,
+    the shared limiter by default.
     """
 
-    element = wait_and_get(driver=driver, value=value, by=by, timeout=timeout, log=log)
+    # Before the lookup, so the page cannot re-render the element while waiting
+    pace(bucket=bucket)
+    element = wait_and_get(
+        driver=driver,
+        value=value,
+        by=by,
+        timeout=timeout,
+        log=log,
+        strategy=strategy,
+        poll_interval=poll_interval,
+    )
     element.click()
 
     if log is None:
@@ -157,12 +387,26 @@ def wait_and_execute_click(
     by: Optional[By] = None,
     timeout: Optional[int] = None,
     log: Optional[bool] = None,
+    strategy: Optional[str] = None,
+    poll_interval: Optional[float] = None,
+    bucket: Optional[TokenBucket] = None,
 ) -> NoReturn:
     """
-    Waits and clicks the first element found via javascript.
+    Waits and clicks the first element found via javascript, once bucket allows
+    it, the shared limiter by default.
     """
 
-    element = wait_and_get(driver=driver, value=value, by=by, timeout=timeout, log=log)
+    # Before the lookup, so the page cannot re-render the element while waiting
+    pace(bucket=bucket)
+    element = wait_and_get(
+        driver=driver,
+        value=value,
+        by=by,
+        timeout=timeout,
+        log=log,
+        strategy=strategy,
+        poll_interval=poll_interval,
+    )
     driver.execute_script("arguments[0].click();", element)
 
     if log is None:
@@ -179,12 +423,22 @@ def wait_and_send_keys(
     by: Optional[By] = None,
     timeout: Optional[int] = None,
     log: Optional[bool] = None,
+    strategy: Optional[str] = None,
+    poll_interval: Optional[float] = None,
 ) -> NoReturn:
     """
     Waits and sends keys to the first element found.
     """
 
-    element = wait_and_get(driver=driver, value=value, by=by, timeout=timeout, log=log)
+    element = wait_and_get(
+        driver=driver,
+        value=value,
+        by=by,
+        timeout=timeout,
+        log=log,
+        strategy=strategy,
+        poll_interval=poll_interval,
+    )
     element.send_keys(keys)
 
     if log is None:
@@ -201,12 +455,21 @@ def wait_and_select_all_and_send_keys(
     by: Optional[By] = None,
     timeout: Optional[int] = None,
     log: Optional[bool] = None,
+    strategy: Optional[str] = None,
+    poll_interval: Optional[float] = None,
 ) -> NoReturn:
     """
     Waits, selects all in the first element found and then sends keys to the same element.
     """
 
-    element = wait_and_get(driver=driver, value=value, by=by, timeout=timeout)
+    element = wait_and_get(
+        driver=driver,
+        value=value,
+        by=by,
+        timeout=timeout,
+        strategy=strategy,
+        poll_interval=poll_interval,
+    )
     element.send_keys(Keys.CONTROL + "a")
     element.send_keys(keys)
 
@@ -226,12 +489,21 @@ def wait_and_delete_and_send_keys(
     by: Optional[By] = None,
     timeout: Optional[int] = None,
     log: Optional[bool] = None,
+    strategy: Optional[str] = None,
+    poll_interval: Optional[float] = None,
 ) -> NoReturn:
     """
     Waits, sends keys to the first element found then sends a single delete to the same element.
     """
 
-    element = wait_and_get(driver=driver, value=value, by=by, timeout=timeout)
+    element = wait_and_get(
+        driver=driver,
+        value=value,
+        by=by,
+        timeout=timeout,
+        strategy=strategy,
+        poll_interval=poll_interval,
+    )
 
     for _ in range(5):
         element.send_keys(Keys.DELETE)
@@ -242,3 +514,204 @@ def wait_and_delete_and_send_keys(
 
     if log:
         LOGGER.debug(f"{wait_and_delete_and_send_keys.__name__}: {keys=}, {value=}")
+
+
+def extract_all(
+    driver: WebDriver,
+    value: str,
+    by: Optional[By] = None,
+    xpaths_text: Optional[dict[str, str]] = None,
+    prefix_sponsored: Optional[str] = None,
+    log: Optional[bool] = None,
+) -> list[dict]:
+    """
+    Gets a plain record for every element found in a single script call.
+
+    Each record has the element's text and href, the srcset of the first image in
+    its parent, whether the parent's text starts with prefix_sponsored and the
+    text of the first match of each of xpaths_text relative to the parent.
+    """
+
+    if by is None:
+        by = By.XPATH
+
+    if xpaths_text is None:
+        xpaths_text = {}
+
+    if log is None:
+        log = True
+
+    if by not in (By.XPATH, By.CSS_SELECTOR):
+        raise ValueError(f"Unsupported {by=}, expected {By.XPATH} or {By.CSS_SELECTOR}")
+
+    records = driver.execute_script(
+        SCRIPT_EXTRACT_ALL,
+        value,
+        by == By.XPATH,
+        xpaths_text,
+        prefix_sponsored,
+    )
+
+    if log:
+        LOGGER.debug(f"{extract_all.__name__} {by=}, {value=}, {len(records)=}")
+
+    return records
+
+
+def observe(
+    driver: WebDriver,
+    value: str,
+    by: By,
+    timeout: int,
+) -> Optional[WebElement]:
+    """
+    Waits for the first element found with a MutationObserver in a single script
+    call, returns None on timeout.
+
+    Raises WebDriverException if the script could not be run.
+    """
+
+    if by == By.XPATH:
+        selector, by_xpath = value, True
+    elif by in SELECTORS_CSS:
+        selector, by_xpath = SELECTORS_CSS[by].format(value=value), False
+    else:
+        raise WebDriverException(f"Unsupported {by=} for a MutationObserver")
+
+    try:
+        return driver.execute_async_script(
+            SCRIPT_OBSERVE,
+            selector,
+            by_xpath,
+            timeout * 1_000,
+        )
+    except TimeoutException:
+        # The driver's script timeout is shorter than the requested timeout
+        return None
+
+
+def observe_and_check_exists(
+    driver: WebDriver,
+    value: str,
+    by: Optional[By] = None,
+    timeout: Optional[int] = None,
+    log: Optional[bool] = None,
+) -> bool:
+    """
+    Waits and checks if element exists via a MutationObserver, falls back to
+    polling if the observer could not be injected.
+    """
+
+    if by is None:
+        by = By.XPATH
+
+    if timeout is None:
+        timeout = TIMEOUT_DEFAULT
+
+    if log is None:
+        log = True
+
+    if log:
+        LOGGER.debug(f"{observe_and_check_exists.__name__} {by=}, {value=}, {timeout=}")
+
+    try:
+        element = observe(driver=driver, value=value, by=by, timeout=timeout)
+    except WebDriverException as exception:
+        LOGGER.debug(f"Falling back to polling for {value=}, {exception=}")
+        return wait_and_check_exists(
+            driver=driver,
+            value=value,
+            by=by,
+            timeout=timeout,
+            log=log,
+        )
+    return element is not None
+
+
+def observe_and_get(
+    driver: WebDriver,
+    value: str,
+    by: Optional[By] = None,
+    timeout: Optional[int] = None,
+    log: Optional[bool] = None,
+) -> WebElement:
+    """
+    Waits and gets the first element found via a MutationObserver, falls back to
+    polling if the observer could not be injected.
+    """
+
+    if by is None:
+        by = By.XPATH
+
+    if timeout is None:
+        timeout = TIMEOUT_DEFAULT
+
+    if log is None:
+        log = True
+
+    if log:
+        LOGGER.debug(f"{observe_and_get.__name__} {by=}, {value=}, {timeout=}")
+
+    try:
+        element = observe(driver=driver, value=value, by=by, timeout=timeout)
+    except WebDriverException as exception:
+        LOGGER.debug(f"Falling back to polling for {value=}, {exception=}")
+        return wait_and_get(
+            driver=driver,
+            value=value,
+            by=by,
+            timeout=timeout,
+            log=log,
+        )
+
+    if element is None:
+        raise TimeoutException(f"Timed out observing for {by=}, {value=}")
+
+    if log:
+        LOGGER.debug(f"Observed: {by=}, {value=}")
+
+    return element
+
+
+def wait_for_any(
+    driver: WebDriver,
+    outcomes: dict[str, str],
+    by: Optional[By] = None,
+    timeout: Optional[int] = None,
+    log: Optional[bool] = None,
+    poll_interval: Optional[float] = None,
+) -> str:
+    """
+    Waits for any of the outcomes' elements to exist and returns the name of the
+    first one found, in the order of outcomes.
+    """
+
+    if by is None:
+        by = By.XPATH
+
+    if timeout is None:
+        timeout = TIMEOUT_DEFAULT
+
+    if log is None:
+        log = True
+
+    if poll_interval is None:
+        poll_interval = POLL_INTERVAL_DEFAULT
+
+    if log:
+        LOGGER.debug(f"{wait_for_any.__name__} {by=}, {outcomes=}, {timeout=}")
+
+    def condition(driver: WebDriver) -> Union[str, bool]:
+        for name, value in outcomes.items():
+            if driver.find_elements(by=by, value=value):
+                return name
+        return False
+
+    outcome = WebDriverWait(driver, timeout, poll_frequency=poll_interval).until(
+        condition
+    )
+
+    if log:
+        LOGGER.debug(f"Waited for any: {outcome=}")
+
+    return outcome
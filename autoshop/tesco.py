@@ -1,45 +1,103 @@
+import concurrent.futures
 import getpass
+import itertools
+import json
+import math
 import re
+import sqlite3
+import threading
 import time
 import urllib.parse
-from collections import namedtuple
-from typing import NoReturn, Optional
+from collections import defaultdict, namedtuple
+from pathlib import Path
+from typing import Callable, Iterator, NoReturn, Optional, Union
 
+import lxml.html
+import numpy as np
+import pandas as pd
+from lxml import etree
+
+from autoshop.chrome import DriverPool, get_json_responses, save_cookies
 from autoshop.environment import get as get_env
+from autoshop.rate import TokenBucket, is_challenge, navigate, pace
 from autoshop.selenium import (
+    STRATEGY_CLICKABLE,
+    STRATEGY_NETWORK_IDLE,
     TimeoutException,
     by,
+    extract_all,
     wait_and_check_exists,
     wait_and_click,
     wait_and_delete_and_send_keys,
     wait_and_execute_click,
     wait_and_get,
     wait_and_get_all,
+    wait_and_select_all_and_send_keys,
     wait_and_send_keys,
+    wait_for_any,
+    wait_until_ready,
 )
+from autoshop.unit import parse_many
 from autoshop.util.logging import logger as get_logger
 from autoshop.util.typing import WebDriver, WebElement
 
 __all__ = [
+    "Catalog",
+    "Journal",
+    "OrderStore",
     "Quantity",
     "add_food_to_basket",
     "add_food_to_basket_with_retry",
+    "add_foods_to_basket",
+    "book_slot",
     "checkout",
+    "choose_products",
+    "diff_basket",
     "empty_basket",
+    "ensure_logged_in",
+    "get_api_payloads",
+    "get_basket_from_payloads",
+    "get_delivery_slots",
     "get_food_elements",
+    "get_food_elements_from_snapshot",
     "get_food_url",
     "get_image_url",
+    "get_image_url_from_snapshot",
     "get_price",
+    "get_price_from_snapshot",
+    "get_product",
+    "get_product_id",
+    "get_products",
+    "get_products_from_payloads",
+    "get_quantities",
     "get_quantity_from_description",
     "go_to_delivery_slots",
     "go_to_orders",
+    "is_logged_in",
+    "iter_search_results",
     "login",
     "make_changes_to_nth_order",
+    "parse_basket_page",
+    "parse_delivery_slots",
+    "parse_order_page",
+    "parse_orders_page",
+    "parse_product_page",
+    "parse_search_page",
     "pay",
+    "read_basket",
+    "reconcile_basket",
+    "scrape_catalog",
+    "set_basket_quantity",
+    "stop_after_matches",
+    "sync_orders",
+    "to_image_url",
+    "to_price",
+    "watch_slots",
 ]
 
 
 URL_LOGIN_DEFAULT = "https://www.tesco.com/account/login/en-GB?from=/"
+PATH_LOGIN = "/account/login"
 EMAIL_LOGIN = "EMAIL_LOGIN"
 PASSWORD_LOGIN = "PASSWORD_LOGIN"
 
@@ -64,7 +122,7 @@ def login(
     if password is None:
         password = get_env(key=PASSWORD_LOGIN)
 
-    driver.get(url)
+    navigate(driver=driver, url=url)
 
     LOGGER.info(f"Logging into via {url=} with {email=}")
 
@@ -74,13 +132,12 @@ def login(
         value=xpath_cookies_accept,
     )
 
-    time.sleep(5)
-
     xpath_email = "//input[@id='email']"
     _ = wait_and_send_keys(
         driver=driver,
         value=xpath_email,
         keys=email,
+        strategy=STRATEGY_CLICKABLE,
     )
 
     xpath_next = "//button/span[text()='Next']"
@@ -123,6 +180,44 @@ def login(
     return driver
 
 
+def is_logged_in(
+    driver: WebDriver,
+    url: Optional[str] = None,
+) -> bool:
+    """
+    Checks the session with a single page load, a page behind the login redirects
+    to the login page once the session has expired.
+    """
+    if url is None:
+        url = URL_ORDERS
+
+    navigate(driver=driver, url=url)
+    logged_in = PATH_LOGIN not in driver.current_url
+    LOGGER.debug(f"{logged_in=} from {url=}")
+    return logged_in
+
+
+def ensure_logged_in(
+    driver: WebDriver,
+    url: Optional[str] = None,
+    email: Optional[str] = None,
+    password: Optional[str] = None,
+    path_cookies: Optional[Path] = None,
+) -> bool:
+    """
+    Only logs in if the session has expired and returns whether it had to. The
+    cookies of a new session are exported to path_cookies if given.
+    """
+    if is_logged_in(driver=driver):
+        LOGGER.info("Reusing the existing session")
+        return False
+
+    login(driver=driver, url=url, email=email, password=password)
+    if path_cookies is not None:
+        save_cookies(driver=driver, path=path_cookies)
+    return True
+
+
 URL_FOOD_TEMPLATE = "https://www.tesco.com/groceries/en-GB/search?query={query}&page={page}&count={count}"
 
 
@@ -139,17 +234,34 @@ def get_food_url(
     )
 
 
+XPATH_FOOD = (
+    "//ul[@class = 'product-list grid']"
+    "//li"
+    "//a[starts-with(@href, '/groceries/en-GB/products/')]"
+)
+XPATH_FOOD_DESCRIPTION = (
+    ".//a[starts-with(@href, '/groceries/en-GB/products/')]//span[text() != '']"
+)
+XPATH_PRICE = (
+    ".//p[contains(text(), '£') "
+    "and not(contains(text(), '/each')) "
+    "and @class != 'product-info-message']"
+)
+XPATH_OUT_OF_STOCK = (
+    "//span[contains(text(),'currently out of stock') "
+    "or contains(text(),'product quantity can no longer be increased')]"
+)
+XPATH_IN_BASKET = "//p[contains(text(),'in basket')]"
+TEXT_SPONSORED = "Sponsored"
+
+
 def get_food_elements(
     driver: WebDriver,
 ) -> list[WebElement]:
     try:
         elements = wait_and_get_all(
             driver=driver,
-            value=(
-                "//ul[@class = 'product-list grid']"
-                "//li"
-                "//a[starts-with(@href, '/groceries/en-GB/products/')]"
-            ),
+            value=XPATH_FOOD,
         )
     except KeyboardInterrupt as e:
         raise e
@@ -164,7 +276,9 @@ def get_food_elements(
         element
         for element in elements
         if not (
-            element.find_element(by=by.XPATH, value="..").text.startswith("Sponsored")
+            element.find_element(by=by.XPATH, value="..").text.startswith(
+                TEXT_SPONSORED
+            )
         )
     ]
     return elements
@@ -174,22 +288,22 @@ def get_price(
     element: WebElement,
 ) -> float:
     try:
-        return float(
-            element.find_element(
-                by=by.XPATH,
-                value=(
-                    ".//p[contains(text(), '£') "
-                    "and not(contains(text(), '/each')) "
-                    "and @class != 'product-info-message']"
-                ),
-            ).text.replace("£", "")
-        )
+        return to_price(element.find_element(by=by.XPATH, value=XPATH_PRICE).text)
     except KeyboardInterrupt as e:
         raise e
     except Exception:
         return float("nan")
 
 
+def to_price(
+    text: Optional[str],
+) -> float:
+    try:
+        return float(text.replace("£", ""))
+    except Exception:
+        return float("nan")
+
+
 X = "x"
 PACK = "pack"
 PATTERN_MULTIPLIER = f"(?P<multiplier>[0-9]+)\s*(?P<x_pack>{X}|{PACK})\s*"
@@ -223,6 +337,29 @@ def get_quantity_from_description(description: Optional[str]) -> Quantity:
     )
 
 
+def get_quantities(
+    descriptions: pd.Series,
+) -> pd.DataFrame:
+    """
+    Gets the amount and unit of every description in a single pass, the same as
+    get_quantity_from_description on each.
+    """
+    groups = descriptions.str.extract(PATTERN_DESCRIPTION)
+    # We want to ignore if pack is in the first bit because there is another unit after
+    is_pack = groups["x_pack"].str.casefold().str.contains(PACK, regex=False, na=False)
+    multiplier = groups["multiplier"].astype(float).mask(is_pack, 1.0)
+    return pd.DataFrame(
+        dict(
+            amount=multiplier.fillna(1.0) * groups["amount"].astype(float),
+            unit=groups["unit"]
+            .str.casefold()
+            .replace({PACK: "medium"})
+            .astype("category"),
+        ),
+        index=descriptions.index,
+    )
+
+
 def validate_multiplier(value: Optional[str]) -> float:
     return (
         1.0
@@ -237,27 +374,1341 @@ def get_image_url(
     if value is None:
         return "NA"
     try:
-        return (
-            value.find_element(by=by.XPATH, value=".//img")
-            .get_attribute("srcset")
-            .split(" ")[0]
+        return to_image_url(
+            value.find_element(by=by.XPATH, value=".//img").get_attribute("srcset")
         )
     except Exception:
         return "NA"
 
 
+def to_image_url(
+    srcset: Optional[str],
+) -> str:
+    if not srcset:
+        return "NA"
+    return srcset.split(" ")[0]
+
+
+COLUMNS_PRODUCTS = [
+    "description",
+    "link",
+    "image",
+    "amount",
+    "unit",
+    "price",
+    "sponsored",
+]
+
+
+def get_products(
+    driver: WebDriver,
+    url: Optional[str] = None,
+    include_sponsored: bool = False,
+    bucket: Optional[TokenBucket] = None,
+) -> pd.DataFrame:
+    """
+    Gets the products on a search page with a single script call.
+    """
+    if url is not None:
+        navigate(driver=driver, url=url, bucket=bucket)
+
+    if not wait_and_check_exists(driver=driver, value=XPATH_FOOD):
+        LOGGER.warning(f"No products found on {driver.current_url=}")
+        return pd.DataFrame(columns=COLUMNS_PRODUCTS)
+
+    records = extract_all(
+        driver=driver,
+        value=XPATH_FOOD,
+        xpaths_text=dict(description=XPATH_FOOD_DESCRIPTION, price=XPATH_PRICE),
+        prefix_sponsored=TEXT_SPONSORED,
+    )
+    # The image link of each tile has no text, so there is one per product
+    records = [record for record in records if record["text"] == ""]
+    if not include_sponsored:
+        records = [record for record in records if not record["sponsored"]]
+
+    quantities = [
+        get_quantity_from_description(record["description"]) for record in records
+    ]
+    return pd.DataFrame(
+        dict(
+            description=[record["description"] for record in records],
+            link=[record["href"] for record in records],
+            image=[to_image_url(record["srcset"]) for record in records],
+            amount=[quantity.amount for quantity in quantities],
+            unit=[quantity.unit for quantity in quantities],
+            price=[to_price(record["price"]) for record in records],
+            sponsored=[record["sponsored"] for record in records],
+        ),
+        columns=COLUMNS_PRODUCTS,
+    )
+
+
+URL_BASE = "https://www.tesco.com"
+XPATH_SNAPSHOT_FOOD = etree.XPath(XPATH_FOOD)
+XPATH_SNAPSHOT_DESCRIPTION = etree.XPath(XPATH_FOOD_DESCRIPTION)
+XPATH_SNAPSHOT_PRICE = etree.XPath(XPATH_PRICE)
+XPATH_SNAPSHOT_IMAGE = etree.XPath(".//img/@srcset")
+XPATH_SNAPSHOT_OUT_OF_STOCK = etree.XPath(f".{XPATH_OUT_OF_STOCK}")
+XPATH_SNAPSHOT_IN_BASKET = etree.XPath(f".{XPATH_IN_BASKET}")
+XPATH_SNAPSHOT_PRODUCT_DESCRIPTION = etree.XPath("//h1")
+XPATH_SNAPSHOT_PRODUCT_IMAGE = etree.XPath(
+    "//img[contains(@srcset, 'digitalcontent.api.tesco.com')]/@srcset"
+)
+COLUMNS_SEARCH_PAGE = COLUMNS_PRODUCTS + ["out_of_stock", "in_basket"]
+
+
+def get_text_from_snapshot(
+    elements: list[lxml.html.HtmlElement],
+) -> Optional[str]:
+    if not elements:
+        return None
+    return elements[0].text_content().strip()
+
+
+def is_sponsored_from_snapshot(
+    element: lxml.html.HtmlElement,
+) -> bool:
+    return element.text_content().strip().startswith(TEXT_SPONSORED)
+
+
+def get_food_elements_from_snapshot(
+    tree: lxml.html.HtmlElement,
+    include_sponsored: bool = False,
+) -> list[lxml.html.HtmlElement]:
+    # Don't want the elements where the text is empty
+    elements = [
+        element
+        for element in XPATH_SNAPSHOT_FOOD(tree)
+        if element.text_content().strip() == ""
+    ]
+    if not include_sponsored:
+        elements = [
+            element
+            for element in elements
+            if not is_sponsored_from_snapshot(element.getparent())
+        ]
+    return elements
+
+
+def get_price_from_snapshot(
+    element: lxml.html.HtmlElement,
+) -> float:
+    return to_price(get_text_from_snapshot(XPATH_SNAPSHOT_PRICE(element)))
+
+
+def get_image_url_from_snapshot(
+    element: Optional[lxml.html.HtmlElement],
+) -> str:
+    if element is None:
+        return "NA"
+    srcsets = XPATH_SNAPSHOT_IMAGE(element)
+    return to_image_url(srcsets[0] if srcsets else None)
+
+
+def parse_search_page(
+    html: str,
+) -> pd.DataFrame:
+    """
+    Gets every product tile on a search page from a single page_source.
+    """
+    tree = lxml.html.fromstring(html)
+    records = []
+    for element in get_food_elements_from_snapshot(tree, include_sponsored=True):
+        parent = element.getparent()
+        records.append(
+            dict(
+                description=get_text_from_snapshot(XPATH_SNAPSHOT_DESCRIPTION(parent)),
+                link=urllib.parse.urljoin(URL_BASE, element.get("href")),
+                image=get_image_url_from_snapshot(parent),
+                price=get_price_from_snapshot(parent),
+                sponsored=is_sponsored_from_snapshot(parent),
+                out_of_stock=bool(XPATH_SNAPSHOT_OUT_OF_STOCK(parent)),
+                in_basket=bool(XPATH_SNAPSHOT_IN_BASKET(parent)),
+            )
+        )
+    df = pd.DataFrame(records, columns=COLUMNS_SEARCH_PAGE)
+    return df.assign(**get_quantities(df["description"].astype(object)))
+
+
+def parse_product_page(
+    html: str,
+) -> dict:
+    """
+    Gets the product on a product page from a single page_source.
+    """
+    tree = lxml.html.fromstring(html)
+    description = get_text_from_snapshot(XPATH_SNAPSHOT_PRODUCT_DESCRIPTION(tree))
+    quantity = get_quantity_from_description(description)
+    srcsets = XPATH_SNAPSHOT_PRODUCT_IMAGE(tree)
+    return dict(
+        description=description,
+        image=to_image_url(srcsets[0] if srcsets else None),
+        amount=quantity.amount,
+        unit=quantity.unit,
+        price=get_price_from_snapshot(tree),
+        out_of_stock=bool(XPATH_SNAPSHOT_OUT_OF_STOCK(tree)),
+        in_basket=bool(XPATH_SNAPSHOT_IN_BASKET(tree)),
+    )
+
+
+# The most products the search page shows at once
+COUNT_MAX = 48
+
+
+def stop_after_matches(
+    matches: int,
+) -> Callable[[list[dict]], bool]:
+    """
+    Makes a stop_when for iter_search_results that is met once there are matches
+    non-sponsored products with a quantity.
+    """
+
+    def stop_when(records: list[dict]) -> bool:
+        found = [
+            record
+            for record in records
+            if not record["sponsored"] and not pd.isna(record["amount"])
+        ]
+        return len(found) >= matches
+
+    return stop_when
+
+
+def iter_search_results(
+    driver: WebDriver,
+    query: str,
+    max_pages: Optional[int] = None,
+    count: Optional[int] = None,
+    stop_when: Optional[Callable[[list[dict]], bool]] = None,
+    include_sponsored: bool = False,
+) -> Iterator[dict]:
+    """
+    Yields the products found for query page by page, as dicts with the columns
+    of parse_search_page. The next page is only loaded once every product of the
+    current one was consumed, and none is once stop_when is met by the products
+    yielded so far.
+    """
+    if count is None:
+        count = COUNT_MAX
+
+    records = []
+    links = set()
+    for page in itertools.count(start=1):
+        if max_pages is not None and page > max_pages:
+            return
+
+        url = get_food_url(query=query, page=page, count=count)
+        LOGGER.debug(f"Loading {page=} of {query=}, {url=}")
+        navigate(driver=driver, url=url)
+        if not wait_and_check_exists(driver=driver, value=XPATH_FOOD):
+            LOGGER.debug(f"No products on {page=} of {query=}")
+            return
+
+        df = parse_search_page(driver.page_source)
+        for record in df.to_dict("records"):
+            # Sponsored products are shown again on every page
+            if record["link"] in links or (
+                record["sponsored"] and not include_sponsored
+            ):
+                continue
+            links.add(record["link"])
+            records.append(record)
+            yield record
+            if stop_when is not None and stop_when(records):
+                LOGGER.debug(f"Stopping after {len(records)} products of {query=}")
+                return
+
+        if len(df) < count:
+            return
+
+
+PATH_CATALOG_DEFAULT = Path(__file__).parents[1] / "catalog.sqlite"
+# The columns of each field of a product that expires on its own
+FIELDS_CATALOG = {
+    "description": ["description"],
+    "quantity": ["amount", "unit"],
+    "price": ["price"],
+    "image": ["image"],
+    "stock": ["out_of_stock"],
+}
+SQL_CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    link TEXT PRIMARY KEY,
+    id TEXT,
+    description TEXT,
+    description_at TEXT,
+    amount REAL,
+    unit TEXT,
+    quantity_at TEXT,
+    price REAL,
+    price_at TEXT,
+    image TEXT,
+    image_at TEXT,
+    out_of_stock INTEGER,
+    stock_at TEXT,
+    seen_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS products_id ON products (id);
+CREATE TABLE IF NOT EXISTS foods (
+    food TEXT NOT NULL,
+    link TEXT NOT NULL,
+    name TEXT,
+    search TEXT,
+    seen_at TEXT NOT NULL,
+    PRIMARY KEY (food, link)
+);
+CREATE INDEX IF NOT EXISTS foods_link ON foods (link);
+CREATE TABLE IF NOT EXISTS searches (
+    food TEXT PRIMARY KEY,
+    search TEXT NOT NULL,
+    scraped_at TEXT NOT NULL
+);
+"""
+FORMAT_TIMESTAMP = "%Y-%m-%dT%H:%M:%S.%f"
+COLUMNS_PRODUCT = ["description", "image", "amount", "unit", "price", "out_of_stock"]
+# The quantity and image can legitimately be missing from a product page
+COLUMNS_PRODUCT_REQUIRED = ["description", "price", "out_of_stock"]
+TYPE_MAX_AGE = Union[pd.Timedelta, dict[str, pd.Timedelta]]
+
+
+def get_product_id(
+    url: str,
+) -> Optional[str]:
+    match = re.search(pattern=r"/products/([0-9]+)", string=url)
+    return None if match is None else match.group(1)
+
+
+def to_timestamp_text(
+    value: pd.Timestamp,
+) -> str:
+    return value.strftime(FORMAT_TIMESTAMP)
+
+
+def to_records(
+    df: pd.DataFrame,
+) -> list[dict]:
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+class Catalog:
+    """
+    Product store backed by SQLite, keyed by product link.
+
+    Every field in FIELDS_CATALOG keeps when it was last scraped, so callers can
+    ask only for values younger than a max age.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+    ) -> None:
+        if path is None:
+            path = PATH_CATALOG_DEFAULT
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SQL_CATALOG_SCHEMA)
+
+    def upsert(
+        self,
+        products: pd.DataFrame,
+        now: Optional[pd.Timestamp] = None,
+    ) -> int:
+        """
+        Inserts or updates products by link. Only the fields with columns in
+        products are touched, and a missing value keeps the stored one.
+        """
+        if now is None:
+            now = pd.Timestamp.now()
+        now_text = to_timestamp_text(now)
+
+        fields = {
+            field: columns
+            for field, columns in FIELDS_CATALOG.items()
+            if all(column in products.columns for column in columns)
+        }
+        columns = [column for columns in fields.values() for column in columns]
+        columns_at = [f"{field}_at" for field in fields]
+        assignments = ["seen_at = excluded.seen_at"]
+        for field, columns_field in fields.items():
+            fresh = f"excluded.{columns_field[0]} IS NOT NULL"
+            assignments.append(
+                f"{field}_at = CASE WHEN {fresh} THEN excluded.{field}_at "
+                f"ELSE {field}_at END"
+            )
+            assignments.extend(
+                f"{column} = CASE WHEN {fresh} THEN excluded.{column} ELSE {column} END"
+                for column in columns_field
+            )
+        names = ["link", "id", "seen_at"] + columns + columns_at
+        sql = (
+            f"INSERT INTO products ({', '.join(names)}) "
+            f"VALUES ({', '.join(f':{name}' for name in names)}) "
+            f"ON CONFLICT (link) DO UPDATE SET {', '.join(assignments)}"
+        )
+
+        records = to_records(products)
+        for record in records:
+            record["id"] = get_product_id(record["link"])
+            record["seen_at"] = now_text
+            for field, columns_field in fields.items():
+                fresh = record[columns_field[0]] is not None
+                record[f"{field}_at"] = now_text if fresh else None
+            if record.get("out_of_stock") is not None:
+                record["out_of_stock"] = int(record["out_of_stock"])
+
+        with self.connection:
+            self.connection.executemany(sql, records)
+            if "food" in products.columns:
+                self.connection.executemany(
+                    "INSERT INTO foods (food, link, name, search, seen_at) "
+                    "VALUES (:food, :link, :name, :search, :seen_at) "
+                    "ON CONFLICT (food, link) DO UPDATE SET "
+                    "name = excluded.name, search = excluded.search, "
+                    "seen_at = excluded.seen_at",
+                    [
+                        dict(
+                            food=record["food"],
+                            link=record["link"],
+                            name=record.get("name"),
+                            search=record.get("search"),
+                            seen_at=now_text,
+                        )
+                        for record in records
+                    ],
+                )
+
+        LOGGER.debug(f"Upserted {len(records)} products into {self.path=}")
+        return len(records)
+
+    def lookup(
+        self,
+        links: Optional[list[str]] = None,
+        food: Optional[str] = None,
+        max_age: Optional[TYPE_MAX_AGE] = None,
+        now: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        """
+        Gets the products with the given links or for the given food. A field
+        older than its max_age, given for all fields or per field, is missing.
+        """
+        if now is None:
+            now = pd.Timestamp.now()
+
+        if max_age is None:
+            max_age = {}
+        elif not isinstance(max_age, dict):
+            max_age = {field: max_age for field in FIELDS_CATALOG}
+
+        parameters = {}
+        selects = ["products.link", "products.id"]
+        for field, columns in FIELDS_CATALOG.items():
+            if field in max_age:
+                parameters[f"cutoff_{field}"] = to_timestamp_text(now - max_age[field])
+                fresh = f"products.{field}_at >= :cutoff_{field}"
+                selects.extend(
+                    f"CASE WHEN {fresh} THEN products.{column} END AS {column}"
+                    for column in columns
+                )
+                selects.append(
+                    f"CASE WHEN {fresh} THEN products.{field}_at END AS {field}_at"
+                )
+            else:
+                selects.extend(f"products.{column}" for column in columns)
+                selects.append(f"products.{field}_at")
+        selects.append("products.seen_at")
+
+        sql = f"SELECT {', '.join(selects)} FROM products"
+        conditions = []
+        if food is not None:
+            sql = (
+                f"SELECT foods.food, foods.name, foods.search, {', '.join(selects)} "
+                "FROM foods JOIN products ON foods.link = products.link"
+            )
+            conditions.append("foods.food = :food")
+            parameters["food"] = food
+        if links is not None:
+            names = [f"link_{index}" for index in range(len(links))]
+            conditions.append(
+                f"products.link IN ({', '.join(f':{name}' for name in names)})"
+            )
+            parameters.update(zip(names, links))
+        if conditions:
+            sql = f"{sql} WHERE {' AND '.join(conditions)}"
+
+        df = pd.read_sql_query(sql, self.connection, params=parameters)
+        columns_at = [f"{field}_at" for field in FIELDS_CATALOG] + ["seen_at"]
+        return df.assign(
+            amount=lambda x: x["amount"].astype(float),
+            price=lambda x: x["price"].astype(float),
+            out_of_stock=lambda x: x["out_of_stock"].astype("boolean"),
+            **{column: pd.to_datetime(df[column]) for column in columns_at},
+        )
+
+    def record_search(
+        self,
+        food: str,
+        search: str,
+        now: Optional[pd.Timestamp] = None,
+    ) -> NoReturn:
+        """
+        Records that food was just searched with search, forgetting the products
+        an earlier search found for it.
+        """
+        if now is None:
+            now = pd.Timestamp.now()
+        with self.connection:
+            self.connection.execute("DELETE FROM foods WHERE food = ?", (food,))
+            self.connection.execute(
+                "INSERT INTO searches (food, search, scraped_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (food) DO UPDATE SET "
+                "search = excluded.search, scraped_at = excluded.scraped_at",
+                (food, search, to_timestamp_text(now)),
+            )
+
+    def get_searches(self) -> pd.DataFrame:
+        """
+        Gets the food, search and scraped_at of the last search of every food.
+        """
+        df = pd.read_sql_query(
+            "SELECT food, search, scraped_at FROM searches", self.connection
+        )
+        return df.assign(scraped_at=lambda x: pd.to_datetime(x["scraped_at"]))
+
+    def get_foods(
+        self,
+        foods: list[str],
+    ) -> pd.DataFrame:
+        """
+        Gets the products the last search of each of foods found, with the time
+        of that search as datetime.
+        """
+        names = [f"food_{index}" for index in range(len(foods))]
+        df = pd.read_sql_query(
+            "SELECT foods.food, foods.name, searches.search, products.description, "
+            "products.link, products.image, products.amount, products.unit, "
+            "products.price, searches.scraped_at AS datetime "
+            "FROM searches "
+            "JOIN foods ON foods.food = searches.food "
+            "JOIN products ON products.link = foods.link "
+            f"WHERE searches.food IN ({', '.join(f':{name}' for name in names)})",
+            self.connection,
+            params=dict(zip(names, foods)),
+        )
+        return df.assign(
+            amount=lambda x: x["amount"].astype(float),
+            price=lambda x: x["price"].astype(float),
+            datetime=lambda x: pd.to_datetime(x["datetime"]),
+        )
+
+    def close(self) -> NoReturn:
+        self.connection.close()
+
+    def __enter__(self) -> "Catalog":
+        return self
+
+    def __exit__(self, *args) -> NoReturn:
+        self.close()
+
+
+def get_product(
+    driver: WebDriver,
+    url: str,
+    catalog: Optional[Catalog] = None,
+    max_age: Optional[TYPE_MAX_AGE] = None,
+) -> dict:
+    """
+    Gets a product from the catalog if all of its fields are younger than max_age,
+    otherwise from its page and stores it in the catalog.
+    """
+    if catalog is not None:
+        df = catalog.lookup(links=[url], max_age=max_age)
+        if not df.empty and df[COLUMNS_PRODUCT_REQUIRED].notna().all(axis=None):
+            LOGGER.debug(f"Using cached product for {url=}")
+            return df[COLUMNS_PRODUCT].iloc[0].to_dict()
+
+    navigate(driver=driver, url=url)
+    _ = wait_and_check_exists(driver=driver, value="//h1")
+    product = parse_product_page(driver.page_source)
+    if catalog is not None:
+        catalog.upsert(pd.DataFrame([dict(product, link=url)]))
+    return product
+
+
+COLUMNS_CATALOG = [
+    "food",
+    "name",
+    "search",
+    "description",
+    "link",
+    "image",
+    "amount",
+    "unit",
+    "price",
+    "datetime",
+]
+MAX_AGE_REFRESH_DEFAULT = pd.Timedelta(days=7)
+
+
+def get_search(
+    name: str,
+    search: Optional[str],
+) -> str:
+    return name if search is None or search == "" else search
+
+
+def get_stale_queries(
+    queries: pd.DataFrame,
+    searches: pd.DataFrame,
+    max_age: pd.Timedelta,
+    now: Optional[pd.Timestamp] = None,
+) -> pd.Series:
+    """
+    Flags the queries for new foods, foods whose search changed and foods last
+    searched more than max_age ago.
+    """
+    if now is None:
+        now = pd.Timestamp.now()
+
+    previous = searches.set_index("food")
+    search = queries.apply(
+        lambda row: get_search(name=row["name"], search=row.get("search")), axis=1
+    )
+    search_previous = queries["food"].map(previous["search"])
+    scraped_at = queries["food"].map(previous["scraped_at"])
+    return (
+        search_previous.isna()
+        | (search != search_previous)
+        | (scraped_at < now - max_age)
+    ).astype(bool)
+
+
+def scrape_catalog(
+    queries: pd.DataFrame,
+    workers: Optional[int] = None,
+    pool: Optional[DriverPool] = None,
+    interval: Optional[float] = None,
+    catalog: Optional[Catalog] = None,
+    refresh: bool = False,
+    max_age: Optional[pd.Timedelta] = None,
+) -> pd.DataFrame:
+    """
+    Searches for every food in queries, as given by google.get_all_food, across
+    workers drivers. Page loads are at least interval seconds apart over all of
+    them if given, otherwise they share the budget of rate.limiter. The results
+    are stored in catalog if given.
+
+    With refresh, only the foods that are new, have a changed search or were last
+    searched more than max_age ago are scraped, the rest come from catalog.
+
+    A query that fails is logged and left out, the others are still scraped.
+    """
+    if workers is None:
+        workers = 1
+
+    bucket = None
+    if interval is not None:
+        bucket = TokenBucket(rate=1 / interval if interval > 0 else math.inf, burst=1)
+
+    if max_age is None:
+        max_age = MAX_AGE_REFRESH_DEFAULT
+
+    df_cached = pd.DataFrame(columns=COLUMNS_CATALOG)
+    if refresh:
+        if catalog is None:
+            raise ValueError("refresh needs a catalog")
+        stale = get_stale_queries(
+            queries=queries, searches=catalog.get_searches(), max_age=max_age
+        )
+        df_cached = catalog.get_foods(foods=list(queries.loc[~stale, "food"]))
+        queries = queries[stale]
+        LOGGER.info(
+            f"Skipped {(~stale).sum()} of {len(stale)} queries cached in catalog, "
+            f"scraping {stale.sum()}"
+        )
+        if queries.empty:
+            return df_cached[COLUMNS_CATALOG]
+
+    pool_owned = pool is None
+    if pool_owned:
+        pool = DriverPool(size=workers)
+
+    throughput = defaultdict(lambda: [0, 0.0])
+
+    def scrape(row: pd.Series) -> tuple[str, str, pd.DataFrame]:
+        start = time.perf_counter()
+        search = get_search(name=row["name"], search=row.get("search"))
+        with pool.lease() as driver:
+            url = get_food_url(query=search)
+            LOGGER.info(f"{search=}, {url=}")
+            df = get_products(driver=driver, url=url, bucket=bucket)
+        if df.empty:
+            LOGGER.warning(f"No data found for {search=}, {url=}")
+        worker = throughput[threading.current_thread().name]
+        worker[0] += 1
+        worker[1] += time.perf_counter() - start
+        return (
+            row["food"],
+            search,
+            df.assign(
+                food=row["food"],
+                name=row["name"],
+                search=search,
+                datetime=pd.Timestamp.now(),
+            )[COLUMNS_CATALOG],
+        )
+
+    list_df = []
+    failed = []
+    try:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="scraper"
+        ) as executor:
+            futures = {
+                executor.submit(scrape, row): row for _, row in queries.iterrows()
+            }
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    food, search, df = future.result()
+                except Exception as exception:
+                    # Not recorded as searched, so the next refresh tries it again
+                    row = futures[future]
+                    search = get_search(name=row["name"], search=row.get("search"))
+                    LOGGER.error(f"Failed - {search=}, {exception=}")
+                    failed.append(row["food"])
+                    continue
+                if catalog is not None:
+                    catalog.record_search(food=food, search=search)
+                    catalog.upsert(df)
+                list_df.append(df)
+    finally:
+        if pool_owned:
+            pool.close()
+
+    for worker, (count, seconds) in sorted(throughput.items()):
+        LOGGER.info(
+            f"{worker}: {count} queries in {seconds:.1f}s, "
+            f"{count / seconds if seconds else 0:.2f} queries/s"
+        )
+    if failed:
+        LOGGER.warning(f"Could not scrape {sorted(failed)=}")
+
+    list_df = [df for df in [df_cached, *list_df] if not df.empty]
+    if not list_df:
+        return pd.DataFrame(columns=COLUMNS_CATALOG)
+    return pd.concat(list_df, ignore_index=True)[COLUMNS_CATALOG]
+
+
+# The groceries front end loads its product, basket and slot data from here
+PATTERNS_API = ["https://xapi.tesco.com/*"]
+URL_PRODUCT_TEMPLATE = "https://www.tesco.com/groceries/en-GB/products/{id}"
+COLUMNS_BASKET = ["link", "quantity", "price"]
+
+
+def get_api_payloads(
+    driver: WebDriver,
+    patterns: Optional[list[str]] = None,
+    timeout: Optional[float] = None,
+) -> list[dict]:
+    """
+    Gets the JSON payloads the page loaded since the last call, needs a driver
+    started with log_performance. Waits up to timeout seconds for those still
+    loading, as get_json_responses does.
+    """
+    if patterns is None:
+        patterns = PATTERNS_API
+    responses = get_json_responses(driver=driver, patterns=patterns, timeout=timeout)
+    return [response["payload"] for response in responses]
+
+
+def iter_nodes(
+    value: object,
+) -> Iterator[dict]:
+    if isinstance(value, dict):
+        yield value
+        for child in value.values():
+            yield from iter_nodes(child)
+    elif isinstance(value, list):
+        for child in value:
+            yield from iter_nodes(child)
+
+
+def get_price_from_node(
+    node: dict,
+) -> float:
+    price = node.get("price")
+    if isinstance(price, dict):
+        price = price.get("actual", price.get("price"))
+    try:
+        return float(price)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def get_products_from_payloads(
+    payloads: list[dict],
+) -> pd.DataFrame:
+    """
+    Gets every product, a node with an id and a title, found in the payloads.
+    """
+    records = {}
+    for payload in payloads:
+        for node in iter_nodes(payload):
+            if "id" not in node or "title" not in node or node["id"] in records:
+                continue
+            quantity = get_quantity_from_description(node["title"])
+            records[node["id"]] = dict(
+                description=node["title"],
+                link=URL_PRODUCT_TEMPLATE.format(id=node["id"]),
+                image=node.get("defaultImageUrl") or "NA",
+                amount=quantity.amount,
+                unit=quantity.unit,
+                price=get_price_from_node(node=node),
+                sponsored=bool(node.get("isSponsored", False)),
+            )
+    return pd.DataFrame(list(records.values()), columns=COLUMNS_PRODUCTS)
+
+
+def get_basket_from_payloads(
+    payloads: list[dict],
+) -> pd.DataFrame:
+    """
+    Gets the basket items, nodes with a quantity and a product, found in the
+    payloads. Later payloads win as they reflect the latest basket.
+    """
+    records = {}
+    for payload in payloads:
+        for node in iter_nodes(payload):
+            product = node.get("product")
+            if "quantity" not in node or not isinstance(product, dict):
+                continue
+            link = URL_PRODUCT_TEMPLATE.format(id=product["id"])
+            records[link] = dict(
+                link=link,
+                quantity=node["quantity"],
+                price=get_price_from_node(node=product),
+            )
+    return pd.DataFrame(list(records.values()), columns=COLUMNS_BASKET)
+
+
 def go_to_orders(
     driver: WebDriver,
 ) -> NoReturn:
-    time.sleep(1)
-    driver.get(URL_ORDERS)
+    navigate(driver=driver, url=URL_ORDERS)
 
 
 def go_to_delivery_slots(
     driver: WebDriver,
 ) -> NoReturn:
-    time.sleep(1)
-    driver.get(URL_DELIVERY_SLOTS)
+    navigate(driver=driver, url=URL_DELIVERY_SLOTS)
+
+
+TIMEZONE = "Europe/London"
+XPATH_SLOT = "//button[contains(@aria-label, '–')]"
+XPATH_SLOT_NEXT_WEEK = "//button//span[text()='Next 7 days']/.."
+XPATH_SNAPSHOT_SLOT = etree.XPath(XPATH_SLOT)
+# e.g. "Friday 14 March, 8pm–9pm, £4.50"
+PATTERN_SLOT_TIME = "[0-9]{1,2}(?::[0-9]{2})?[ap]m"
+PATTERN_SLOT_LABEL = re.compile(
+    pattern=(
+        "^(?P<weekday>[A-Za-z]+) (?P<day>[0-9]{1,2}) (?P<month>[A-Za-z]+),? "
+        f"(?P<start>{PATTERN_SLOT_TIME})\\s*[–-]\\s*(?P<end>{PATTERN_SLOT_TIME})"
+        "(?P<rest>.*)$"
+    ),
+    flags=re.IGNORECASE,
+)
+PATTERN_SLOT_PRICE = re.compile(pattern="£([0-9]+(?:[.][0-9]{2})?)")
+TEXTS_SLOT_UNAVAILABLE = ["unavailable", "sold out", "fully booked"]
+COLUMNS_SLOTS = ["start", "end", "price", "available", "week", "label"]
+
+
+def to_slot_time(
+    date: pd.Timestamp,
+    text: str,
+) -> pd.Timestamp:
+    match = re.match(
+        pattern="(?P<hour>[0-9]+)(?::(?P<minute>[0-9]+))?(?P<meridiem>[ap]m)",
+        string=text.casefold(),
+    )
+    hour = int(match["hour"]) % 12 + (12 if match["meridiem"] == "pm" else 0)
+    return date.replace(hour=hour, minute=int(match["minute"] or 0))
+
+
+def to_slot_date(
+    day: str,
+    month: str,
+    now: pd.Timestamp,
+) -> pd.Timestamp:
+    """
+    Gets the date of a label without a year, the first one not in the past.
+    """
+    date = pd.Timestamp(f"{day} {month} {now.year}").tz_localize(TIMEZONE)
+    if date < now.normalize() - pd.Timedelta(days=7):
+        date = date.replace(year=now.year + 1)
+    return date
+
+
+def parse_delivery_slots(
+    html: str,
+    now: Optional[pd.Timestamp] = None,
+) -> pd.DataFrame:
+    """
+    Gets every slot of the delivery slot grid in a page_source.
+    """
+    if now is None:
+        now = pd.Timestamp.now(tz=TIMEZONE)
+
+    tree = lxml.html.fromstring(html)
+    records = []
+    for element in XPATH_SNAPSHOT_SLOT(tree):
+        label = element.get("aria-label").strip()
+        match = PATTERN_SLOT_LABEL.match(label)
+        if match is None:
+            continue
+        date = to_slot_date(day=match["day"], month=match["month"], now=now)
+        start = to_slot_time(date=date, text=match["start"])
+        end = to_slot_time(date=date, text=match["end"])
+        if end <= start:
+            end += pd.Timedelta(days=1)
+        text = f"{match['rest']} {element.text_content()}"
+        price = PATTERN_SLOT_PRICE.search(text)
+        if price is not None:
+            price = float(price.group(1))
+        else:
+            price = 0.0 if "free" in text.casefold() else float("nan")
+        disabled = (
+            element.get("disabled") is not None
+            or element.get("aria-disabled") == "true"
+        )
+        records.append(
+            dict(
+                start=start,
+                end=end,
+                price=price,
+                available=not disabled
+                and not any(
+                    unavailable in text.casefold()
+                    for unavailable in TEXTS_SLOT_UNAVAILABLE
+                ),
+                label=label,
+            )
+        )
+    return pd.DataFrame(
+        records, columns=[column for column in COLUMNS_SLOTS if column != "week"]
+    )
+
+
+def go_to_next_slots_week(
+    driver: WebDriver,
+) -> NoReturn:
+    wait_and_execute_click(driver=driver, value=XPATH_SLOT_NEXT_WEEK)
+    _ = wait_until_ready(
+        driver=driver, value=XPATH_SLOT, strategy=STRATEGY_NETWORK_IDLE
+    )
+
+
+def get_delivery_slots(
+    driver: WebDriver,
+    weeks: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Gets every delivery slot of the next weeks, parsing each week's grid from a
+    single page_source. week is 0 for the first grid shown.
+    """
+    if weeks is None:
+        weeks = 1
+
+    go_to_delivery_slots(driver=driver)
+    list_df = []
+    for week in range(weeks):
+        if week > 0:
+            go_to_next_slots_week(driver=driver)
+        if not wait_and_check_exists(driver=driver, value=XPATH_SLOT):
+            LOGGER.warning(f"No delivery slots found for {week=}")
+            continue
+        list_df.append(parse_delivery_slots(driver.page_source).assign(week=week))
+
+    list_df = [df for df in list_df if not df.empty]
+    if not list_df:
+        return pd.DataFrame(columns=COLUMNS_SLOTS)
+    return (
+        pd.concat(list_df, ignore_index=True)
+        .drop_duplicates(subset="start", keep="first")
+        .sort_values("start")
+        .reset_index(drop=True)[COLUMNS_SLOTS]
+    )
+
+
+def book_slot(
+    driver: WebDriver,
+    start: pd.Timestamp,
+    slots: Optional[pd.DataFrame] = None,
+    now: Optional[pd.Timestamp] = None,
+) -> pd.Series:
+    """
+    Clicks the delivery slot starting at start, found in slots as returned by
+    get_delivery_slots, which is scraped if not given. Returns the slot booked.
+    """
+    if now is None:
+        now = pd.Timestamp.now(tz=TIMEZONE)
+
+    start = to_london(start)
+
+    # The week of the grid the driver is on
+    week_current = None
+    if slots is None:
+        # Calendar days, a slot early tomorrow is a day away however late it is
+        days = (start.normalize() - to_london(now).normalize()).days
+        weeks = max(days, 0) // 7 + 1
+        slots = get_delivery_slots(driver=driver, weeks=weeks)
+        week_current = weeks - 1
+
+    matches = slots[slots["start"] == start]
+    if matches.empty:
+        raise ValueError(f"No delivery slot starts at {start=}")
+    slot = matches.iloc[0]
+    if not slot["available"]:
+        raise ValueError(f"Delivery slot at {start=} is not available")
+
+    if week_current != slot["week"]:
+        go_to_delivery_slots(driver=driver)
+        for _ in range(int(slot["week"])):
+            go_to_next_slots_week(driver=driver)
+
+    LOGGER.info(f"Booking delivery slot {slot['label']=}")
+    wait_and_click(
+        driver=driver,
+        value=f"//button[@aria-label={to_xpath_literal(slot['label'])}]",
+        strategy=STRATEGY_CLICKABLE,
+    )
+    return slot
+
+
+def to_xpath_literal(
+    text: str,
+) -> str:
+    if "'" not in text:
+        return f"'{text}'"
+    if '"' not in text:
+        return f'"{text}"'
+    parts = "', \"'\", '".join(text.split("'"))
+    return f"concat('{parts}')"
+
+
+POLL_INTERVAL_SLOTS_DEFAULT = 2.0
+# A cheap fingerprint of the slot grid so unchanged grids are not parsed
+SCRIPT_HASH_SLOTS = """
+let hash = 0;
+for (const button of document.querySelectorAll("button[aria-label]")) {
+    const text = button.getAttribute("aria-label") + "|" + button.disabled + "|"
+        + button.getAttribute("aria-disabled") + "|" + button.textContent;
+    for (let index = 0; index < text.length; index++) {
+        hash = (hash * 31 + text.charCodeAt(index)) | 0;
+    }
+}
+return hash;
+"""
+
+
+def to_london(
+    value: pd.Timestamp,
+) -> pd.Timestamp:
+    value = pd.Timestamp(value)
+    return value.tz_localize(TIMEZONE) if value.tzinfo is None else value
+
+
+def find_preferred_slot(
+    slots: pd.DataFrame,
+    preferences: list[pd.Timestamp],
+) -> Optional[pd.Series]:
+    """
+    Gets the available slot starting at the earliest of preferences, if any.
+    """
+    available = slots[slots["available"]].set_index("start", drop=False)
+    for start in preferences:
+        start = to_london(start)
+        if start in available.index:
+            return available.loc[start]
+    return None
+
+
+def watch_slots(
+    driver: WebDriver,
+    preferences: list[pd.Timestamp],
+    poll_interval: Optional[float] = None,
+    deadline: Optional[pd.Timestamp] = None,
+    url: Optional[str] = None,
+) -> Optional[pd.Series]:
+    """
+    Keeps the driver on the slot grid at url, refreshing it every poll_interval
+    seconds until deadline, and books the first of preferences, slot starts in
+    order of preference, in the same cycle it is seen available.
+
+    The grid is only parsed when its hash changes. Returns the slot booked or
+    None if deadline was reached first.
+    """
+    if poll_interval is None:
+        poll_interval = POLL_INTERVAL_SLOTS_DEFAULT
+
+    if url is None:
+        url = URL_DELIVERY_SLOTS
+
+    if deadline is not None:
+        deadline = to_london(deadline)
+
+    bucket = TokenBucket(rate=1 / poll_interval, burst=1)
+    navigate(driver=driver, url=url, bucket=bucket)
+    hash_previous = None
+    polls = 0
+    while deadline is None or pd.Timestamp.now(tz=TIMEZONE) < deadline:
+        if polls > 0:
+            bucket.acquire()
+            driver.refresh()
+            if is_challenge(driver=driver):
+                bucket.backoff()
+                continue
+        polls += 1
+
+        if not wait_and_check_exists(driver=driver, value=XPATH_SLOT, log=False):
+            LOGGER.warning(f"No delivery slots found on {url=}")
+            continue
+        hash_current = driver.execute_script(SCRIPT_HASH_SLOTS)
+        if hash_current == hash_previous:
+            continue
+        detected = time.perf_counter()
+        hash_previous = hash_current
+
+        slot = find_preferred_slot(
+            slots=parse_delivery_slots(driver.page_source), preferences=preferences
+        )
+        if slot is None:
+            LOGGER.debug(f"Slot grid changed after {polls=}, no preferred slot")
+            continue
+
+        wait_and_click(
+            driver=driver,
+            value=f"//button[@aria-label={to_xpath_literal(slot['label'])}]",
+            strategy=STRATEGY_CLICKABLE,
+            log=False,
+        )
+        latency = time.perf_counter() - detected
+        LOGGER.info(
+            f"Booked delivery slot {slot['label']=} after {polls=}, "
+            f"{latency=:.3f}s from detection to click"
+        )
+        return slot
+
+    LOGGER.warning(f"No preferred slot became available before {deadline=}")
+    return None
+
+
+PATH_ORDERS_DEFAULT = Path(__file__).parents[1] / "orders.sqlite"
+SQL_ORDERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id TEXT PRIMARY KEY,
+    link TEXT NOT NULL,
+    delivery_at TEXT,
+    total REAL,
+    synced_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    order_id TEXT NOT NULL REFERENCES orders (id),
+    link TEXT NOT NULL,
+    description TEXT,
+    quantity INTEGER,
+    price REAL,
+    PRIMARY KEY (order_id, link)
+);
+"""
+XPATH_ORDER = "//a[contains(@href, '/groceries/en-GB/orders/')]"
+XPATH_SNAPSHOT_ORDER_LINK = etree.XPath(f"{XPATH_ORDER}/@href")
+XPATH_ORDER_ITEM = "//li[.//a[starts-with(@href, '/groceries/en-GB/products/')]]"
+XPATH_SNAPSHOT_ORDER_ITEM = etree.XPath(XPATH_ORDER_ITEM)
+XPATH_SNAPSHOT_ORDER_DELIVERY = etree.XPath("//time/@datetime")
+PATTERN_ORDER_ID = re.compile(pattern="/orders/([0-9]+)")
+PATTERN_ORDER_QUANTITY = re.compile(pattern="Quantity:?\\s*([0-9]+)", flags=re.I)
+PATTERN_ORDER_TOTAL = re.compile(pattern="Total:?\\s*£([0-9]+(?:[.][0-9]{2})?)")
+COLUMNS_ORDERS = ["id", "link", "delivery_at", "total", "synced_at"]
+COLUMNS_ORDER_ITEMS = ["link", "description", "quantity", "price"]
+
+
+def parse_orders_page(
+    html: str,
+) -> pd.DataFrame:
+    """
+    Gets the id and link of every order on the orders page, newest first as shown.
+    """
+    tree = lxml.html.fromstring(html)
+    records = {}
+    for href in XPATH_SNAPSHOT_ORDER_LINK(tree):
+        match = PATTERN_ORDER_ID.search(href)
+        if match is None or match.group(1) in records:
+            continue
+        records[match.group(1)] = dict(
+            id=match.group(1),
+            link=urllib.parse.urljoin(URL_BASE, href.split("?")[0]),
+        )
+    return pd.DataFrame(list(records.values()), columns=["id", "link"])
+
+
+def parse_order_page(
+    html: str,
+) -> tuple[dict, pd.DataFrame]:
+    """
+    Gets the delivery time and total of an order and its items from its page.
+    """
+    tree = lxml.html.fromstring(html)
+    deliveries = XPATH_SNAPSHOT_ORDER_DELIVERY(tree)
+    total = PATTERN_ORDER_TOTAL.search(tree.text_content())
+    order = dict(
+        delivery_at=pd.Timestamp(str(deliveries[0])) if deliveries else pd.NaT,
+        total=float(total.group(1)) if total is not None else float("nan"),
+    )
+
+    records = []
+    for element in XPATH_SNAPSHOT_ORDER_ITEM(tree):
+        quantity = PATTERN_ORDER_QUANTITY.search(element.text_content())
+        product_id = get_product_id(XPATH_SNAPSHOT_BASKET_LINK(element)[0])
+        records.append(
+            dict(
+                link=URL_PRODUCT_TEMPLATE.format(id=product_id),
+                description=get_text_from_snapshot(XPATH_SNAPSHOT_DESCRIPTION(element)),
+                quantity=int(quantity.group(1)) if quantity is not None else 1,
+                price=get_price_from_snapshot(element),
+            )
+        )
+    return order, pd.DataFrame(records, columns=COLUMNS_ORDER_ITEMS)
+
+
+class OrderStore:
+    """
+    Past orders and their items backed by SQLite, keyed by order id.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+    ) -> None:
+        if path is None:
+            path = PATH_ORDERS_DEFAULT
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SQL_ORDERS_SCHEMA)
+
+    def has_order(self, order_id: str) -> bool:
+        cursor = self.connection.execute(
+            "SELECT 1 FROM orders WHERE id = ?", (order_id,)
+        )
+        return cursor.fetchone() is not None
+
+    def upsert_order(
+        self,
+        order: dict,
+        items: pd.DataFrame,
+        now: Optional[pd.Timestamp] = None,
+    ) -> NoReturn:
+        """
+        Stores an order, a dict of id, link, delivery_at and total, replacing its
+        items with items.
+        """
+        if now is None:
+            now = pd.Timestamp.now()
+        delivery_at = order.get("delivery_at")
+        record = dict(
+            id=order["id"],
+            link=order["link"],
+            delivery_at=None if pd.isna(delivery_at) else delivery_at.isoformat(),
+            total=None if pd.isna(order.get("total")) else order["total"],
+            synced_at=to_timestamp_text(now),
+        )
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO orders (id, link, delivery_at, total, "
+                "synced_at) VALUES (:id, :link, :delivery_at, :total, :synced_at)",
+                record,
+            )
+            self.connection.execute(
+                "DELETE FROM items WHERE order_id = ?", (order["id"],)
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO items (order_id, link, description, "
+                "quantity, price) VALUES (:order_id, :link, :description, "
+                ":quantity, :price)",
+                to_records(items.assign(order_id=order["id"])),
+            )
+
+    def get_orders(self) -> pd.DataFrame:
+        """
+        Gets every order, the latest delivery first.
+        """
+        return pd.read_sql_query(
+            "SELECT * FROM orders ORDER BY delivery_at DESC, id DESC",
+            self.connection,
+        ).assign(
+            delivery_at=lambda x: pd.to_datetime(x["delivery_at"], utc=True),
+            synced_at=lambda x: pd.to_datetime(x["synced_at"]),
+        )[COLUMNS_ORDERS]
+
+    def get_items(
+        self,
+        order_id: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Gets the items of order_id, the latest order if not given, e.g. as desired
+        for reconcile_basket to add the last order again.
+        """
+        if order_id is None:
+            orders = self.get_orders()
+            if orders.empty:
+                return pd.DataFrame(columns=COLUMNS_ORDER_ITEMS)
+            order_id = orders["id"].iloc[0]
+        return pd.read_sql_query(
+            f"SELECT {', '.join(COLUMNS_ORDER_ITEMS)} FROM items "
+            "WHERE order_id = ? ORDER BY rowid",
+            self.connection,
+            params=(order_id,),
+        )
+
+    def close(self) -> NoReturn:
+        self.connection.close()
+
+    def __enter__(self) -> "OrderStore":
+        return self
+
+    def __exit__(self, *args) -> NoReturn:
+        self.close()
+
+
+def sync_orders(
+    driver: WebDriver,
+    store: OrderStore,
+) -> pd.DataFrame:
+    """
+    Stores the orders on the orders page newer than the latest one in store, with
+    their items. Returns the orders synced.
+
+    Only the first orders page is read, so it should be synced at least as often
+    as it fills up.
+    """
+    go_to_orders(driver=driver)
+    if not wait_and_check_exists(driver=driver, value=XPATH_ORDER):
+        LOGGER.warning("No orders found")
+        return pd.DataFrame(columns=COLUMNS_ORDERS)
+
+    orders = parse_orders_page(driver.page_source)
+    # Orders are shown newest first so everything after a known one is known too
+    known = orders["id"].map(store.has_order)
+    new = orders[~known.cummax()] if not orders.empty else orders
+    LOGGER.info(f"Syncing {len(new)} new of {len(orders)} orders shown")
+
+    for order in new.to_dict("records"):
+        navigate(driver=driver, url=order["link"])
+        _ = wait_and_check_exists(driver=driver, value=XPATH_ORDER_ITEM)
+        details, items = parse_order_page(driver.page_source)
+        store.upsert_order(order=dict(order, **details), items=items)
+        LOGGER.debug(f"Synced order {order['id']=} with {len(items)} items")
+
+    return store.get_orders()[lambda x: x["id"].isin(new["id"])]
 
 
 def make_changes_to_nth_order(
@@ -272,6 +1723,7 @@ def make_changes_to_nth_order(
     )
 
     # Need to make this a bit better
+    pace()
     elements[n].click()
 
 
@@ -296,49 +1748,78 @@ def empty_basket(
         _ = wait_and_get(driver=driver, value=xpath_your_basket_empty)
 
 
+OUTCOME_OUT_OF_STOCK = "out_of_stock"
+OUTCOME_IN_BASKET = "in_basket"
+OUTCOME_READY = "ready"
+OUTCOME_ADDED = "added"
+OUTCOME_FAILED = "failed"
+OUTCOME_PENDING = "pending"
+
+
 def add_food_to_basket(
     driver: WebDriver,
     url: str,
     amount: int,
     info: str,
     xpath_check_done: Optional[str] = None,
-) -> NoReturn:
+    catalog: Optional[Catalog] = None,
+    max_age_stock: Optional[pd.Timedelta] = None,
+) -> str:
+    """
+    Adds amount of the product at url to the basket. Returns OUTCOME_ADDED, or
+    OUTCOME_OUT_OF_STOCK or OUTCOME_IN_BASKET if nothing was added.
+    """
     xpath_product_input_amount = "//input[@type='number']"
     xpath_add = "//span[text()='Add']/.."
     if xpath_check_done is None:
         xpath_check_done = "//span[text()='Checkout to confirm changes']"
 
+    if catalog is not None and max_age_stock is not None:
+        df = catalog.lookup(links=[url], max_age=dict(stock=max_age_stock))
+        if not df.empty and df["out_of_stock"].fillna(False).iloc[0]:
+            LOGGER.warning(f"Out of stock in catalog, {info}")
+            return OUTCOME_OUT_OF_STOCK
+
     LOGGER.debug(f"Trying to add {amount=} for {url=}, {info}")
-    driver.get(url)
+    navigate(driver=driver, url=url)
 
-    out_of_stock = check_if_out_of_stock(driver=driver)
-    already_in_basket = check_if_in_basket(driver=driver)
-    if out_of_stock:
+    outcome = wait_for_any(
+        driver=driver,
+        outcomes={
+            OUTCOME_OUT_OF_STOCK: XPATH_OUT_OF_STOCK,
+            OUTCOME_IN_BASKET: XPATH_IN_BASKET,
+            OUTCOME_READY: xpath_add,
+        },
+    )
+    if catalog is not None:
+        catalog.upsert(
+            pd.DataFrame([dict(link=url, out_of_stock=outcome == OUTCOME_OUT_OF_STOCK)])
+        )
+    if outcome == OUTCOME_OUT_OF_STOCK:
         LOGGER.warning(f"Out of stock, {info}")
-        return
-    if already_in_basket:
+        return outcome
+    if outcome == OUTCOME_IN_BASKET:
         LOGGER.warning(f"Already in basket, {info}")
-        return
-    time.sleep(2)
+        return outcome
     wait_and_delete_and_send_keys(
         driver=driver,
         value=xpath_product_input_amount,
         keys=amount,
+        strategy=STRATEGY_CLICKABLE,
     )
-    time.sleep(1)
-    wait_and_click(driver=driver, value=xpath_add)
+    wait_and_click(driver=driver, value=xpath_add, strategy=STRATEGY_CLICKABLE)
     # This checks that the action has been done
     _ = wait_and_get(driver=driver, value=xpath_check_done)
+    return OUTCOME_ADDED
 
 
 def check_if_out_of_stock(
     driver: WebDriver,
 ) -> bool:
     try:
-        xpath_out_of_stock = "//span[contains(text(),'currently out of stock') or contains(text(),'product quantity can no longer be increased')]"
         wait_and_get(
             driver=driver,
-            value=xpath_out_of_stock,
+            value=XPATH_OUT_OF_STOCK,
             by=by.XPATH,
             timeout=3,
         )
@@ -351,10 +1832,9 @@ def check_if_in_basket(
     driver: WebDriver,
 ) -> bool:
     try:
-        xpath_out_of_stock = "//p[contains(text(),'in basket')]"
         wait_and_get(
             driver=driver,
-            value=xpath_out_of_stock,
+            value=XPATH_IN_BASKET,
             by=by.XPATH,
             timeout=3,
         )
@@ -369,35 +1849,449 @@ def add_food_to_basket_with_retry(
     amount: int,
     info: str,
     max_retries: Optional[int] = None,
-) -> NoReturn:
+) -> str:
+    """
+    Same as add_food_to_basket but retries on errors, returns OUTCOME_FAILED once
+    max_retries are used up.
+    """
     if max_retries is None:
         max_retries = 0
 
     num_retries = -1
-    done = False
-    time.sleep(1)
-    while not done:
+    while True:
         try:
             num_retries += 1
-            add_food_to_basket(
+            return add_food_to_basket(
                 driver=driver,
                 url=url,
                 amount=amount,
                 info=info,
             )
-            done = True
         except Exception as exception:
             if check_if_out_of_stock(driver=driver):
                 LOGGER.warning(f"Out of stock - {info}")
-                return
+                return OUTCOME_OUT_OF_STOCK
             if num_retries >= max_retries:
                 LOGGER.error(f"Failed - {info}, {exception=}")
-                done = True
-            time.sleep(1)
+                return OUTCOME_FAILED
+            pace()
             LOGGER.debug("Refreshing")
             driver.refresh()
 
 
+COLUMNS_CHOICE = [
+    "link",
+    "amountGramPack",
+    "packs",
+    "cost",
+    "pricePerGram",
+    "order",
+]
+BY_CHOICE_DEFAULT = ["cost", "order"]
+
+
+def to_grams(
+    amounts: pd.Series,
+    units: pd.Series,
+) -> pd.Series:
+    """
+    Converts amounts in units to grams, parsing every distinct unit only once.
+    """
+    values, _ = parse_many(amounts=amounts, units=units, unit_to="g")
+    return pd.Series(values, index=amounts.index)
+
+
+def choose_products(
+    requirements: pd.DataFrame,
+    candidates: pd.DataFrame,
+    by: Optional[list[str]] = None,
+) -> pd.DataFrame:
+    """
+    Chooses a product for every food in requirements, a frame of food and
+    amountGram, out of candidates, a frame of food, link, amount, unit, price and
+    optionally order, amountGram and out_of_stock.
+
+    Every candidate gets the packs needed to cover the amount required and their
+    cost, the first candidate by is chosen, the lowest cost then order by default.
+    Foods without a usable candidate, or whose amountGram is not a positive
+    number, have no link.
+    """
+    if by is None:
+        by = BY_CHOICE_DEFAULT
+
+    order = range(len(candidates))
+    if "order" in candidates:
+        # The food map sheet gives the order as text
+        order = pd.to_numeric(candidates["order"], errors="coerce")
+    # As are the prices, which cannot be multiplied by the packs
+    candidates = candidates.assign(
+        order=order, price=pd.to_numeric(candidates["price"], errors="coerce")
+    )
+    amount_gram = to_grams(amounts=candidates["amount"], units=candidates["unit"])
+    if "amountGram" in candidates:
+        amount_gram = candidates["amountGram"].astype(float).fillna(amount_gram)
+    usable = amount_gram.gt(0) & candidates["price"].notna()
+    if "out_of_stock" in candidates:
+        usable &= ~candidates["out_of_stock"].astype("boolean").fillna(False)
+    # The plan leaves the amount of foods it cannot convert as NaN
+    amount_required = pd.to_numeric(requirements["amountGram"], errors="coerce")
+    required = np.isfinite(amount_required) & amount_required.gt(0)
+
+    df = (
+        candidates[usable]
+        .drop(columns=["amountGram"], errors="ignore")
+        .assign(amountGramPack=amount_gram[usable])
+        .merge(
+            requirements.loc[required, ["food", "amountGram"]],
+            how="inner",
+            on="food",
+        )
+        .assign(
+            packs=lambda x: (
+                np.ceil(x["amountGram"] / x["amountGramPack"]).clip(lower=1).astype(int)
+            ),
+            cost=lambda x: x["packs"] * x["price"],
+            pricePerGram=lambda x: x["price"] / x["amountGramPack"],
+        )
+        .sort_values(["food", *by], kind="stable")
+        .groupby("food", sort=False)
+        .head(1)
+    )
+
+    missing = set(requirements["food"]) - set(df["food"])
+    if missing:
+        LOGGER.warning(f"No usable product for {sorted(missing)=}")
+    return requirements.merge(
+        df[["food", *COLUMNS_CHOICE]], how="left", on="food"
+    ).astype({"packs": "Int64"})
+
+
+PATH_JOURNAL_DEFAULT = Path(__file__).parents[1] / "journal.jsonl"
+# The outcomes of items that a resumed run does not need to try again
+OUTCOMES_DONE = [OUTCOME_ADDED, OUTCOME_OUT_OF_STOCK, OUTCOME_IN_BASKET]
+COLUMNS_JOURNAL = ["link", "amount", "outcome", "seconds", "info", "datetime"]
+
+
+class Journal:
+    """
+    Append-only JSONL log of the outcome of every item of a shopping run, so an
+    interrupted run can be resumed. The last entry of a link wins.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+    ) -> None:
+        if path is None:
+            path = PATH_JOURNAL_DEFAULT
+        self.path = Path(path)
+
+    def record(
+        self,
+        link: str,
+        amount: int,
+        outcome: str,
+        seconds: Optional[float] = None,
+        info: Optional[str] = None,
+    ) -> NoReturn:
+        entry = dict(
+            link=link,
+            amount=amount,
+            outcome=outcome,
+            seconds=seconds,
+            info=info,
+            datetime=pd.Timestamp.now().isoformat(),
+        )
+        with self.path.open("a") as file:
+            file.write(json.dumps(entry) + "\n")
+
+    def read(self) -> pd.DataFrame:
+        """
+        Gets the last entry of every link.
+        """
+        if not self.path.exists():
+            return pd.DataFrame(columns=COLUMNS_JOURNAL)
+        entries = []
+        for line in self.path.read_text().splitlines():
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A line cut short by a crash
+                LOGGER.warning(f"Skipping malformed journal line {line=}")
+        return (
+            pd.DataFrame(entries, columns=COLUMNS_JOURNAL)
+            .drop_duplicates(subset="link", keep="last")
+            .reset_index(drop=True)
+        )
+
+    def get_done(self) -> set[str]:
+        """
+        Gets the links whose last outcome needs no retry.
+        """
+        df = self.read()
+        return set(df.loc[df["outcome"].isin(OUTCOMES_DONE), "link"])
+
+    def reset(self) -> NoReturn:
+        self.path.unlink(missing_ok=True)
+
+
+def add_foods_to_basket(
+    driver: WebDriver,
+    foods: pd.DataFrame,
+    journal: Optional[Journal] = None,
+    resume: bool = False,
+    max_retries: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Adds every row of foods, a frame of link, amount and optionally info, to the
+    basket and records its outcome in journal. With resume, the items already
+    done in the journal are skipped, otherwise the journal is started afresh.
+
+    Returns the journal entries of the foods.
+    """
+    if journal is None:
+        journal = Journal()
+
+    if resume:
+        done = journal.get_done()
+    else:
+        journal.reset()
+        done = set()
+
+    skipped = 0
+    for row in foods.to_dict("records"):
+        link = row["link"]
+        amount = row["amount"]
+        info = row.get("info") or f"{link=}, {amount=}"
+        if link in done:
+            skipped += 1
+            continue
+
+        journal.record(link=link, amount=amount, outcome=OUTCOME_PENDING, info=info)
+        start = time.perf_counter()
+        try:
+            outcome = add_food_to_basket_with_retry(
+                driver=driver,
+                url=link,
+                amount=amount,
+                info=info,
+                max_retries=max_retries,
+            )
+        except Exception as exception:
+            LOGGER.error(f"Failed - {info}, {exception=}")
+            outcome = OUTCOME_FAILED
+        journal.record(
+            link=link,
+            amount=amount,
+            outcome=outcome,
+            seconds=time.perf_counter() - start,
+            info=info,
+        )
+
+    df = journal.read()
+    df = df[df["link"].isin(foods["link"])].reset_index(drop=True)
+    counts = df["outcome"].value_counts().to_dict()
+    LOGGER.info(f"Skipped {skipped} of {len(foods)} foods done before, {counts=}")
+    return df
+
+
+URL_BASKET = "https://www.tesco.com/groceries/en-GB/trolley"
+XPATH_BASKET_ITEM = (
+    "//ul[contains(@class, 'product-list')]"
+    "//li[.//a[starts-with(@href, '/groceries/en-GB/products/')]]"
+)
+XPATH_BASKET_EMPTY = "//h3[text()='Your basket is empty']"
+XPATH_SNAPSHOT_BASKET_ITEM = etree.XPath(XPATH_BASKET_ITEM)
+XPATH_SNAPSHOT_BASKET_LINK = etree.XPath(
+    ".//a[starts-with(@href, '/groceries/en-GB/products/')]/@href"
+)
+XPATH_SNAPSHOT_BASKET_QUANTITY = etree.XPath(".//input[@type='number']/@value")
+# Compares the whole id, without any query, so 1234 does not match 12345
+TEMPLATE_XPATH_BASKET_ROW = (
+    "//li[.//a[substring-before("
+    "concat(substring-after(@href, '/products/'), '?'), '?') = {id}]]"
+)
+OUTCOME_BASKET_ITEMS = "items"
+OUTCOME_BASKET_EMPTY = "empty"
+ACTION_ADD = "add"
+ACTION_REMOVE = "remove"
+ACTION_UPDATE = "update"
+ACTION_KEEP = "keep"
+COLUMNS_BASKET_DIFF = ["link", "quantity_current", "quantity_desired", "action"]
+OUTCOME_UPDATED = "updated"
+OUTCOME_REMOVED = "removed"
+
+
+def parse_basket_page(
+    html: str,
+) -> pd.DataFrame:
+    """
+    Gets the link, quantity and price of every item on the basket page.
+    """
+    tree = lxml.html.fromstring(html)
+    records = []
+    for element in XPATH_SNAPSHOT_BASKET_ITEM(tree):
+        quantities = XPATH_SNAPSHOT_BASKET_QUANTITY(element)
+        product_id = get_product_id(XPATH_SNAPSHOT_BASKET_LINK(element)[0])
+        records.append(
+            dict(
+                link=URL_PRODUCT_TEMPLATE.format(id=product_id),
+                quantity=int(quantities[0]) if quantities else 0,
+                price=get_price_from_snapshot(element),
+            )
+        )
+    return pd.DataFrame(records, columns=COLUMNS_BASKET)
+
+
+def read_basket(
+    driver: WebDriver,
+) -> pd.DataFrame:
+    """
+    Gets the current basket with a single page load.
+    """
+    navigate(driver=driver, url=URL_BASKET)
+    outcome = wait_for_any(
+        driver=driver,
+        outcomes={
+            OUTCOME_BASKET_ITEMS: XPATH_BASKET_ITEM,
+            OUTCOME_BASKET_EMPTY: XPATH_BASKET_EMPTY,
+        },
+    )
+    if outcome == OUTCOME_BASKET_EMPTY:
+        return pd.DataFrame(columns=COLUMNS_BASKET)
+    _ = wait_until_ready(
+        driver=driver, value=XPATH_BASKET_ITEM, strategy=STRATEGY_NETWORK_IDLE
+    )
+    return parse_basket_page(driver.page_source)
+
+
+def to_product_key(
+    link: str,
+) -> str:
+    product_id = get_product_id(link)
+    return link if product_id is None else product_id
+
+
+def diff_basket(
+    current: pd.DataFrame,
+    desired: pd.DataFrame,
+    remove_missing: bool = True,
+) -> pd.DataFrame:
+    """
+    Gets the action that turns each current item into the desired one, matching
+    links by product id. Items not in desired are removed if remove_missing.
+    """
+    current = current.assign(key=lambda x: x["link"].map(to_product_key))
+    desired = (
+        desired.assign(key=lambda x: x["link"].map(to_product_key))
+        .groupby("key", sort=False)
+        .aggregate(link=("link", "first"), quantity=("quantity", "sum"))
+        .reset_index()
+    )
+    df = current[["key", "link", "quantity"]].merge(
+        desired[["key", "link", "quantity"]],
+        how="outer",
+        on="key",
+        suffixes=("_current", "_desired"),
+        sort=False,
+    )
+    # An empty basket gives an object column
+    quantity_current = pd.to_numeric(df["quantity_current"]).fillna(0).astype(int)
+    quantity_desired = df["quantity_desired"]
+    if not remove_missing:
+        quantity_desired = quantity_desired.fillna(quantity_current)
+    quantity_desired = pd.to_numeric(quantity_desired).fillna(0).astype(int)
+
+    action = pd.Series(ACTION_UPDATE, index=df.index)
+    action[quantity_current == quantity_desired] = ACTION_KEEP
+    action[(quantity_current == 0) & (quantity_desired > 0)] = ACTION_ADD
+    action[(quantity_current > 0) & (quantity_desired == 0)] = ACTION_REMOVE
+    return pd.DataFrame(
+        dict(
+            link=df["link_desired"].fillna(df["link_current"]),
+            quantity_current=quantity_current,
+            quantity_desired=quantity_desired,
+            action=action,
+        ),
+        columns=COLUMNS_BASKET_DIFF,
+    )[lambda x: (x["quantity_current"] > 0) | (x["quantity_desired"] > 0)].reset_index(
+        drop=True
+    )
+
+
+def set_basket_quantity(
+    driver: WebDriver,
+    url: str,
+    quantity: int,
+) -> NoReturn:
+    """
+    Changes the quantity of an item on the basket page, 0 removes it.
+    """
+    xpath_row = TEMPLATE_XPATH_BASKET_ROW.format(
+        id=to_xpath_literal(to_product_key(url))
+    )
+    if quantity == 0:
+        wait_and_click(
+            driver=driver, value=f"{xpath_row}//button[.//span[text()='Remove']]"
+        )
+    else:
+        wait_and_select_all_and_send_keys(
+            driver=driver,
+            value=f"{xpath_row}//input[@type='number']",
+            keys=str(quantity),
+        )
+        wait_and_click(
+            driver=driver, value=f"{xpath_row}//button[.//span[text()='Update']]"
+        )
+    _ = wait_until_ready(driver=driver, value="//body", strategy=STRATEGY_NETWORK_IDLE)
+
+
+def reconcile_basket(
+    driver: WebDriver,
+    desired: pd.DataFrame,
+    remove_missing: bool = True,
+) -> pd.DataFrame:
+    """
+    Makes the basket match desired, a frame of link and quantity, by applying
+    only the adds, removes and quantity changes.
+
+    Returns the diff with the outcome of every action, kept items are in_basket.
+    """
+    current = read_basket(driver=driver)
+    df = diff_basket(current=current, desired=desired, remove_missing=remove_missing)
+    counts = df["action"].value_counts().to_dict()
+    LOGGER.info(f"Reconciling basket, {counts=}")
+    outcomes = pd.Series(OUTCOME_IN_BASKET, index=df.index)
+
+    for row in df[df["action"].isin([ACTION_UPDATE, ACTION_REMOVE])].itertuples():
+        LOGGER.debug(f"{row.action} {row.link=} to {row.quantity_desired=}")
+        try:
+            set_basket_quantity(
+                driver=driver, url=row.link, quantity=row.quantity_desired
+            )
+        except TimeoutException as exception:
+            LOGGER.warning(f"Failed to {row.action} {row.link=}, {exception=}")
+            outcomes[row.Index] = OUTCOME_FAILED
+            continue
+        outcomes[row.Index] = (
+            OUTCOME_REMOVED if row.action == ACTION_REMOVE else OUTCOME_UPDATED
+        )
+
+    for row in df[df["action"] == ACTION_ADD].itertuples():
+        outcomes[row.Index] = add_food_to_basket_with_retry(
+            driver=driver,
+            url=row.link,
+            amount=row.quantity_desired,
+            info=f"{row.link=}, {row.quantity_desired=}",
+        )
+
+    df = df.assign(outcome=outcomes)
+    failed = df[df["outcome"] == OUTCOME_FAILED]
+    if not failed.empty:
+        LOGGER.warning(f"Failed to reconcile {failed['link'].tolist()=}")
+    return df
+
+
 def checkout(
     driver: WebDriver,
     to_confirm_changes: bool = False,
@@ -1,28 +1,123 @@
 import functools
-from typing import Optional
+import numbers
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Union
 
-import pint
+import numpy as np
+import pandas as pd
+
+from autoshop.util.logging import logger as get_logger
+
+if TYPE_CHECKING:
+    # Building a registry takes about a second, so pint is only imported for the
+    # units missing from UNITS_BUILTIN
+    import pint
 
 __all__ = [
+    "parse_many",
     "parse_to",
     "parse_to_grams",
     "parse_to_milliliters",
 ]
 
+LOGGER = get_logger(__name__)
+
+# Where pint keeps its parsed definitions, so later registries start fast
+CACHE_FOLDER_DEFAULT = Path(__file__).parents[1] / ".cache" / "pint"
+# The units tesco.PATTERN_UNIT matches, as their dimension and size in its base unit
+UNITS_BUILTIN = {
+    "g": ("mass", 1.0),
+    "gram": ("mass", 1.0),
+    "grams": ("mass", 1.0),
+    "kg": ("mass", 1_000.0),
+    "kilogram": ("mass", 1_000.0),
+    "kilograms": ("mass", 1_000.0),
+    "ml": ("volume", 1.0),
+    "milliliter": ("volume", 1.0),
+    "milliliters": ("volume", 1.0),
+    "millilitre": ("volume", 1.0),
+    "millilitres": ("volume", 1.0),
+    "l": ("volume", 1_000.0),
+    "liter": ("volume", 1_000.0),
+    "liters": ("volume", 1_000.0),
+    "litre": ("volume", 1_000.0),
+    "litres": ("volume", 1_000.0),
+    "ltr": ("volume", 1_000.0),
+}
+# Not units at all, converting from or to them is NaN
+NON_UNITS = ["", "pack"]
+# Distinct unit strings whose factors are kept, far more than the food data has
+MAX_SIZE_CACHE_FACTORS = 1024
+
 
 @functools.cache
-def registry() -> pint.UnitRegistry:
-    unit_registry = pint.UnitRegistry()
+def registry(
+    cache_folder: Optional[Union[Path, bool]] = None,
+) -> "pint.UnitRegistry":
+    """
+    Gets a pint registry that keeps its parsed definitions in cache_folder,
+    CACHE_FOLDER_DEFAULT by default, or nowhere if cache_folder is False.
+    """
+    if cache_folder is None:
+        cache_folder = CACHE_FOLDER_DEFAULT
+
+    if cache_folder is False:
+        # pint takes no folder to mean no cache
+        cache_folder = None
+
+    import pint
+
+    LOGGER.debug(f"Building pint registry with {cache_folder=}")
+    unit_registry = pint.UnitRegistry(cache_folder=cache_folder)
     unit_registry.define("ltr = liter")
     return unit_registry
 
 
+def parse_builtin(
+    amount: float,
+    unit_from: str,
+    unit_to: str,
+) -> Optional[float]:
+    """
+    Converts with UNITS_BUILTIN alone, None if pint is needed.
+    """
+    if unit_from in NON_UNITS or unit_to in NON_UNITS:
+        return float("nan")
+    if unit_from not in UNITS_BUILTIN or unit_to not in UNITS_BUILTIN:
+        return None
+    dimension_from, size_from = UNITS_BUILTIN[unit_from]
+    dimension_to, size_to = UNITS_BUILTIN[unit_to]
+    if dimension_from != dimension_to:
+        return float("nan")
+    return amount * size_from / size_to
+
+
 def parse_to(
     amount: float,
     unit_from: str,
     unit_to: str,
-    unit_registry: Optional[pint.UnitRegistry] = None,
+    unit_registry: Optional["pint.UnitRegistry"] = None,
 ) -> float:
+    """
+    Converts amount from unit_from to unit_to, NaN if it cannot be converted.
+
+    The units of UNITS_BUILTIN are converted without pint unless a unit_registry
+    is given, that may define them differently. Anything but a number in string
+    units is left to pint, which fails to NaN.
+    """
+    builtin = (
+        isinstance(amount, numbers.Real)
+        and isinstance(unit_from, str)
+        and isinstance(unit_to, str)
+    )
+    if unit_registry is None and builtin:
+        value = parse_builtin(
+            amount=amount,
+            unit_from=unit_from.strip().casefold(),
+            unit_to=unit_to.strip().casefold(),
+        )
+        if value is not None:
+            return value
     if unit_registry is None:
         unit_registry = registry()
     try:
@@ -38,7 +133,7 @@ def parse_to(
 def parse_to_grams(
     amount: float,
     unit: str,
-    unit_registry: Optional[pint.UnitRegistry] = None,
+    unit_registry: Optional["pint.UnitRegistry"] = None,
 ) -> float:
     return parse_to(
         amount=amount,
@@ -51,7 +146,7 @@ def parse_to_grams(
 def parse_to_milliliters(
     amount: float,
     unit: str,
-    unit_registry: Optional[pint.UnitRegistry] = None,
+    unit_registry: Optional["pint.UnitRegistry"] = None,
 ) -> float:
     return parse_to(
         amount=amount,
@@ -59,3 +154,51 @@ def parse_to_milliliters(
         unit_to="ml",
         unit_registry=unit_registry,
     )
+
+
+@functools.lru_cache(maxsize=MAX_SIZE_CACHE_FACTORS)
+def get_factor(
+    unit_from: str,
+    unit_to: str,
+) -> float:
+    """
+    Gets what an amount in unit_from is multiplied by to be in unit_to, NaN if it
+    cannot be converted.
+    """
+    return parse_to(amount=1.0, unit_from=unit_from, unit_to=unit_to)
+
+
+def parse_many(
+    amounts: Union[np.ndarray, pd.Series],
+    units: Union[np.ndarray, pd.Series],
+    unit_to: str,
+    unit_registry: Optional["pint.UnitRegistry"] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Converts amounts in units to unit_to, resolving every distinct unit to a factor
+    only once. Missing units are treated as no unit.
+
+    Returns the values and a mask of the rows whose unit could not be converted.
+    """
+    codes, uniques = pd.factorize(pd.Series(units, dtype=object).fillna("").astype(str))
+    if unit_registry is None:
+        factors = [get_factor(unit_from=unit, unit_to=unit_to) for unit in uniques]
+    else:
+        # Other registries may define units differently, so are not cached
+        factors = [
+            parse_to(
+                amount=1.0,
+                unit_from=unit,
+                unit_to=unit_to,
+                unit_registry=unit_registry,
+            )
+            for unit in uniques
+        ]
+    factors = np.asarray(factors, dtype=float)
+    failed = [unit for unit, factor in zip(uniques, factors) if np.isnan(factor)]
+    if failed:
+        LOGGER.debug(f"Cannot convert {failed=} to {unit_to=}")
+
+    factor_rows = factors[codes]
+    values = np.asarray(amounts, dtype=float) * factor_rows
+    return values, np.isnan(factor_rows)
@@ -0,0 +1,119 @@
+"""
+Page load time of a local fixture site with and without resource blocking.
+
+The fixture is a product grid page whose images and fonts are served with a small
+delay each, like a CDN under load. Run with:
+
+    uv run python benchmarks/bench_chrome_blocking.py --repeats 5
+"""
+
+import argparse
+import functools
+import http.server
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from autoshop import all as autoshop
+
+# Smallest valid PNG, a single transparent pixel
+PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000100e221bc330000000049454e44ae426082"
+)
+TEMPLATE_TILE = """
+<li>
+  <a href="/groceries/en-GB/products/{index}"><img srcset="/images/{index}.png 1x"></a>
+  <a href="/groceries/en-GB/products/{index}"><span>Product {index} 500G</span></a>
+  <p>£1.{index:02d}</p>
+</li>
+"""
+TEMPLATE_PAGE = """<html>
+<head>
+<style>
+@font-face {{ font-family: a; src: url(/fonts/a.woff2); }}
+@font-face {{ font-family: b; src: url(/fonts/b.woff2); }}
+body {{ font-family: a, b; }}
+</style>
+</head>
+<body><ul class="product-list grid">{tiles}</ul></body>
+</html>
+"""
+
+
+def write_fixture(path: Path, tiles: int) -> None:
+    (path / "images").mkdir()
+    (path / "fonts").mkdir()
+    for index in range(tiles):
+        (path / "images" / f"{index}.png").write_bytes(PNG)
+    for name in ["a", "b"]:
+        (path / "fonts" / f"{name}.woff2").write_bytes(bytes(50_000))
+    (path / "index.html").write_text(
+        TEMPLATE_PAGE.format(
+            tiles="".join(TEMPLATE_TILE.format(index=index) for index in range(tiles))
+        )
+    )
+
+
+class SlowAssetHandler(http.server.SimpleHTTPRequestHandler):
+    delay = 0.0
+
+    def do_GET(self):
+        if not self.path.endswith(".html"):
+            time.sleep(self.delay)
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(path: Path, delay: float) -> http.server.ThreadingHTTPServer:
+    handler = functools.partial(SlowAssetHandler, directory=str(path))
+    SlowAssetHandler.delay = delay
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def time_page_loads(driver, url: str, repeats: int) -> list[float]:
+    timings = []
+    for _ in range(repeats):
+        # Make sure nothing is served from the cache
+        driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+        start = time.perf_counter()
+        driver.get(url)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tiles", type=int, default=48)
+    parser.add_argument("--delay", type=float, default=0.05)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory)
+        write_fixture(path=path, tiles=args.tiles)
+        server = serve(path=path, delay=args.delay)
+        url = f"http://127.0.0.1:{server.server_address[1]}/index.html"
+
+        for block in [None, ["images", "fonts", "trackers"]]:
+            driver = autoshop.chrome.driver(block=block)
+            try:
+                timings = time_page_loads(driver=driver, url=url, repeats=args.repeats)
+            finally:
+                driver.quit()
+            print(
+                f"{block=}: median {statistics.median(timings):.3f}s, "
+                f"min {min(timings):.3f}s over {args.repeats} loads"
+            )
+
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
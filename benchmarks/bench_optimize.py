@@ -0,0 +1,83 @@
+"""
+Time of choosing the packs of a weekly shop with optimize_packs, and what it
+buys against rounding the amount over the first pack as MainShop used to. The
+shop is random foods with a few pack sizes each. Run with:
+
+    uv run python benchmarks/bench_optimize.py --foods 500
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from autoshop import all as autoshop
+
+SIZES = np.array([50, 100, 200, 250, 400, 500, 750, 1000, 1500, 2000, 5000])
+
+
+def make_shop(foods: int, seed: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    requirements = pd.DataFrame(
+        dict(
+            food=[f"food{index}" for index in range(foods)],
+            amountGram=rng.integers(1, 60, size=foods) * 50.0,
+        )
+    )
+    packs = rng.integers(1, 6, size=foods)
+    food = np.repeat(requirements["food"].to_numpy(), packs)
+    amount_gram = rng.choice(SIZES, size=len(food)).astype(float)
+    candidates = pd.DataFrame(
+        dict(
+            food=food,
+            link=[f"link{index}" for index in range(len(food))],
+            amountGram=amount_gram,
+            # Bigger packs are cheaper per gram
+            price=np.round(amount_gram**0.8 * rng.uniform(0.01, 0.03, len(food)), 2),
+            out_of_stock=rng.random(len(food)) < 0.1,
+        )
+    )
+    return requirements, candidates
+
+
+def buy_rounding(
+    requirements: pd.DataFrame, candidates: pd.DataFrame
+) -> tuple[float, int]:
+    # How MainShop used to do it, round to the nearest pack but buy at least one
+    first = (
+        candidates[~candidates["out_of_stock"]]
+        .groupby("food")
+        .head(1)
+        .merge(requirements, on="food", suffixes=("Pack", ""))
+    )
+    packs = (first["amountGram"] / first["amountGramPack"]).round().clip(lower=1)
+    short = packs * first["amountGramPack"] < first["amountGram"]
+    return float((packs * first["price"]).sum()), int(short.sum())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--foods", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    requirements, candidates = make_shop(foods=args.foods, seed=args.seed)
+    timings = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        df = autoshop.optimize.optimize_packs(
+            requirements=requirements,
+            candidates=candidates,
+        )
+        timings.append(time.perf_counter() - start)
+
+    print(f"optimize_packs: {min(timings):.3f}s for {args.foods} foods")
+    print(f"covered {df['food'].nunique()} foods, {df['cost'].sum():.2f} spent")
+    cost, short = buy_rounding(requirements, candidates)
+    print(f"rounding: {cost:.2f} spent, {short} foods bought short")
+
+
+if __name__ == "__main__":
+    main()
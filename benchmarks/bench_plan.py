@@ -0,0 +1,110 @@
+"""
+Time of planning a shop by filtering the food map for every food, as MainShop
+used to, against build_shopping_plan. The food map is synthetic with a few
+products per food. Run with:
+
+    uv run python benchmarks/bench_plan.py --foods 10000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from autoshop import all as autoshop
+
+UNITS = ["g", "kg", "clove", "pack"]
+
+
+def make_inputs(
+    foods: int, seed: int
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    names = np.array([f"food{index}" for index in range(foods)])
+    products = rng.integers(1, 5, size=foods)
+    food = np.repeat(names, products)
+    food_map = pd.DataFrame(
+        dict(
+            food=food,
+            order=rng.integers(1, 10, size=len(food)).astype(str),
+            link=[f"link{index}" for index in range(len(food))],
+            amount=rng.integers(1, 20, size=len(food)) * 50.0,
+            unit=rng.choice(UNITS, size=len(food)),
+        )
+    )
+    conversion = pd.DataFrame(
+        dict(
+            food=np.concatenate([names, names]),
+            unit=["clove"] * foods + [""] * foods,
+            toGram=np.concatenate(
+                [rng.uniform(1, 10, foods), rng.uniform(50, 500, foods)]
+            ),
+        )
+    )
+    shop = pd.DataFrame(
+        dict(
+            food=names,
+            nameFood=names,
+            amount=rng.integers(1, 40, size=foods) * 25.0,
+            unit="g",
+        )
+    )
+    return shop, conversion, food_map
+
+
+def plan_loop(
+    shop: pd.DataFrame, conversion: pd.DataFrame, food_map: pd.DataFrame
+) -> pd.DataFrame:
+    # How MainShop used to do it, once the inputs were prepared
+    df_food_map = autoshop.plan.prepare_food_map(
+        food_map=food_map, conversion=conversion
+    )
+    df_food_map = df_food_map[df_food_map["amountMilliliter"].isna()]
+    df_shop = autoshop.plan.prepare_shop(shop=shop, conversion=conversion)
+    rows = []
+    for _, row in df_shop.iterrows():
+        df_tesco = df_food_map[lambda x: x["food"] == row["food"]].sort_values(
+            "order", ascending=True
+        )
+        if not df_tesco.empty:
+            rows.append(
+                dict(
+                    food=row["food"],
+                    link=df_tesco.iloc[0]["link"],
+                    amountGramTesco=df_tesco.iloc[0]["amountGram"],
+                )
+            )
+    return pd.DataFrame(rows)
+
+
+def best_of(function, repeats: int, **kwargs) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(**kwargs)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--foods", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    shop, conversion, food_map = make_inputs(foods=args.foods, seed=args.seed)
+    kwargs = dict(shop=shop, conversion=conversion, food_map=food_map)
+
+    seconds_loop = best_of(plan_loop, repeats=1, **kwargs)
+    seconds_plan = best_of(
+        autoshop.plan.build_shopping_plan, repeats=args.repeats, **kwargs
+    )
+    print(f"loop: {seconds_loop:.3f}s for {args.foods} foods")
+    print(f"build_shopping_plan: {seconds_plan:.3f}s for {args.foods} foods")
+    print(f"speedup: {seconds_loop / seconds_plan:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
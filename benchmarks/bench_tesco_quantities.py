@@ -0,0 +1,78 @@
+"""
+Time of parsing the quantity of product descriptions one at a time against in a
+single vectorized pass. The corpus repeats the descriptions of the tests. Run with:
+
+    uv run python benchmarks/bench_tesco_quantities.py --size 100000
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from autoshop import all as autoshop
+
+DESCRIPTIONS = [
+    "Yorkshire Provender Tomato & Red Pepper Soup & Wensleydale 560G",
+    "Tesco Reduced Sugar And Salt Baked Beans In Tomato Sauce 420G",
+    "Tesco Sieved Tomatoes Passata 500G Ce",
+    "Organix 5 Sunshine Veggies with Red Lentils Organic Baby Food 190g",
+    "Birds Eye Original 10 Beef Burgers With Onion 567G",
+    "Tesco Garlic Powder 45G ..",
+    "Highland Spring Still Bottled Water 12 X 500Ml",
+    "Tesco Apple & Raspberry No Added Sugar Sparkling Water 4X500ml",
+    "Highland Spring Still Water 6 X 1.5L",
+    "Tesco Strawberry Still Flavoured Water 1Ltr",
+    "Redmere Farms Garlic 4 Pack",
+    "Tesco Red Onions 3Pack Minimum",
+    "Tesco Cauliflower Rice 4 Pack 600G",
+    "Tesco Red Split Lentils 1Kg",
+    "Cauldron 6 Lincolnshire Sausages 276G",
+]
+
+
+def parse_apply(descriptions: pd.Series) -> pd.DataFrame:
+    # How the notebooks used to do it
+    quantities = descriptions.apply(autoshop.tesco.get_quantity_from_description)
+    return pd.DataFrame(
+        dict(
+            amount=quantities.apply(lambda x: x.amount),
+            unit=quantities.apply(lambda x: x.unit),
+        )
+    )
+
+
+def best_of(function, descriptions: pd.Series, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(descriptions)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    descriptions = pd.Series(
+        (DESCRIPTIONS * (args.size // len(DESCRIPTIONS) + 1))[: args.size]
+    )
+    scalar = parse_apply(descriptions)
+    vectorized = autoshop.tesco.get_quantities(descriptions)
+    pd.testing.assert_series_equal(scalar["amount"], vectorized["amount"])
+    assert (scalar["unit"] == vectorized["unit"].astype(object)).all()
+
+    seconds_apply = best_of(parse_apply, descriptions, repeats=args.repeats)
+    seconds_vectorized = best_of(
+        autoshop.tesco.get_quantities, descriptions, repeats=args.repeats
+    )
+    print(f"apply: {seconds_apply:.3f}s for {args.size} descriptions")
+    print(f"get_quantities: {seconds_vectorized:.3f}s for {args.size} descriptions")
+    print(f"speedup: {seconds_apply / seconds_vectorized:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Time of converting amounts to grams one row at a time through parse_to against
+parse_many. The per-row path is timed on a sample and extrapolated, converting a
+million rows with it takes minutes. Run with:
+
+    uv run python benchmarks/bench_unit.py --size 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from autoshop import all as autoshop
+
+# Units as found in the food map, including some that are not weights
+UNITS = ["g", "kg", "G", "KG", "ml", "l", "ltr", "", "clove", "pack"]
+
+
+def parse_apply(df: pd.DataFrame) -> pd.Series:
+    # How MainShop used to do it
+    return df[["amount", "unit"]].apply(
+        lambda row: autoshop.unit.parse_to_grams(
+            amount=row["amount"],
+            unit=row["unit"],
+        ),
+        axis=1,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    df = pd.DataFrame(
+        dict(
+            amount=rng.integers(1, 2000, size=args.size).astype(float),
+            unit=rng.choice(UNITS, size=args.size),
+        )
+    )
+    # Build the registry before timing either path
+    autoshop.unit.registry()
+
+    sample = df.iloc[: args.sample]
+    start = time.perf_counter()
+    scalar = parse_apply(sample)
+    seconds_apply = (time.perf_counter() - start) * args.size / len(sample)
+
+    autoshop.unit.get_factor.cache_clear()
+    start = time.perf_counter()
+    values, mask = autoshop.unit.parse_many(
+        amounts=df["amount"], units=df["unit"], unit_to="g"
+    )
+    seconds_many = time.perf_counter() - start
+    np.testing.assert_allclose(values[: len(sample)], scalar.to_numpy())
+
+    print(f"apply: {seconds_apply:.1f}s for {args.size} rows, extrapolated")
+    print(f"parse_many: {seconds_many:.3f}s for {args.size} rows")
+    print(f"speedup: {seconds_apply / seconds_many:.0f}x")
+    print(f"{mask.mean():.0%} of rows could not be converted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Latency of importing autoshop.unit and of its first conversion, each measured in
+a fresh interpreter. Units of UNITS_BUILTIN never build a pint registry. Other
+units build one, either from scratch or from the on-disk cache of its
+definitions. The old start up, also importing pint and building a registry without
+a cache, is the baseline. Run with:
+
+    uv run python benchmarks/bench_unit_startup.py --repeats 5
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+
+SCRIPT = """
+import time
+start = time.perf_counter()
+{imports}
+seconds_import = time.perf_counter() - start
+start = time.perf_counter()
+{conversion}
+print(seconds_import, time.perf_counter() - start)
+"""
+CASES = {
+    "baseline": (
+        "from autoshop import unit; import pint",
+        "(1 * pint.UnitRegistry().parse_units('kg')).to('g')",
+    ),
+    "built in unit": (
+        "from autoshop import unit",
+        "unit.parse_to_grams(1, 'kg')",
+    ),
+    "pint": (
+        "from autoshop import unit",
+        "unit.parse_to(1, 'lb', 'g', unit_registry=unit.registry({folder!r}))",
+    ),
+}
+
+
+def run(imports: str, conversion: str) -> tuple[float, float]:
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT.format(imports=imports, conversion=conversion)],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    seconds_import, seconds_first = map(float, output.split()[-2:])
+    return seconds_import, seconds_first
+
+
+def report(name: str, timings: list[tuple[float, float]]) -> None:
+    seconds_import = min(timing[0] for timing in timings)
+    seconds_first = min(timing[1] for timing in timings)
+    print(
+        f"{name}: import {seconds_import:.3f}s, first conversion {seconds_first:.3f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    for name in ["baseline", "built in unit"]:
+        report(name, [run(*CASES[name]) for _ in range(args.repeats)])
+
+    imports, conversion = CASES["pint"]
+    timings = []
+    for _ in range(args.repeats):
+        # A new folder every time, so pint parses its definitions
+        with tempfile.TemporaryDirectory() as folder:
+            timings.append(run(imports, conversion.format(folder=folder)))
+    report("pint, cold cache", timings)
+
+    with tempfile.TemporaryDirectory() as folder:
+        run(imports, conversion.format(folder=folder))
+        timings = [
+            run(imports, conversion.format(folder=folder)) for _ in range(args.repeats)
+        ]
+    report("pint, warm cache", timings)
+
+
+if __name__ == "__main__":
+    main()
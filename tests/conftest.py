@@ -0,0 +1,16 @@
+import math
+
+import pytest
+
+from autoshop import all as autoshop
+
+
+@pytest.fixture
+def no_pacing(request, mocker):
+    """Runs the unit tests without waiting for the shared limiter."""
+    if request.node.get_closest_marker("integration") is None:
+        mocker.patch(
+            "autoshop.rate.limiter",
+            return_value=autoshop.rate.TokenBucket(rate=math.inf),
+        )
+        mocker.patch("autoshop.rate.is_challenge", return_value=False)
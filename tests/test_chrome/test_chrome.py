@@ -1,3 +1,5 @@
+import json
+
 import pytest
 
 from autoshop import all as autoshop
@@ -143,7 +145,15 @@ def test_driver_password_manager_disabled():
 def test_all_exports():
     """Test that __all__ contains expected exports."""
     assert hasattr(autoshop.chrome, "__all__")
-    expected_exports = ["driver"]
+    expected_exports = [
+        "PRESETS_BLOCK",
+        "DriverPool",
+        "block_urls",
+        "driver",
+        "get_json_responses",
+        "load_cookies",
+        "save_cookies",
+    ]
 
     assert set(autoshop.chrome.__all__) == set(expected_exports)
 
@@ -255,3 +265,318 @@ def test_options_creation_failure(mocker):
 
     with pytest.raises(Exception, match="Options creation failed"):
         autoshop.chrome.driver()
+
+
+# Tests for session reuse
+def test_driver_persistent_profile(mocker, tmp_path):
+    """Test that a profile directory is reused and its cookies are kept."""
+    mocker.patch("undetected_chromedriver.ChromeOptions")
+    mock_driver = mocker.Mock()
+    mock_chrome_class = mocker.patch(
+        "undetected_chromedriver.Chrome", return_value=mock_driver
+    )
+
+    autoshop.chrome.driver(path_profile=tmp_path)
+
+    assert mock_chrome_class.call_args.kwargs["user_data_dir"] == str(tmp_path)
+    mock_driver.delete_all_cookies.assert_not_called()
+
+
+def test_driver_loads_cookies(mocker, tmp_path):
+    """Test that an exported cookie snapshot is loaded into a new driver."""
+    mocker.patch("undetected_chromedriver.ChromeOptions")
+    mock_driver = mocker.Mock()
+    mocker.patch("undetected_chromedriver.Chrome", return_value=mock_driver)
+    path = tmp_path / "cookies.json"
+    path.write_text('[{"name": "a", "value": "1", "domain": ".tesco.com"}]')
+
+    autoshop.chrome.driver(path_cookies=path)
+
+    mock_driver.delete_all_cookies.assert_called_once()
+    mock_driver.execute_cdp_cmd.assert_called_once_with(
+        "Network.setCookies",
+        {"cookies": [{"name": "a", "value": "1", "domain": ".tesco.com"}]},
+    )
+
+
+def test_save_and_load_cookies(mocker, tmp_path):
+    """Test that cookies survive a round trip and only settable fields are sent."""
+    path = tmp_path / "cookies.json"
+    cookies = [
+        dict(
+            name="session",
+            value="abc",
+            domain=".tesco.com",
+            path="/",
+            expires=-1,
+            size=10,
+            session=True,
+        ),
+        dict(
+            name="remember",
+            value="def",
+            domain=".tesco.com",
+            path="/",
+            expires=1_800_000_000,
+            size=11,
+            session=False,
+        ),
+    ]
+    mock_driver = mocker.Mock()
+    mock_driver.execute_cdp_cmd.return_value = dict(cookies=cookies)
+
+    autoshop.chrome.save_cookies(driver=mock_driver, path=path)
+    autoshop.chrome.load_cookies(driver=mock_driver, path=path)
+
+    mock_driver.execute_cdp_cmd.assert_called_with(
+        "Network.setCookies",
+        {
+            "cookies": [
+                dict(name="session", value="abc", domain=".tesco.com", path="/"),
+                dict(
+                    name="remember",
+                    value="def",
+                    domain=".tesco.com",
+                    path="/",
+                    expires=1_800_000_000,
+                ),
+            ]
+        },
+    )
+
+
+# Tests for resource blocking
+def test_get_blocked_urls():
+    """Test that presets are expanded and raw patterns are kept."""
+    urls = autoshop.chrome.get_blocked_urls(block=["fonts", "*.example.com/ads*"])
+
+    assert urls == autoshop.chrome.PRESETS_BLOCK["fonts"] + ["*.example.com/ads*"]
+
+
+def test_driver_blocks_urls(mocker):
+    """Test that driver sets the blocked URLs through CDP."""
+    mocker.patch("undetected_chromedriver.ChromeOptions")
+    mock_driver = mocker.Mock()
+    mocker.patch("undetected_chromedriver.Chrome", return_value=mock_driver)
+
+    autoshop.chrome.driver(block=["images", "trackers"])
+
+    mock_driver.execute_cdp_cmd.assert_any_call("Network.enable", {})
+    mock_driver.execute_cdp_cmd.assert_called_with(
+        "Network.setBlockedURLs",
+        {
+            "urls": autoshop.chrome.PRESETS_BLOCK["images"]
+            + autoshop.chrome.PRESETS_BLOCK["trackers"]
+        },
+    )
+
+
+def test_driver_blocks_nothing_by_default(mocker):
+    """Test that nothing is blocked unless asked for."""
+    mocker.patch("undetected_chromedriver.ChromeOptions")
+    mock_driver = mocker.Mock()
+    mocker.patch("undetected_chromedriver.Chrome", return_value=mock_driver)
+
+    autoshop.chrome.driver()
+
+    mock_driver.execute_cdp_cmd.assert_not_called()
+
+
+def test_driver_log_performance(mocker):
+    """Test that performance logging is only enabled when asked for."""
+    mock_options = mocker.Mock()
+    mocker.patch("undetected_chromedriver.ChromeOptions", return_value=mock_options)
+    mocker.patch("undetected_chromedriver.Chrome")
+
+    autoshop.chrome.driver()
+    mock_options.set_capability.assert_not_called()
+
+    autoshop.chrome.driver(log_performance=True)
+    mock_options.set_capability.assert_called_once_with(
+        "goog:loggingPrefs", {"performance": "ALL"}
+    )
+
+
+def performance_entry(method, **params):
+    return dict(message=json.dumps(dict(message=dict(method=method, params=params))))
+
+
+def test_get_json_responses_waits_for_unfinished(mocker):
+    """Test that a response still loading when the log is read is not lost."""
+    mocker.patch("time.sleep")
+    mock_driver = mocker.Mock()
+    response = dict(url="https://xapi.tesco.com/", status=200, mimeType="json")
+    mock_driver.get_log.side_effect = [
+        [
+            performance_entry(
+                "Network.responseReceived", requestId="1", response=response
+            )
+        ],
+        [],
+        [performance_entry("Network.loadingFinished", requestId="1")],
+    ]
+    mock_driver.execute_cdp_cmd.return_value = dict(body="{}", base64Encoded=False)
+
+    responses = autoshop.chrome.get_json_responses(
+        driver=mock_driver, patterns=["https://xapi.tesco.com/*"]
+    )
+
+    assert responses == [dict(url=response["url"], status=200, payload={})]
+    assert mock_driver.get_log.call_count == 3
+
+
+def test_get_json_responses_timeout(mocker):
+    """Test that a response still loading after the timeout is skipped."""
+    mock_driver = mocker.Mock()
+    response = dict(url="https://xapi.tesco.com/", status=200, mimeType="json")
+    mock_driver.get_log.return_value = [
+        performance_entry("Network.responseReceived", requestId="1", response=response)
+    ]
+
+    responses = autoshop.chrome.get_json_responses(
+        driver=mock_driver, patterns=["https://xapi.tesco.com/*"], timeout=0
+    )
+
+    assert responses == []
+    mock_driver.get_log.assert_called_once()
+    mock_driver.execute_cdp_cmd.assert_not_called()
+
+
+# Tests for the driver pool
+def mock_pooled_driver(mocker, healthy=True, heap_sizes=None):
+    """A mock driver answering the pool's health and heap size scripts."""
+    mock_driver = mocker.Mock()
+    heap_sizes = iter(heap_sizes or [1_000_000] * 10)
+
+    def execute_script(script, *args):
+        if script == autoshop.chrome.SCRIPT_HEAP_SIZE:
+            return next(heap_sizes)
+        if not healthy:
+            raise Exception("Browser has gone away")
+        return 1
+
+    mock_driver.execute_script.side_effect = execute_script
+    return mock_driver
+
+
+def test_driver_pool_warms_up_drivers(mocker):
+    """Test that the pool creates and sets up size drivers up front."""
+    mock_drivers = [mock_pooled_driver(mocker) for _ in range(3)]
+    mock_factory = mocker.Mock(side_effect=mock_drivers)
+    mock_setup = mocker.Mock()
+
+    pool = autoshop.chrome.DriverPool(size=3, factory=mock_factory, setup=mock_setup)
+
+    assert mock_factory.call_count == 3
+    assert [c.args[0] for c in mock_setup.call_args_list] == mock_drivers
+    pool.close()
+    for mock_driver in mock_drivers:
+        mock_driver.quit.assert_called_once()
+
+
+def test_driver_pool_lease_returns_driver(mocker):
+    """Test that a leased driver goes back to the pool for the next lease."""
+    mock_driver = mock_pooled_driver(mocker)
+    mock_factory = mocker.Mock(return_value=mock_driver)
+
+    with autoshop.chrome.DriverPool(size=1, factory=mock_factory) as pool:
+        with pool.lease() as leased:
+            assert leased is mock_driver
+        with pool.lease() as leased:
+            assert leased is mock_driver
+
+    mock_factory.assert_called_once()
+
+
+def test_driver_pool_replaces_unhealthy_driver(mocker):
+    """Test that an unhealthy driver is quit and replaced before being leased."""
+    mock_unhealthy = mock_pooled_driver(mocker, healthy=False)
+    mock_healthy = mock_pooled_driver(mocker)
+    mock_factory = mocker.Mock(side_effect=[mock_unhealthy, mock_healthy])
+
+    with autoshop.chrome.DriverPool(size=1, factory=mock_factory) as pool:
+        with pool.lease() as leased:
+            assert leased is mock_healthy
+
+    mock_unhealthy.quit.assert_called_once()
+
+
+def test_driver_pool_recycles_after_navigations(mocker):
+    """Test that a driver is recycled after max_navigations."""
+    mock_old = mock_pooled_driver(mocker)
+    mock_new = mock_pooled_driver(mocker)
+    mock_factory = mocker.Mock(side_effect=[mock_old, mock_new])
+
+    with autoshop.chrome.DriverPool(
+        size=1, factory=mock_factory, max_navigations=2
+    ) as pool:
+        with pool.lease() as leased:
+            leased.get("https://a")
+        with pool.lease() as leased:
+            assert leased is mock_old
+            leased.get("https://b")
+        mock_old.quit.assert_called_once()
+        with pool.lease() as leased:
+            assert leased is mock_new
+
+
+def test_driver_pool_recycles_after_memory_growth(mocker):
+    """Test that a driver is recycled once its heap grows by max_memory_growth."""
+    mock_old = mock_pooled_driver(mocker, heap_sizes=[1_000, 5_000])
+    mock_new = mock_pooled_driver(mocker)
+    mock_factory = mocker.Mock(side_effect=[mock_old, mock_new])
+
+    with autoshop.chrome.DriverPool(
+        size=1, factory=mock_factory, max_memory_growth=2_000
+    ) as pool:
+        with pool.lease():
+            pass
+        mock_old.quit.assert_called_once()
+        with pool.lease() as leased:
+            assert leased is mock_new
+
+
+def test_driver_pool_closed(mocker):
+    """Test that a closed pool cannot be leased from."""
+    mock_factory = mocker.Mock(return_value=mock_pooled_driver(mocker))
+    pool = autoshop.chrome.DriverPool(factory=mock_factory)
+    pool.close()
+
+    with pytest.raises(RuntimeError, match="closed"):
+        with pool.lease():
+            pass
+
+
+def test_driver_pool_keeps_slot_when_replacement_fails(mocker):
+    """Test that a driver that cannot be replaced stays in the pool."""
+    mock_unhealthy = mock_pooled_driver(mocker, healthy=False)
+    mock_healthy = mock_pooled_driver(mocker)
+    mock_factory = mocker.Mock(
+        side_effect=[mock_unhealthy, Exception("Chrome failed"), mock_healthy]
+    )
+
+    with autoshop.chrome.DriverPool(size=1, factory=mock_factory) as pool:
+        with pytest.raises(Exception, match="Chrome failed"):
+            with pool.lease():
+                pass
+        assert pool.idle.qsize() == 1
+        mock_unhealthy.quit.assert_not_called()
+        with pool.lease() as leased:
+            assert leased is mock_healthy
+
+
+def test_driver_pool_keeps_slot_when_recycling_fails(mocker):
+    """Test that a failed recycle keeps the old driver and the caller's error."""
+    mock_old = mock_pooled_driver(mocker)
+    mock_factory = mocker.Mock(side_effect=[mock_old, Exception("Chrome failed")])
+
+    with autoshop.chrome.DriverPool(
+        size=1, factory=mock_factory, max_navigations=1
+    ) as pool:
+        with pytest.raises(ValueError, match="caller"):
+            with pool.lease() as leased:
+                leased.get("https://a")
+                raise ValueError("caller")
+        mock_old.quit.assert_not_called()
+        with pool.lease(timeout=1) as leased:
+            assert leased is mock_old
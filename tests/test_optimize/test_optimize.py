@@ -0,0 +1,256 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoshop import all as autoshop
+
+
+def brute_force(requirement, sizes, prices, bounds):
+    best = None
+    for counts in itertools.product(*[range(bound + 1) for bound in bounds]):
+        counts = np.array(counts)
+        total = counts @ sizes
+        if total < requirement:
+            continue
+        key = (round(counts @ prices, 2), total)
+        if best is None or key < best:
+            best = key
+    return best
+
+
+def test_solve_mixes_pack_sizes():
+    """Test that packs of different sizes are mixed when that is cheapest."""
+    counts = autoshop.optimize.solve(
+        requirement=1200,
+        sizes=np.array([1000, 500, 250]),
+        prices=np.array([2.0, 1.2, 0.7]),
+    )
+
+    np.testing.assert_array_equal(counts, [1, 0, 1])
+
+
+def test_solve_objective_waste():
+    """Test that the waste objective covers the requirement most tightly."""
+    kwargs = dict(
+        requirement=750,
+        sizes=np.array([1000, 250]),
+        prices=np.array([1.0, 0.5]),
+    )
+
+    np.testing.assert_array_equal(autoshop.optimize.solve(**kwargs), [1, 0])
+    np.testing.assert_array_equal(
+        autoshop.optimize.solve(**kwargs, objective="waste"), [0, 3]
+    )
+
+
+def test_solve_ties_least_waste():
+    """Test that of equally cheap choices the least wasteful is taken."""
+    counts = autoshop.optimize.solve(
+        requirement=400,
+        sizes=np.array([500, 400]),
+        prices=np.array([1.0, 1.0]),
+    )
+
+    np.testing.assert_array_equal(counts, [0, 1])
+
+
+def test_solve_respects_bounds():
+    """Test that no more packs than the stock are bought."""
+    counts = autoshop.optimize.solve(
+        requirement=1000,
+        sizes=np.array([500, 200]),
+        prices=np.array([0.5, 1.0]),
+        bounds=np.array([1, 10]),
+    )
+
+    np.testing.assert_array_equal(counts, [1, 3])
+
+
+def test_solve_infeasible():
+    """Test that None is returned when the stock cannot cover the requirement."""
+    counts = autoshop.optimize.solve(
+        requirement=1000,
+        sizes=np.array([500, 200]),
+        prices=np.array([0.5, np.nan]),
+        bounds=np.array([1, 10]),
+    )
+
+    assert counts is None
+
+
+@pytest.mark.parametrize("requirement", [np.nan, np.inf])
+def test_solve_requirement_not_finite(requirement):
+    """Test that None is returned when the requirement is not a finite number."""
+    counts = autoshop.optimize.solve(
+        requirement=requirement,
+        sizes=np.array([500]),
+        prices=np.array([0.5]),
+    )
+
+    assert counts is None
+
+
+def test_solve_nothing_required():
+    """Test that nothing is bought when nothing is required."""
+    counts = autoshop.optimize.solve(
+        requirement=0,
+        sizes=np.array([500]),
+        prices=np.array([0.5]),
+    )
+
+    np.testing.assert_array_equal(counts, [0])
+
+
+def test_solve_unknown_objective():
+    """Test that an unknown objective raises."""
+    with pytest.raises(ValueError):
+        autoshop.optimize.solve(
+            requirement=1,
+            sizes=np.array([1]),
+            prices=np.array([1.0]),
+            objective="taste",
+        )
+
+
+def test_solve_matches_brute_force():
+    """Test that the cost and waste match trying every combination."""
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        count = rng.integers(1, 4)
+        sizes = rng.integers(1, 30, size=count) * 50
+        prices = rng.integers(50, 500, size=count) / 100
+        bounds = rng.integers(0, 5, size=count)
+        requirement = float(rng.integers(1, 2000))
+
+        counts = autoshop.optimize.solve(
+            requirement=requirement,
+            sizes=sizes,
+            prices=prices,
+            bounds=bounds,
+        )
+
+        expected = brute_force(requirement, sizes, prices, bounds)
+        if expected is None:
+            assert counts is None
+            continue
+        assert (counts <= bounds).all()
+        assert (round(counts @ prices, 2), counts @ sizes) == expected
+
+
+def test_optimize_packs():
+    """Test that packs are chosen per food, skipping what is out of stock."""
+    requirements = pd.DataFrame(
+        dict(
+            food=["lentils", "garlic", "saffron"],
+            amountGram=[1500.0, 100.0, 1.0],
+        )
+    )
+    candidates = pd.DataFrame(
+        dict(
+            food=["lentils", "lentils", "lentils", "garlic", "garlic"],
+            link=["l500", "l1000", "l2000", "g4", "g1"],
+            amountGram=[500.0, 1000.0, 2000.0, 200.0, 50.0],
+            price=[1.0, 1.5, 2.0, 1.0, 0.3],
+            out_of_stock=[False, False, True, None, False],
+        )
+    )
+
+    df = autoshop.optimize.optimize_packs(
+        requirements=requirements,
+        candidates=candidates,
+    )
+
+    expected = pd.DataFrame(
+        dict(
+            food=["lentils", "lentils", "garlic"],
+            link=["l500", "l1000", "g1"],
+            amountGramPack=[500.0, 1000.0, 50.0],
+            price=[1.0, 1.5, 0.3],
+            packs=[1, 1, 2],
+            cost=[1.0, 1.5, 0.6],
+        )
+    )
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+
+def test_optimize_packs_stock():
+    """Test that the stock column caps the packs of a product."""
+    requirements = pd.DataFrame(dict(food=["water"], amountGram=[3000.0]))
+    candidates = pd.DataFrame(
+        dict(
+            food=["water", "water"],
+            link=["big", "small"],
+            amountGram=[1500.0, 500.0],
+            price=[0.5, 0.4],
+            stock=[1, np.nan],
+        )
+    )
+
+    df = autoshop.optimize.optimize_packs(
+        requirements=requirements,
+        candidates=candidates,
+    )
+
+    assert df[["link", "packs"]].values.tolist() == [["big", 1], ["small", 3]]
+
+
+def test_optimize_packs_none_covered():
+    """Test that an empty frame is returned when no food can be covered."""
+    df = autoshop.optimize.optimize_packs(
+        requirements=pd.DataFrame(dict(food=["tofu"], amountGram=[400.0])),
+        candidates=pd.DataFrame(
+            columns=["food", "link", "amountGram", "price"],
+        ),
+    )
+
+    assert df.empty
+    assert list(df.columns) == autoshop.optimize.COLUMNS_PACKS
+
+
+def test_optimize_packs_text_price():
+    """Test that prices given as text give a numeric cost."""
+    requirements = pd.DataFrame(dict(food=["lentils"], amountGram=[1500.0]))
+    candidates = pd.DataFrame(
+        dict(
+            food=["lentils", "lentils"],
+            link=["l500", "l1000"],
+            amountGram=[500.0, 1000.0],
+            price=["1.25", "2.00"],
+        )
+    )
+
+    df = autoshop.optimize.optimize_packs(
+        requirements=requirements,
+        candidates=candidates,
+    )
+
+    assert df[["link", "packs"]].values.tolist() == [["l500", 1], ["l1000", 1]]
+    assert df["cost"].dtype == float
+    assert df["cost"].tolist() == [1.25, 2.0]
+
+
+def test_optimize_packs_requirement_nan(mocker):
+    """Test that a food whose requirement is NaN is missing, not an error."""
+    requirements = pd.DataFrame(
+        dict(food=["lentils", "garlic"], amountGram=[np.nan, 100.0])
+    )
+    candidates = pd.DataFrame(
+        dict(
+            food=["lentils", "garlic"],
+            link=["l500", "g1"],
+            amountGram=[500.0, 50.0],
+            price=[1.0, 0.3],
+        )
+    )
+
+    logger = mocker.patch.object(autoshop.optimize, "LOGGER")
+
+    df = autoshop.optimize.optimize_packs(
+        requirements=requirements,
+        candidates=candidates,
+    )
+
+    assert df[["link", "packs"]].values.tolist() == [["g1", 2]]
+    assert "lentils" in logger.warning.call_args.args[0]
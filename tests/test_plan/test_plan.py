@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoshop import all as autoshop
+
+
+@pytest.fixture
+def conversion():
+    return pd.DataFrame(
+        dict(
+            food=["garlic", "egg", "lentils"],
+            unit=["clove", "", "cup"],
+            toGram=[5.0, 60.0, 200.0],
+        )
+    )
+
+
+@pytest.fixture
+def food_map():
+    return pd.DataFrame(
+        dict(
+            food=["lentils", "lentils", "garlic", "egg", "milk", "tofu"],
+            order=["2", "1", "1", "1", "1", "1"],
+            link=["l1kg", "l500g", "g4", "e6", "m2l", "t"],
+            amount=[1.0, 500.0, 4.0, 6.0, 2.0, np.nan],
+            unit=["kg", "g", "clove", "pack", "l", "g"],
+        )
+    )
+
+
+def test_prepare_food_map(food_map, conversion):
+    """Test that amounts are converted to grams and the map sorted by order."""
+    df = autoshop.plan.prepare_food_map(food_map=food_map, conversion=conversion)
+
+    assert df["link"].tolist() == ["e6", "g4", "l500g", "l1kg", "m2l"]
+    np.testing.assert_allclose(df["amountGram"], [360.0, 20.0, 500.0, 1000.0, np.nan])
+    np.testing.assert_allclose(
+        df["amountMilliliter"], [np.nan, np.nan, np.nan, np.nan, 2000.0]
+    )
+
+
+def test_prepare_shop(conversion):
+    """Test that the amounts of a food are summed in grams."""
+    shop = pd.DataFrame(
+        dict(
+            food=["lentils", "lentils", "garlic", "garlic"],
+            nameFood=["Lentils", "Lentils", "Garlic", "Garlic"],
+            amount=[1.0, 300.0, 2.0, 1.0],
+            unit=["cup", "g", "clove", "bulb"],
+        )
+    )
+
+    df = autoshop.plan.prepare_shop(shop=shop, conversion=conversion)
+
+    assert df["food"].tolist() == ["garlic", "lentils"]
+    np.testing.assert_allclose(df["amountGram"], [np.nan, 500.0])
+    assert df["quantityUnderlying"].tolist() == [
+        "2.0 clove, 1.0 bulb",
+        "1.0 cup, 300.0 g",
+    ]
+
+
+def test_build_shopping_plan(food_map, conversion):
+    """Test that every food gets its first product or a diagnostic."""
+    shop = pd.DataFrame(
+        dict(
+            food=["lentils", "garlic", "egg", "milk", "tofu", "rice", "salt"],
+            nameFood=["Lentils", "Garlic", "Egg", "Milk", "Tofu", "Rice", "Salt"],
+            amount=[2.0, 6.0, 2.0, 1.0, 400.0, 100.0, 1.0],
+            unit=["cup", "clove", "", "g", "g", "g", "pinch"],
+        )
+    )
+
+    df = autoshop.plan.build_shopping_plan(
+        shop=shop, conversion=conversion, food_map=food_map
+    )
+
+    assert list(df.columns) == autoshop.plan.COLUMNS_PLAN
+    df = df.set_index("food")
+    assert df.loc["lentils", "link"] == "l500g"
+    assert df.loc["lentils", "packs"] == 1
+    assert df.loc["garlic", "link"] == "g4"
+    assert df.loc["garlic", "packs"] == 2
+    assert df.loc["egg", "amountGramTesco"] == 360.0
+    assert df.loc["egg", "packs"] == 1
+    assert df["diagnostic"].to_dict() == {
+        "egg": None,
+        "garlic": None,
+        "lentils": None,
+        "milk": autoshop.plan.DIAGNOSTIC_NO_GRAMS,
+        "rice": autoshop.plan.DIAGNOSTIC_UNMAPPED,
+        "salt": autoshop.plan.DIAGNOSTIC_UNCONVERTED,
+        "tofu": autoshop.plan.DIAGNOSTIC_NO_GRAMS,
+    }
+    assert pd.isna(df.loc["rice", "link"])
+    assert pd.isna(df.loc["salt", "packs"])
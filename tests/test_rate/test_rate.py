@@ -0,0 +1,136 @@
+import threading
+
+import pytest
+
+from autoshop import all as autoshop
+
+
+class FakeClock:
+    """A clock that only moves when the bucket sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.sleeps.append(seconds)
+
+
+def make_bucket(**kwargs):
+    clock = FakeClock()
+    bucket = autoshop.rate.TokenBucket(clock=clock, sleep=clock.sleep, **kwargs)
+    return bucket, clock
+
+
+def test_token_bucket_burst():
+    """Test that a burst goes through at once and then the rate applies."""
+    bucket, clock = make_bucket(rate=2, burst=3)
+
+    waits = [bucket.acquire() for _ in range(5)]
+
+    assert waits == [0, 0, 0, 0.5, 1.0]
+    assert clock.sleeps == [0.5, 1.0]
+
+
+def test_token_bucket_refill():
+    bucket, clock = make_bucket(rate=1, burst=2)
+    bucket.acquire()
+    bucket.acquire()
+
+    clock.now = 10.0
+
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(1.0)
+
+
+def test_token_bucket_shared_across_threads():
+    """Test that concurrent callers queue up behind each other."""
+    bucket, clock = make_bucket(rate=1, burst=1)
+
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(clock.sleeps) == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_token_bucket_backoff_and_recover():
+    """Test that backoff slows down to the floor and recover wins it back."""
+    bucket, _ = make_bucket(rate=1, burst=3, rate_min=0.2)
+
+    bucket.backoff()
+    assert bucket.rate == 0.5
+    assert bucket.acquire() == pytest.approx(2.0)
+
+    for _ in range(5):
+        bucket.backoff()
+    assert bucket.rate == 0.2
+
+    for _ in range(20):
+        bucket.recover()
+    assert bucket.rate == 1
+
+
+def test_token_bucket_unlimited():
+    bucket, clock = make_bucket(rate=float("inf"))
+
+    assert [bucket.acquire() for _ in range(10)] == [0.0] * 10
+    assert clock.sleeps == []
+
+
+def test_limiter_is_shared():
+    assert autoshop.rate.limiter() is autoshop.rate.limiter()
+
+
+@pytest.mark.parametrize(
+    "title, expected",
+    [
+        ("Access Denied", True),
+        ("Just a moment...", True),
+        ("429 Too Many Requests", True),
+        ("Tesco Red Split Lentils 1Kg - Tesco Groceries", False),
+        ("", False),
+    ],
+)
+def test_is_challenge(mocker, title, expected):
+    mock_driver = mocker.Mock()
+    mock_driver.title = title
+
+    assert autoshop.rate.is_challenge(driver=mock_driver) == expected
+
+
+def test_navigate_backs_off_on_challenge(mocker):
+    """Test that a challenge slows the bucket down before trying again."""
+    bucket, clock = make_bucket(rate=1, burst=1)
+    mock_driver = mocker.Mock()
+    titles = iter(["Access Denied", "Tesco Groceries"])
+    mock_driver.get.side_effect = lambda url: setattr(
+        mock_driver, "title", next(titles)
+    )
+
+    assert autoshop.rate.navigate(driver=mock_driver, url="https://a", bucket=bucket)
+
+    assert mock_driver.get.call_count == 2
+    assert clock.sleeps == [2.0]
+    assert bucket.rate == pytest.approx(0.6)
+
+
+def test_navigate_gives_up(mocker):
+    bucket, _ = make_bucket(rate=float("inf"))
+    mock_driver = mocker.Mock()
+    mock_driver.title = "Pardon Our Interruption"
+
+    loaded = autoshop.rate.navigate(
+        driver=mock_driver, url="https://a", bucket=bucket, max_retries=1
+    )
+
+    assert not loaded
+    assert mock_driver.get.call_count == 2
@@ -1,12 +1,14 @@
 import unittest.mock
 
 import pytest
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import JavascriptException, TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 
 from autoshop import all as autoshop
 
+pytestmark = pytest.mark.usefixtures("no_pacing")
+
 
 # Tests for wait_and_check_exists function
 def test_wait_and_check_exists_found(mocker):
@@ -113,6 +115,109 @@ def test_wait_and_get_with_by_parameter(mocker):
     mock_driver.find_element.assert_called_with(by=By.ID, value="test-id")
 
 
+def test_wait_and_get_does_not_sleep(mocker):
+    """Test that wait_and_get returns as soon as the wait succeeds."""
+    mock_driver = mocker.Mock()
+    mocker.patch("autoshop.selenium.WebDriverWait")
+    mock_sleep = mocker.patch("time.sleep")
+
+    autoshop.selenium.wait_and_get(driver=mock_driver, value="//button")
+
+    mock_sleep.assert_not_called()
+
+
+def test_wait_and_get_poll_interval(mocker):
+    """Test that the poll interval is passed to WebDriverWait."""
+    mock_driver = mocker.Mock()
+    mock_wait_class = mocker.patch("autoshop.selenium.WebDriverWait")
+
+    autoshop.selenium.wait_and_get(
+        driver=mock_driver, value="//button", timeout=5, poll_interval=0.25
+    )
+
+    mock_wait_class.assert_called_with(mock_driver, 5, poll_frequency=0.25)
+
+
+def test_wait_and_get_strategy(mocker):
+    """Test that the per call strategy picks the expected condition."""
+    mock_driver = mocker.Mock()
+    mocker.patch("autoshop.selenium.WebDriverWait")
+    mock_condition = mocker.patch(
+        "selenium.webdriver.support.expected_conditions.element_to_be_clickable"
+    )
+
+    autoshop.selenium.wait_and_get(
+        driver=mock_driver,
+        value="//button",
+        strategy=autoshop.selenium.STRATEGY_CLICKABLE,
+    )
+
+    mock_condition.assert_called_with((By.XPATH, "//button"))
+
+
+def test_wait_and_get_strategy_default(mocker):
+    """Test that the module level strategy is used when none is passed."""
+    mock_driver = mocker.Mock()
+    mocker.patch("autoshop.selenium.WebDriverWait")
+    mocker.patch.object(
+        autoshop.selenium, "STRATEGY_DEFAULT", autoshop.selenium.STRATEGY_VISIBLE
+    )
+    mock_condition = mocker.patch(
+        "selenium.webdriver.support.expected_conditions.visibility_of_element_located"
+    )
+
+    autoshop.selenium.wait_and_get_all(driver=mock_driver, value="//li")
+
+    mock_condition.assert_called_with((By.XPATH, "//li"))
+
+
+def test_wait_and_get_unknown_strategy(mocker):
+    """Test that an unknown strategy raises."""
+    mock_driver = mocker.Mock()
+
+    with pytest.raises(ValueError, match="Unknown strategy"):
+        autoshop.selenium.wait_and_get(
+            driver=mock_driver, value="//button", strategy="eventually"
+        )
+
+
+def test_condition_stable(mocker):
+    """Test that stable only succeeds once two polls see the same box and text."""
+    mock_driver = mocker.Mock()
+    mock_element = mocker.Mock()
+    mock_driver.find_element.return_value = mock_element
+    mock_driver.execute_script.side_effect = [
+        [0, 0, 10, 10, "Loading"],
+        [0, 0, 10, 20, "Add"],
+        [0, 0, 10, 20, "Add"],
+    ]
+
+    condition = autoshop.selenium.condition_stable(by=By.XPATH, value="//button")
+
+    assert condition(mock_driver) is False
+    assert condition(mock_driver) is False
+    assert condition(mock_driver) is mock_element
+
+
+def test_condition_network_idle(mocker):
+    """Test that network idle waits for the resource count to settle."""
+    mock_driver = mocker.Mock()
+    mock_element = mocker.Mock()
+    mock_driver.find_elements.return_value = [mock_element]
+    mock_driver.find_element.return_value = mock_element
+    mock_driver.execute_script.side_effect = [
+        ["interactive", 3],
+        ["complete", 7],
+        ["complete", 7],
+    ]
+
+    condition = autoshop.selenium.condition_network_idle(by=By.XPATH, value="//a")
+
+    assert condition(mock_driver) is False
+    assert condition(mock_driver) is False
+    assert condition(mock_driver) is mock_element
+
+
 # Tests for wait_and_click function
 def test_wait_and_click_success(mocker):
     """Test successful click operation."""
@@ -127,6 +232,33 @@ def test_wait_and_click_success(mocker):
     mock_element.click.assert_called_once()
 
 
+@pytest.mark.parametrize("function", ["wait_and_click", "wait_and_execute_click"])
+def test_click_takes_token(mocker, function):
+    """Test that clicks wait for a token of the bucket before finding the element."""
+    mock_driver = mocker.Mock()
+    mock_element = mocker.Mock()
+    mock_get = mocker.patch("autoshop.selenium.wait_and_get", return_value=mock_element)
+    mock_bucket = mocker.Mock()
+    mock_bucket.acquire.side_effect = lambda: mock_get.assert_not_called()
+
+    getattr(autoshop.selenium, function)(
+        driver=mock_driver, value="//button", bucket=mock_bucket
+    )
+
+    mock_bucket.acquire.assert_called_once()
+    assert mock_element.click.called or mock_driver.execute_script.called
+
+
+def test_click_uses_shared_limiter(mocker):
+    """Test that clicks go through the shared limiter by default."""
+    mocker.patch("autoshop.selenium.wait_and_get", return_value=mocker.Mock())
+    mock_limiter = mocker.patch("autoshop.rate.limiter")
+
+    autoshop.selenium.wait_and_click(driver=mocker.Mock(), value="//button")
+
+    mock_limiter.return_value.acquire.assert_called_once()
+
+
 def test_wait_and_click_timeout(mocker):
     """Test wait_and_click with timeout."""
     mock_driver = mocker.Mock()
@@ -194,6 +326,171 @@ def test_wait_and_select_all_and_send_keys(mocker):
     assert mock_element.send_keys.call_args_list == expected_calls
 
 
+# Tests for extract_all function
+def test_extract_all_single_script(mocker):
+    """Test that extract_all makes a single script call and returns its records."""
+    mock_driver = mocker.Mock()
+    records = [dict(text="", href="https://a", srcset=None, sponsored=False)]
+    mock_driver.execute_script.return_value = records
+
+    result = autoshop.selenium.extract_all(
+        driver=mock_driver,
+        value="//a",
+        xpaths_text=dict(price=".//p"),
+        prefix_sponsored="Sponsored",
+    )
+
+    assert result == records
+    mock_driver.execute_script.assert_called_once_with(
+        autoshop.selenium.SCRIPT_EXTRACT_ALL,
+        "//a",
+        True,
+        dict(price=".//p"),
+        "Sponsored",
+    )
+
+
+def test_extract_all_unsupported_by(mocker):
+    """Test that extract_all only accepts XPath and CSS selectors."""
+    mock_driver = mocker.Mock()
+
+    with pytest.raises(ValueError, match="Unsupported"):
+        autoshop.selenium.extract_all(driver=mock_driver, value="test", by=By.ID)
+
+    mock_driver.execute_script.assert_not_called()
+
+
+# Tests for the MutationObserver backed waits
+def test_observe_and_get_success(mocker):
+    """Test that observe_and_get returns the element from a single script call."""
+    mock_driver = mocker.Mock()
+    mock_element = mocker.Mock()
+    mock_driver.execute_async_script.return_value = mock_element
+
+    result = autoshop.selenium.observe_and_get(
+        driver=mock_driver, value="//button", timeout=3
+    )
+
+    assert result == mock_element
+    mock_driver.execute_async_script.assert_called_once_with(
+        autoshop.selenium.SCRIPT_OBSERVE, "//button", True, 3_000
+    )
+    mock_driver.find_element.assert_not_called()
+
+
+def test_observe_and_get_timeout(mocker):
+    """Test that observe_and_get raises when nothing appears in time."""
+    mock_driver = mocker.Mock()
+    mock_driver.execute_async_script.return_value = None
+
+    with pytest.raises(TimeoutException):
+        autoshop.selenium.observe_and_get(driver=mock_driver, value="//nonexistent")
+
+
+def test_observe_and_get_by_id(mocker):
+    """Test that non XPath locators are turned into CSS selectors."""
+    mock_driver = mocker.Mock()
+
+    autoshop.selenium.observe_and_get(
+        driver=mock_driver, value="test-id", by=By.ID, timeout=1
+    )
+
+    mock_driver.execute_async_script.assert_called_once_with(
+        autoshop.selenium.SCRIPT_OBSERVE, "[id='test-id']", False, 1_000
+    )
+
+
+def test_observe_and_get_falls_back_to_polling(mocker):
+    """Test that observe_and_get polls when the script cannot be injected."""
+    mock_driver = mocker.Mock()
+    mock_element = mocker.Mock()
+    mock_driver.execute_async_script.side_effect = JavascriptException()
+    mock_wait_and_get = mocker.patch(
+        "autoshop.selenium.wait_and_get", return_value=mock_element
+    )
+
+    result = autoshop.selenium.observe_and_get(driver=mock_driver, value="//button")
+
+    assert result == mock_element
+    mock_wait_and_get.assert_called_once()
+
+
+@pytest.mark.parametrize("found, expected", [(object(), True), (None, False)])
+def test_observe_and_check_exists(mocker, found, expected):
+    """Test that observe_and_check_exists reports whether the element appeared."""
+    mock_driver = mocker.Mock()
+    mock_driver.execute_async_script.return_value = found
+
+    result = autoshop.selenium.observe_and_check_exists(
+        driver=mock_driver, value="//button"
+    )
+
+    assert result is expected
+
+
+def test_observe_and_check_exists_falls_back_to_polling(mocker):
+    """Test that observe_and_check_exists polls when the script cannot be injected."""
+    mock_driver = mocker.Mock()
+    mock_driver.execute_async_script.side_effect = JavascriptException()
+    mock_wait_and_check_exists = mocker.patch(
+        "autoshop.selenium.wait_and_check_exists", return_value=False
+    )
+
+    result = autoshop.selenium.observe_and_check_exists(
+        driver=mock_driver, value="//button"
+    )
+
+    assert result is False
+    mock_wait_and_check_exists.assert_called_once()
+
+
+# Tests for wait_for_any function
+def test_wait_for_any_first_outcome_found(mocker):
+    """Test that wait_for_any returns the first outcome, in order, that exists."""
+    mock_driver = mocker.Mock()
+    found = {"//ready": [mocker.Mock()], "//in-basket": [mocker.Mock()]}
+    mock_driver.find_elements.side_effect = lambda by, value: found.get(value, [])
+
+    result = autoshop.selenium.wait_for_any(
+        driver=mock_driver,
+        outcomes={
+            "out_of_stock": "//out-of-stock",
+            "in_basket": "//in-basket",
+            "ready": "//ready",
+        },
+    )
+
+    assert result == "in_basket"
+
+
+def test_wait_for_any_polls_until_found(mocker):
+    """Test that wait_for_any keeps polling until an outcome appears."""
+    mock_driver = mocker.Mock()
+    mock_driver.find_elements.side_effect = [[], [], [mocker.Mock()]]
+
+    result = autoshop.selenium.wait_for_any(
+        driver=mock_driver,
+        outcomes={"ready": "//ready"},
+        poll_interval=0.001,
+    )
+
+    assert result == "ready"
+    assert mock_driver.find_elements.call_count == 3
+
+
+def test_wait_for_any_timeout(mocker):
+    """Test that wait_for_any raises when no outcome appears in time."""
+    mock_driver = mocker.Mock()
+    mock_driver.find_elements.return_value = []
+
+    with pytest.raises(TimeoutException):
+        autoshop.selenium.wait_for_any(
+            driver=mock_driver,
+            outcomes={"ready": "//ready"},
+            timeout=0,
+        )
+
+
 # Tests for selenium module constants
 def test_by_constant():
     """Test that 'by' constant is accessible."""
@@ -242,3 +539,18 @@ def test_wait_and_click_real_element(driver):
     # Verify the click worked
     element = driver.find_element(By.ID, "btn")
     assert element.text == "Clicked"
+
+
+@pytest.mark.integration
+def test_observe_and_get_real_element(driver):
+    """Test observe_and_get with an element added after the page loads."""
+    driver.get(
+        "data:text/html,<html><body><script>setTimeout(() => {"
+        "const div = document.createElement('div'); div.id = 'late';"
+        "div.innerText = 'Hello'; document.body.appendChild(div);"
+        "}, 500)</script></body></html>"
+    )
+
+    element = autoshop.selenium.observe_and_get(driver=driver, value="late", by=By.ID)
+
+    assert element.text == "Hello"
@@ -1,8 +1,27 @@
+import contextlib
+import functools
+import http.server
+import json
+import math
+import threading
+import time
+import warnings
+from pathlib import Path
+
+import lxml.html
+import pandas as pd
 import pytest
 
 from autoshop import all as autoshop
 
+pytestmark = pytest.mark.usefixtures("no_pacing")
+
 TEST_URL = "https://www.tesco.com/groceries/en-GB/products/254656543"
+PATH_FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load_fixture(name: str) -> dict:
+    return json.loads((PATH_FIXTURES / name).read_text())
 
 
 @pytest.mark.parametrize(
@@ -98,11 +117,1545 @@ def test_get_quantity_from_description(args, kwargs, expected):
     assert expected == actual
 
 
+DESCRIPTIONS = [
+    "Yorkshire Provender Tomato & Red Pepper Soup & Wensleydale 560G",
+    "Tesco Sieved Tomatoes Passata 500G Ce",
+    "Tesco Garlic Powder 45G ..",
+    "Highland Spring Still Bottled Water 12 X 500Ml",
+    "Tesco Apple & Raspberry No Added Sugar Sparkling Water 4X500ml",
+    "Highland Spring Still Water 6 X 1.5L",
+    "Tesco Strawberry Still Flavoured Water 1Ltr",
+    "Redmere Farms Garlic 4 Pack",
+    "Tesco Red Onions 3Pack Minimum",
+    "Tesco Cauliflower Rice 4 Pack 600G",
+    "Tesco Red Split Lentils 1Kg",
+    "Cauldron 6 Lincolnshire Sausages 276G",
+    "Loose Bananas",
+    None,
+]
+
+
+def test_get_quantities():
+    """Test that the batch parse matches the scalar one on every description."""
+    descriptions = pd.Series(DESCRIPTIONS, index=range(10, 10 + len(DESCRIPTIONS)))
+
+    actual = autoshop.tesco.get_quantities(descriptions)
+
+    assert list(actual.index) == list(descriptions.index)
+    assert actual["amount"].dtype == float
+    assert isinstance(actual["unit"].dtype, pd.CategoricalDtype)
+    expected = [
+        autoshop.tesco.get_quantity_from_description(description)
+        for description in DESCRIPTIONS
+    ]
+    for (_, row), quantity in zip(actual.iterrows(), expected):
+        if quantity.unit is None:
+            assert math.isnan(row["amount"])
+            assert pd.isna(row["unit"])
+        else:
+            assert (row["amount"], row["unit"]) == quantity
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("£1.50", 1.5),
+        ("£12", 12.0),
+        ("", float("nan")),
+        (None, float("nan")),
+    ],
+)
+def test_to_price(text, expected):
+    actual = autoshop.tesco.to_price(text)
+    assert actual == expected or math.isnan(expected) and math.isnan(actual)
+
+
+@pytest.mark.parametrize(
+    "srcset, expected",
+    [
+        ("https://img/a.jpeg 768w, https://img/b.jpeg 1024w", "https://img/a.jpeg"),
+        ("", "NA"),
+        (None, "NA"),
+    ],
+)
+def test_to_image_url(srcset, expected):
+    assert autoshop.tesco.to_image_url(srcset) == expected
+
+
+def test_get_products(mocker):
+    """Test that get_products builds the product frame from extracted records."""
+    mock_driver = mocker.Mock()
+    mocker.patch("autoshop.tesco.wait_and_check_exists", return_value=True)
+    mock_extract_all = mocker.patch(
+        "autoshop.tesco.extract_all",
+        return_value=[
+            dict(
+                text="",
+                href="https://www.tesco.com/groceries/en-GB/products/1",
+                srcset="https://img/1.jpeg 768w",
+                sponsored=False,
+                description="Tesco Red Split Lentils 1Kg",
+                price="£1.50",
+            ),
+            dict(
+                text="Tesco Red Split Lentils 1Kg",
+                href="https://www.tesco.com/groceries/en-GB/products/1",
+                srcset="https://img/1.jpeg 768w",
+                sponsored=False,
+                description="Tesco Red Split Lentils 1Kg",
+                price="£1.50",
+            ),
+            dict(
+                text="",
+                href="https://www.tesco.com/groceries/en-GB/products/2",
+                srcset=None,
+                sponsored=True,
+                description="Sponsored Lentils 500G",
+                price="£3",
+            ),
+        ],
+    )
+
+    df = autoshop.tesco.get_products(driver=mock_driver, url="https://search")
+
+    mock_driver.get.assert_called_once_with("https://search")
+    mock_extract_all.assert_called_once()
+    assert list(df.columns) == autoshop.tesco.COLUMNS_PRODUCTS
+    assert df.to_dict("records") == [
+        dict(
+            description="Tesco Red Split Lentils 1Kg",
+            link="https://www.tesco.com/groceries/en-GB/products/1",
+            image="https://img/1.jpeg",
+            amount=1.0,
+            unit="kg",
+            price=1.5,
+            sponsored=False,
+        )
+    ]
+
+    df = autoshop.tesco.get_products(driver=mock_driver, include_sponsored=True)
+
+    assert df["sponsored"].tolist() == [False, True]
+
+
+def test_get_products_no_results(mocker):
+    """Test that get_products returns an empty frame when nothing is found."""
+    mock_driver = mocker.Mock()
+    mocker.patch("autoshop.tesco.wait_and_check_exists", return_value=False)
+    mock_extract_all = mocker.patch("autoshop.tesco.extract_all")
+
+    df = autoshop.tesco.get_products(driver=mock_driver)
+
+    assert df.empty
+    assert list(df.columns) == autoshop.tesco.COLUMNS_PRODUCTS
+    mock_extract_all.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "outcome",
+    [autoshop.tesco.OUTCOME_OUT_OF_STOCK, autoshop.tesco.OUTCOME_IN_BASKET],
+)
+def test_add_food_to_basket_skips(mocker, outcome):
+    """Test that add_food_to_basket classifies the page in a single wait."""
+    mock_driver = mocker.Mock()
+    mock_wait_for_any = mocker.patch(
+        "autoshop.tesco.wait_for_any", return_value=outcome
+    )
+    mock_send_keys = mocker.patch("autoshop.tesco.wait_and_delete_and_send_keys")
+
+    actual = autoshop.tesco.add_food_to_basket(
+        driver=mock_driver, url=TEST_URL, amount=1, info="test"
+    )
+
+    assert actual == outcome
+    mock_driver.get.assert_called_once_with(TEST_URL)
+    mock_wait_for_any.assert_called_once()
+    mock_send_keys.assert_not_called()
+
+
+def test_add_food_to_basket_ready(mocker):
+    """Test that add_food_to_basket adds the amount when the page is ready."""
+    mock_driver = mocker.Mock()
+    mocker.patch(
+        "autoshop.tesco.wait_for_any", return_value=autoshop.tesco.OUTCOME_READY
+    )
+    mocker.patch("time.sleep")
+    mock_send_keys = mocker.patch("autoshop.tesco.wait_and_delete_and_send_keys")
+    mock_click = mocker.patch("autoshop.tesco.wait_and_click")
+    mock_get = mocker.patch("autoshop.tesco.wait_and_get")
+
+    outcome = autoshop.tesco.add_food_to_basket(
+        driver=mock_driver, url=TEST_URL, amount=2, info="test"
+    )
+
+    assert outcome == autoshop.tesco.OUTCOME_ADDED
+    assert mock_send_keys.call_args.kwargs["keys"] == 2
+    mock_click.assert_called_once()
+    mock_get.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "current_url, expected",
+    [
+        ("https://www.tesco.com/groceries/en-GB/orders", True),
+        ("https://www.tesco.com/account/login/en-GB?from=/groceries", False),
+    ],
+)
+def test_is_logged_in(mocker, current_url, expected):
+    """Test that being redirected to the login page means the session expired."""
+    mock_driver = mocker.Mock()
+    mock_driver.current_url = current_url
+
+    assert autoshop.tesco.is_logged_in(driver=mock_driver) is expected
+    mock_driver.get.assert_called_once_with(autoshop.tesco.URL_ORDERS)
+
+
+def test_ensure_logged_in_reuses_session(mocker):
+    """Test that the login flow is skipped while the session is valid."""
+    mock_driver = mocker.Mock()
+    mocker.patch("autoshop.tesco.is_logged_in", return_value=True)
+    mock_login = mocker.patch("autoshop.tesco.login")
+
+    assert autoshop.tesco.ensure_logged_in(driver=mock_driver) is False
+    mock_login.assert_not_called()
+
+
+def test_ensure_logged_in_expired_session(mocker, tmp_path):
+    """Test that an expired session logs in and exports the new cookies."""
+    mock_driver = mocker.Mock()
+    mocker.patch("autoshop.tesco.is_logged_in", return_value=False)
+    mock_login = mocker.patch("autoshop.tesco.login")
+    mock_save_cookies = mocker.patch("autoshop.tesco.save_cookies")
+    path = tmp_path / "cookies.json"
+
+    assert autoshop.tesco.ensure_logged_in(driver=mock_driver, path_cookies=path)
+    mock_login.assert_called_once()
+    mock_save_cookies.assert_called_once_with(driver=mock_driver, path=path)
+
+
+def test_get_products_from_payloads():
+    """Test that products are read from a recorded search response."""
+    df = autoshop.tesco.get_products_from_payloads([load_fixture("api_search.json")])
+
+    assert list(df.columns) == autoshop.tesco.COLUMNS_PRODUCTS
+    assert df.to_dict("records") == [
+        dict(
+            description="Tesco Red Split Lentils 1Kg",
+            link=TEST_URL,
+            image="https://digitalcontent.api.tesco.com/v2/media/ghs/254656543.jpeg",
+            amount=1.0,
+            unit="kg",
+            price=1.5,
+            sponsored=False,
+        ),
+        dict(
+            description="Highland Spring Still Water 6 X 1.5L",
+            link="https://www.tesco.com/groceries/en-GB/products/299845871",
+            image="NA",
+            amount=9.0,
+            unit="l",
+            price=3.25,
+            sponsored=True,
+        ),
+    ]
+
+
+def test_get_basket_from_payloads():
+    """Test that basket items are read from a recorded basket response."""
+    df = autoshop.tesco.get_basket_from_payloads([load_fixture("api_basket.json")])
+
+    assert df.to_dict("records") == [
+        dict(link=TEST_URL, quantity=2, price=1.5),
+        dict(
+            link="https://www.tesco.com/groceries/en-GB/products/50365892",
+            quantity=1,
+            price=0.85,
+        ),
+    ]
+
+
+def test_parse_search_page():
+    """Test that every tile is read from a saved search page."""
+    html = (PATH_FIXTURES / "search_page.html").read_text()
+
+    df = autoshop.tesco.parse_search_page(html)
+
+    assert list(df.columns) == autoshop.tesco.COLUMNS_SEARCH_PAGE
+    assert df["description"].tolist() == [
+        "Tesco Red Split Lentils 1Kg",
+        "Highland Spring Still Water 6 X 1.5L",
+        "Tesco Garlic Powder 45G ..",
+        "Redmere Farms Garlic 4 Pack",
+    ]
+    assert df["link"].tolist()[0] == TEST_URL
+    assert df["image"].tolist() == [
+        "https://digitalcontent.api.tesco.com/v2/media/ghs/254656543.jpeg?h=225",
+        "https://digitalcontent.api.tesco.com/v2/media/ghs/299845871.jpeg?h=225",
+        "https://digitalcontent.api.tesco.com/v2/media/ghs/50365892.jpeg?h=225",
+        "NA",
+    ]
+    assert df["amount"].tolist() == [1.0, 9.0, 45.0, 4.0]
+    assert df["unit"].tolist() == ["kg", "l", "g", "medium"]
+    assert df["price"].tolist()[:3] == [1.5, 3.25, 0.85]
+    assert math.isnan(df["price"].tolist()[3])
+    assert df["sponsored"].tolist() == [False, True, False, False]
+    assert df["out_of_stock"].tolist() == [False, False, False, True]
+    assert df["in_basket"].tolist() == [False, False, True, False]
+
+
+def test_get_food_elements_from_snapshot():
+    """Test that the snapshot equivalents match the live element helpers."""
+    html = (PATH_FIXTURES / "search_page.html").read_text()
+    tree = autoshop.tesco.lxml.html.fromstring(html)
+
+    elements = autoshop.tesco.get_food_elements_from_snapshot(tree)
+    parents = [element.getparent() for element in elements]
+
+    assert [element.get("href") for element in elements] == [
+        "/groceries/en-GB/products/254656543",
+        "/groceries/en-GB/products/50365892",
+        "/groceries/en-GB/products/311296532",
+    ]
+    assert autoshop.tesco.get_price_from_snapshot(parents[0]) == 1.5
+    assert autoshop.tesco.get_image_url_from_snapshot(parents[1]) == (
+        "https://digitalcontent.api.tesco.com/v2/media/ghs/50365892.jpeg?h=225"
+    )
+    assert autoshop.tesco.get_image_url_from_snapshot(None) == "NA"
+
+
+def test_parse_product_page():
+    """Test that the product is read from a saved product page."""
+    html = (PATH_FIXTURES / "product_page.html").read_text()
+
+    assert autoshop.tesco.parse_product_page(html) == dict(
+        description="Tesco Red Split Lentils 1Kg",
+        image="https://digitalcontent.api.tesco.com/v2/media/ghs/254656543.jpeg?h=540",
+        amount=1.0,
+        unit="kg",
+        price=1.5,
+        out_of_stock=False,
+        in_basket=True,
+    )
+
+
+def search_pages(pages: int) -> list[pd.DataFrame]:
+    df = autoshop.tesco.parse_search_page(
+        (PATH_FIXTURES / "search_page.html").read_text()
+    )
+    return [
+        df.assign(
+            link=lambda x, page=page: x["link"].where(
+                x["sponsored"], x["link"] + f"?page={page}"
+            )
+        )
+        for page in range(1, pages + 1)
+    ]
+
+
+def test_iter_search_results(mocker):
+    """Test that pages are loaded until one is short and sponsored are skipped."""
+    mock_driver = mocker.Mock()
+    mocker.patch("autoshop.tesco.wait_and_check_exists", return_value=True)
+    pages = search_pages(pages=2)
+    pages[1] = pages[1].iloc[:2]
+    mocker.patch("autoshop.tesco.parse_search_page", side_effect=pages)
+
+    records = list(
+        autoshop.tesco.iter_search_results(driver=mock_driver, query="garlic", count=4)
+    )
+
+    assert mock_driver.get.call_count == 2
+    assert "page=2&count=4" in mock_driver.get.call_args.args[0]
+    assert [record["description"] for record in records] == [
+        "Tesco Red Split Lentils 1Kg",
+        "Tesco Garlic Powder 45G ..",
+        "Redmere Farms Garlic 4 Pack",
+        "Tesco Red Split Lentils 1Kg",
+    ]
+
+
+def test_iter_search_results_stop_when(mocker):
+    """Test that no more pages are loaded once the predicate is met."""
+    mock_driver = mocker.Mock()
+    mocker.patch("autoshop.tesco.wait_and_check_exists", return_value=True)
+    mocker.patch("autoshop.tesco.parse_search_page", side_effect=search_pages(pages=3))
+
+    records = list(
+        autoshop.tesco.iter_search_results(
+            driver=mock_driver,
+            query="garlic",
+            count=4,
+            stop_when=autoshop.tesco.stop_after_matches(4),
+        )
+    )
+
+    assert mock_driver.get.call_count == 2
+    assert len(records) == 4
+
+
+def test_iter_search_results_is_lazy(mocker):
+    """Test that pages are only loaded as the results are consumed."""
+    mock_driver = mocker.Mock()
+    mocker.patch("autoshop.tesco.wait_and_check_exists", return_value=True)
+    mocker.patch("autoshop.tesco.parse_search_page", side_effect=search_pages(pages=3))
+
+    results = autoshop.tesco.iter_search_results(
+        driver=mock_driver, query="garlic", count=4, max_pages=2
+    )
+    mock_driver.get.assert_not_called()
+    next(results)
+    assert mock_driver.get.call_count == 1
+    assert len(list(results)) == 5
+    assert mock_driver.get.call_count == 2
+
+
+def test_iter_search_results_no_products(mocker):
+    mock_driver = mocker.Mock()
+    mocker.patch("autoshop.tesco.wait_and_check_exists", return_value=False)
+
+    assert list(autoshop.tesco.iter_search_results(mock_driver, "nothing")) == []
+    assert "count=48" in mock_driver.get.call_args.args[0]
+
+
+def test_get_api_payloads(mocker):
+    """Test that only finished JSON responses from the API are captured."""
+
+    def event(method, **params):
+        return dict(
+            message=json.dumps(dict(message=dict(method=method, params=params)))
+        )
+
+    mock_driver = mocker.Mock()
+    mock_driver.get_log.return_value = [
+        event(
+            "Network.responseReceived",
+            requestId="1",
+            response=dict(
+                url="https://xapi.tesco.com/", status=200, mimeType="application/json"
+            ),
+        ),
+        event(
+            "Network.responseReceived",
+            requestId="2",
+            response=dict(
+                url="https://www.tesco.com/app.js",
+                status=200,
+                mimeType="text/javascript",
+            ),
+        ),
+        event(
+            "Network.responseReceived",
+            requestId="3",
+            response=dict(
+                url="https://xapi.tesco.com/", status=200, mimeType="application/json"
+            ),
+        ),
+        event("Network.loadingFinished", requestId="1"),
+        event("Network.loadingFinished", requestId="2"),
+    ]
+    mock_driver.execute_cdp_cmd.return_value = dict(
+        body=json.dumps(dict(data=1)), base64Encoded=False
+    )
+
+    payloads = autoshop.tesco.get_api_payloads(driver=mock_driver, timeout=0)
+
+    assert payloads == [dict(data=1)]
+    mock_driver.execute_cdp_cmd.assert_called_once_with(
+        "Network.getResponseBody", {"requestId": "1"}
+    )
+
+
+class MockPool:
+    """Leases out mock drivers like a DriverPool."""
+
+    def __init__(self, mocker):
+        self.driver = mocker.Mock()
+        self.leases = 0
+
+    @contextlib.contextmanager
+    def lease(self):
+        self.leases += 1
+        yield self.driver
+
+
+def test_scrape_catalog(mocker):
+    """Test that every query is scraped into one frame with the catalog columns."""
+    queries = pd.DataFrame(
+        dict(
+            food=["lentils", "garlic", "water"],
+            name=["Red lentils", "Garlic", "Water"],
+            search=["red split lentils", "", None],
+        )
+    )
+
+    def get_products(driver, url, bucket):
+        if "Water" in url:
+            return pd.DataFrame(columns=autoshop.tesco.COLUMNS_PRODUCTS)
+        return pd.DataFrame(
+            dict(
+                description=[f"Product for {url}"],
+                link=["https://link"],
+                image=["https://image"],
+                amount=[1.0],
+                unit=["kg"],
+                price=[1.5],
+                sponsored=[False],
+            )
+        )
+
+    mocker.patch("autoshop.tesco.get_products", side_effect=get_products)
+    pool = MockPool(mocker)
+
+    df = autoshop.tesco.scrape_catalog(
+        queries=queries, workers=2, pool=pool, interval=0
+    )
+
+    assert pool.leases == 3
+    assert list(df.columns) == autoshop.tesco.COLUMNS_CATALOG
+    assert sorted(df["search"]) == ["Garlic", "red split lentils"]
+    assert sorted(df["food"]) == ["garlic", "lentils"]
+
+
+def test_scrape_catalog_query_fails(mocker, catalog):
+    """Test that a failing query is logged and skipped, the others are kept."""
+    queries = pd.DataFrame(dict(food=["lentils", "garlic"], name=["Lentils", "Garlic"]))
+
+    def get_products(driver, url, bucket):
+        if "Lentils" in url:
+            raise autoshop.selenium.TimeoutException("Timed out")
+        return pd.DataFrame(
+            dict(
+                description=["Tesco Garlic Powder 45G .."],
+                link=[URL_GARLIC],
+                image=["https://image"],
+                amount=[45.0],
+                unit=["g"],
+                price=[0.85],
+                sponsored=[False],
+            )
+        )
+
+    mocker.patch("autoshop.tesco.get_products", side_effect=get_products)
+    logger = mocker.patch.object(autoshop.tesco, "LOGGER")
+
+    df = autoshop.tesco.scrape_catalog(
+        queries=queries, workers=2, pool=MockPool(mocker), interval=0, catalog=catalog
+    )
+
+    assert df["food"].tolist() == ["garlic"]
+    assert catalog.get_searches()["food"].tolist() == ["garlic"]
+    assert "Lentils" in logger.error.call_args.args[0]
+    assert "lentils" in logger.warning.call_args.args[0]
+
+
+def test_scrape_catalog_rate_limit(mocker):
+    """Test that page loads are spaced by the interval across all workers."""
+    queries = pd.DataFrame(dict(food=["a", "b", "c"], name=["a", "b", "c"]))
+    mocker.patch("autoshop.tesco.wait_and_check_exists", return_value=False)
+    mock_sleep = mocker.patch("time.sleep")
+
+    autoshop.tesco.scrape_catalog(
+        queries=queries, workers=3, pool=MockPool(mocker), interval=10
+    )
+
+    waits = sorted(call.args[0] for call in mock_sleep.call_args_list)
+    assert len(waits) == 2
+    assert waits[0] == pytest.approx(10, abs=1)
+    assert waits[1] == pytest.approx(20, abs=1)
+
+
+NOW = pd.Timestamp("2026-01-02 12:00")
+URL_GARLIC = "https://www.tesco.com/groceries/en-GB/products/50365892"
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    with autoshop.tesco.Catalog(path=tmp_path / "catalog.sqlite") as catalog:
+        yield catalog
+
+
+def test_get_product_id():
+    assert autoshop.tesco.get_product_id(TEST_URL) == "254656543"
+    assert autoshop.tesco.get_product_id("https://www.tesco.com/") is None
+
+
+def test_catalog_upsert_and_lookup(catalog):
+    """Test that products can be looked up by link and by food."""
+    products = pd.DataFrame(
+        dict(
+            food=["lentils", "garlic"],
+            name=["Red lentils", "Garlic"],
+            search=["red split lentils", "garlic"],
+            description=["Tesco Red Split Lentils 1Kg", "Tesco Garlic Powder 45G .."],
+            link=[TEST_URL, URL_GARLIC],
+            image=["https://image/1", "NA"],
+            amount=[1.0, 45.0],
+            unit=["kg", "g"],
+            price=[1.5, 0.85],
+        )
+    )
+
+    assert catalog.upsert(products, now=NOW) == 2
+
+    df = catalog.lookup(links=[URL_GARLIC], now=NOW)
+    assert df[["link", "id", "description", "amount", "unit", "price"]].to_dict(
+        "records"
+    ) == [
+        dict(
+            link=URL_GARLIC,
+            id="50365892",
+            description="Tesco Garlic Powder 45G ..",
+            amount=45.0,
+            unit="g",
+            price=0.85,
+        )
+    ]
+    assert df["price_at"].iloc[0] == NOW
+    assert df["out_of_stock"].isna().all()
+
+    df = catalog.lookup(food="lentils", now=NOW)
+    assert df[["food", "search", "link"]].to_dict("records") == [
+        dict(food="lentils", search="red split lentils", link=TEST_URL)
+    ]
+
+
+def test_catalog_max_age_per_field(catalog):
+    """Test that only the fields older than their max age are missing."""
+    catalog.upsert(
+        pd.DataFrame(dict(link=[TEST_URL], description=["Lentils 1Kg"], price=[1.5])),
+        now=NOW - pd.Timedelta(hours=30),
+    )
+    catalog.upsert(
+        pd.DataFrame(dict(link=[TEST_URL], out_of_stock=[True])),
+        now=NOW - pd.Timedelta(hours=1),
+    )
+
+    df = catalog.lookup(
+        links=[TEST_URL],
+        max_age=dict(price=pd.Timedelta(hours=24), stock=pd.Timedelta(hours=24)),
+        now=NOW,
+    )
+    assert math.isnan(df["price"].iloc[0])
+    assert pd.isna(df["price_at"].iloc[0])
+    assert df["description"].iloc[0] == "Lentils 1Kg"
+    assert df["out_of_stock"].iloc[0]
+
+    df = catalog.lookup(links=[TEST_URL], max_age=pd.Timedelta(minutes=1), now=NOW)
+    assert df[["description", "price", "out_of_stock"]].isna().all(axis=None)
+
+
+def test_catalog_missing_value_keeps_stored(catalog):
+    """Test that a missing scraped value does not overwrite the stored one."""
+    catalog.upsert(
+        pd.DataFrame(dict(link=[TEST_URL], price=[1.5])),
+        now=NOW - pd.Timedelta(days=1),
+    )
+    catalog.upsert(pd.DataFrame(dict(link=[TEST_URL], price=[float("nan")])), now=NOW)
+
+    df = catalog.lookup(links=[TEST_URL], now=NOW)
+    assert df["price"].iloc[0] == 1.5
+    assert df["price_at"].iloc[0] == NOW - pd.Timedelta(days=1)
+    assert df["seen_at"].iloc[0] == NOW
+
+
+def test_scrape_catalog_upserts_into_catalog(mocker, catalog):
+    """Test that scraped products are stored in the catalog under their food."""
+    queries = pd.DataFrame(dict(food=["garlic"], name=["Garlic"]))
+    mocker.patch(
+        "autoshop.tesco.get_products",
+        return_value=pd.DataFrame(
+            dict(
+                description=["Tesco Garlic Powder 45G .."],
+                link=[URL_GARLIC],
+                image=["https://image"],
+                amount=[45.0],
+                unit=["g"],
+                price=[0.85],
+                sponsored=[False],
+            )
+        ),
+    )
+
+    autoshop.tesco.scrape_catalog(
+        queries=queries, pool=MockPool(mocker), interval=0, catalog=catalog
+    )
+
+    df = catalog.lookup(food="garlic")
+    assert df[["link", "price"]].to_dict("records") == [
+        dict(link=URL_GARLIC, price=0.85)
+    ]
+
+
+def test_get_stale_queries():
+    """Test that new, changed and old foods are flagged for scraping."""
+    queries = pd.DataFrame(
+        dict(
+            food=["lentils", "garlic", "water", "rice"],
+            name=["Red lentils", "Garlic", "Water", "Rice"],
+            search=["red split lentils", "", "still water", None],
+        )
+    )
+    searches = pd.DataFrame(
+        dict(
+            food=["lentils", "garlic", "water"],
+            search=["red split lentils", "Garlic", "sparkling water"],
+            scraped_at=[NOW - pd.Timedelta(days=1), NOW - pd.Timedelta(days=8), NOW],
+        )
+    )
+
+    stale = autoshop.tesco.get_stale_queries(
+        queries=queries, searches=searches, max_age=pd.Timedelta(days=7), now=NOW
+    )
+
+    assert list(stale) == [False, True, True, True]
+
+
+def test_scrape_catalog_refresh(mocker, catalog):
+    """Test that refresh only scrapes stale foods and returns the cached ones."""
+    queries = pd.DataFrame(
+        dict(food=["lentils", "garlic"], name=["Red lentils", "Garlic"])
+    )
+    mock_get_products = mocker.patch(
+        "autoshop.tesco.get_products",
+        side_effect=lambda driver, url, bucket: pd.DataFrame(
+            dict(
+                description=[f"Product for {url}"],
+                link=[url],
+                image=["https://image"],
+                amount=[1.0],
+                unit=["kg"],
+                price=[1.5],
+                sponsored=[False],
+            )
+        ),
+    )
+    autoshop.tesco.scrape_catalog(
+        queries=queries.iloc[:1], pool=MockPool(mocker), interval=0, catalog=catalog
+    )
+    mock_get_products.reset_mock()
+
+    df = autoshop.tesco.scrape_catalog(
+        queries=queries,
+        pool=MockPool(mocker),
+        interval=0,
+        catalog=catalog,
+        refresh=True,
+    )
+
+    assert mock_get_products.call_count == 1
+    assert "Garlic" in mock_get_products.call_args.kwargs["url"]
+    assert list(df.columns) == autoshop.tesco.COLUMNS_CATALOG
+    assert sorted(df["food"]) == ["garlic", "lentils"]
+    assert df.loc[df["food"] == "lentils", "search"].item() == "Red lentils"
+
+
+def test_scrape_catalog_refresh_skips_all(mocker, catalog):
+    """Test that no driver is used when every food is fresh in the catalog."""
+    queries = pd.DataFrame(dict(food=["water"], name=["Water"]))
+    catalog.record_search(food="water", search="Water")
+    mock_pool = mocker.patch("autoshop.tesco.DriverPool")
+
+    df = autoshop.tesco.scrape_catalog(queries=queries, catalog=catalog, refresh=True)
+
+    mock_pool.assert_not_called()
+    assert df.empty
+    assert list(df.columns) == autoshop.tesco.COLUMNS_CATALOG
+
+
+def test_scrape_catalog_refresh_needs_catalog():
+    with pytest.raises(ValueError):
+        autoshop.tesco.scrape_catalog(
+            queries=pd.DataFrame(dict(food=[], name=[])), refresh=True
+        )
+
+
+def test_get_product_reads_through_catalog(mocker, catalog):
+    """Test that a fresh cached product is used and a stale one is scraped."""
+    mock_driver = mocker.Mock()
+    mock_driver.page_source = (PATH_FIXTURES / "product_page.html").read_text()
+    mocker.patch("autoshop.tesco.wait_and_check_exists", return_value=True)
+
+    product = autoshop.tesco.get_product(
+        driver=mock_driver, url=TEST_URL, catalog=catalog
+    )
+    mock_driver.get.assert_called_once_with(TEST_URL)
+    assert product["price"] == 1.5
+
+    cached = autoshop.tesco.get_product(
+        driver=mock_driver,
+        url=TEST_URL,
+        catalog=catalog,
+        max_age=pd.Timedelta(hours=24),
+    )
+    mock_driver.get.assert_called_once()
+    assert cached["description"] == "Tesco Red Split Lentils 1Kg"
+    assert cached["price"] == 1.5
+
+
+def test_add_food_to_basket_out_of_stock_in_catalog(mocker, catalog):
+    """Test that a product recently seen out of stock is not loaded again."""
+    mock_driver = mocker.Mock()
+    catalog.upsert(pd.DataFrame(dict(link=[TEST_URL], out_of_stock=[True])))
+
+    autoshop.tesco.add_food_to_basket(
+        driver=mock_driver,
+        url=TEST_URL,
+        amount=1,
+        info="test",
+        catalog=catalog,
+        max_age_stock=pd.Timedelta(hours=1),
+    )
+
+    mock_driver.get.assert_not_called()
+
+
+def test_add_food_to_basket_records_stock(mocker, catalog):
+    """Test that the stock state seen on the product page is stored."""
+    mock_driver = mocker.Mock()
+    mocker.patch(
+        "autoshop.tesco.wait_for_any",
+        return_value=autoshop.tesco.OUTCOME_OUT_OF_STOCK,
+    )
+
+    autoshop.tesco.add_food_to_basket(
+        driver=mock_driver, url=TEST_URL, amount=1, info="test", catalog=catalog
+    )
+
+    assert catalog.lookup(links=[TEST_URL])["out_of_stock"].iloc[0]
+
+
 @pytest.fixture(scope="module")
 def driver() -> autoshop.typing.WebDriver:
     yield autoshop.chrome.driver()
 
 
+URL_WATER = "https://www.tesco.com/groceries/en-GB/products/299845871"
+
+
+def test_parse_basket_page():
+    """Test that every basket item is read from a saved basket page."""
+    html = (PATH_FIXTURES / "basket_page.html").read_text()
+
+    df = autoshop.tesco.parse_basket_page(html)
+
+    assert df.to_dict("records") == [
+        dict(link=TEST_URL, quantity=2, price=3.0),
+        dict(link=URL_GARLIC, quantity=1, price=0.85),
+    ]
+
+
+def test_read_basket_empty(mocker):
+    mock_driver = mocker.Mock()
+    mocker.patch(
+        "autoshop.tesco.wait_for_any",
+        return_value=autoshop.tesco.OUTCOME_BASKET_EMPTY,
+    )
+
+    df = autoshop.tesco.read_basket(driver=mock_driver)
+
+    mock_driver.get.assert_called_once_with(autoshop.tesco.URL_BASKET)
+    assert df.empty
+    assert list(df.columns) == autoshop.tesco.COLUMNS_BASKET
+
+
+def test_diff_basket():
+    """Test that each item gets the action that reaches the desired quantity."""
+    current = pd.DataFrame(
+        dict(
+            link=[TEST_URL, URL_GARLIC, URL_WATER],
+            quantity=[2, 1, 3],
+            price=[3.0, 0.85, 3.25],
+        )
+    )
+    desired = pd.DataFrame(
+        dict(
+            link=[
+                TEST_URL + "?ref=sheet",
+                URL_GARLIC,
+                "https://www.tesco.com/groceries/en-GB/products/1",
+            ],
+            quantity=[2, 4, 1],
+        )
+    )
+
+    df = autoshop.tesco.diff_basket(current=current, desired=desired)
+
+    assert list(df.columns) == autoshop.tesco.COLUMNS_BASKET_DIFF
+    assert sorted(
+        map(
+            tuple,
+            df[["quantity_current", "quantity_desired", "action"]].values.tolist(),
+        )
+    ) == [
+        (0, 1, "add"),
+        (1, 4, "update"),
+        (2, 2, "keep"),
+        (3, 0, "remove"),
+    ]
+
+    df = autoshop.tesco.diff_basket(
+        current=current, desired=desired, remove_missing=False
+    )
+    assert df.loc[df["link"] == URL_WATER, "action"].item() == "keep"
+
+
+def test_diff_basket_sums_duplicates():
+    current = pd.DataFrame(columns=autoshop.tesco.COLUMNS_BASKET)
+    desired = pd.DataFrame(dict(link=[TEST_URL, TEST_URL], quantity=[1, 2]))
+
+    df = autoshop.tesco.diff_basket(current=current, desired=desired)
+
+    assert df.to_dict("records") == [
+        dict(link=TEST_URL, quantity_current=0, quantity_desired=3, action="add")
+    ]
+
+
+def test_diff_basket_empty_basket_no_warning():
+    """Test that diffing against an empty basket does not warn."""
+    current = pd.DataFrame(columns=autoshop.tesco.COLUMNS_BASKET)
+    desired = pd.DataFrame(dict(link=[TEST_URL], quantity=[1]))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        df = autoshop.tesco.diff_basket(current=current, desired=desired)
+
+    assert df["action"].tolist() == ["add"]
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        (TEST_URL, ["254656543"]),
+        (URL_GARLIC, ["50365892?ref=basket"]),
+        ("https://www.tesco.com/groceries/en-GB/products/2546565", []),
+        ("https://www.tesco.com/groceries/en-GB/products/5036589", []),
+    ],
+)
+def test_basket_row_matches_exact_id(url, expected):
+    """Test that a basket row is only found by its whole product id."""
+    tree = lxml.html.fromstring((PATH_FIXTURES / "basket_page.html").read_text())
+    xpath = autoshop.tesco.TEMPLATE_XPATH_BASKET_ROW.format(
+        id=autoshop.tesco.to_xpath_literal(autoshop.tesco.to_product_key(url))
+    )
+
+    rows = tree.xpath(xpath)
+
+    assert [row.xpath(".//a/@href")[0].rsplit("/", 1)[-1] for row in rows] == expected
+
+
+def test_reconcile_basket(mocker):
+    """Test that only the delta is applied to the basket."""
+    mock_driver = mocker.Mock()
+    mocker.patch(
+        "autoshop.tesco.read_basket",
+        return_value=autoshop.tesco.parse_basket_page(
+            (PATH_FIXTURES / "basket_page.html").read_text()
+        ),
+    )
+    mock_set = mocker.patch("autoshop.tesco.set_basket_quantity")
+    mock_add = mocker.patch("autoshop.tesco.add_food_to_basket_with_retry")
+    desired = pd.DataFrame(dict(link=[TEST_URL, URL_WATER], quantity=[3, 1]))
+
+    df = autoshop.tesco.reconcile_basket(driver=mock_driver, desired=desired)
+
+    assert sorted(df["action"]) == ["add", "remove", "update"]
+    assert sorted(
+        (call.kwargs["url"], call.kwargs["quantity"])
+        for call in mock_set.call_args_list
+    ) == [(TEST_URL, 3), (URL_GARLIC, 0)]
+    mock_add.assert_called_once()
+    assert mock_add.call_args.kwargs["url"] == URL_WATER
+    assert mock_add.call_args.kwargs["amount"] == 1
+    assert dict(zip(df["action"], df["outcome"])) == {
+        "add": mock_add.return_value,
+        "remove": "removed",
+        "update": "updated",
+    }
+
+
+def test_reconcile_basket_reports_failures(mocker):
+    """Test that failed adds and updates show up in the outcome."""
+    mocker.patch(
+        "autoshop.tesco.read_basket",
+        return_value=autoshop.tesco.parse_basket_page(
+            (PATH_FIXTURES / "basket_page.html").read_text()
+        ),
+    )
+    mocker.patch(
+        "autoshop.tesco.set_basket_quantity",
+        side_effect=autoshop.selenium.TimeoutException("No Update button"),
+    )
+    mocker.patch(
+        "autoshop.tesco.add_food_to_basket_with_retry",
+        return_value=autoshop.tesco.OUTCOME_FAILED,
+    )
+    desired = pd.DataFrame(
+        dict(link=[TEST_URL, URL_GARLIC, URL_WATER], quantity=[3, 1, 1])
+    )
+
+    df = autoshop.tesco.reconcile_basket(driver=mocker.Mock(), desired=desired)
+
+    assert dict(zip(df["action"], df["outcome"])) == {
+        "add": "failed",
+        "keep": "in_basket",
+        "update": "failed",
+    }
+
+
+def test_reconcile_basket_unchanged(mocker):
+    """Test that an unchanged basket makes no change."""
+    current = autoshop.tesco.parse_basket_page(
+        (PATH_FIXTURES / "basket_page.html").read_text()
+    )
+    mocker.patch("autoshop.tesco.read_basket", return_value=current)
+    mock_set = mocker.patch("autoshop.tesco.set_basket_quantity")
+    mock_add = mocker.patch("autoshop.tesco.add_food_to_basket_with_retry")
+
+    df = autoshop.tesco.reconcile_basket(
+        driver=mocker.Mock(), desired=current[["link", "quantity"]]
+    )
+
+    assert (df["action"] == "keep").all()
+    mock_set.assert_not_called()
+    mock_add.assert_not_called()
+
+
+def test_add_food_to_basket_with_retry_failed(mocker):
+    """Test that the failure is returned once the retries are used up."""
+    mock_driver = mocker.Mock()
+    mocker.patch("time.sleep")
+    mock_add = mocker.patch(
+        "autoshop.tesco.add_food_to_basket", side_effect=TimeoutError
+    )
+    mocker.patch("autoshop.tesco.check_if_out_of_stock", return_value=False)
+
+    outcome = autoshop.tesco.add_food_to_basket_with_retry(
+        driver=mock_driver, url=TEST_URL, amount=1, info="test", max_retries=1
+    )
+
+    assert outcome == autoshop.tesco.OUTCOME_FAILED
+    assert mock_add.call_count == 2
+
+
+def test_choose_products():
+    """Test that the cheapest candidate covering the requirement is chosen."""
+    requirements = pd.DataFrame(
+        dict(food=["lentils", "garlic", "water"], amountGram=[1500.0, 30.0, 500.0])
+    )
+    candidates = pd.DataFrame(
+        dict(
+            food=["lentils", "lentils", "lentils", "garlic", "garlic", "water"],
+            link=["a", "b", "c", "d", "e", "f"],
+            amount=[500, 2, 1, 45, 100, 6],
+            unit=["g", "kg", "kg", "g", "g", "pack"],
+            price=[1.0, 3.5, 1.5, 0.85, 0.85, 3.0],
+            order=["1", "2", "10", "2", "1", "1"],
+            out_of_stock=[False, False, True, None, False, False],
+        )
+    )
+
+    df = autoshop.tesco.choose_products(
+        requirements=requirements, candidates=candidates
+    )
+
+    assert list(df.columns) == [
+        "food",
+        "amountGram",
+        *autoshop.tesco.COLUMNS_CHOICE,
+    ]
+    # 3 x 500g for £3 beats 1 x 2kg for £3.50, the cheaper 1kg is out of stock
+    assert df.iloc[0][["link", "packs", "cost"]].tolist() == ["a", 3, 3.0]
+    assert df.iloc[0]["pricePerGram"] == pytest.approx(0.002)
+    # Same cost, the order breaks the tie
+    assert df.iloc[1][["link", "packs", "amountGramPack"]].tolist() == ["e", 1, 100]
+    # A pack has no weight without a conversion
+    assert pd.isna(df.iloc[2]["link"])
+
+
+def test_choose_products_by_order():
+    requirements = pd.DataFrame(dict(food=["lentils"], amountGram=[1000.0]))
+    candidates = pd.DataFrame(
+        dict(
+            food=["lentils", "lentils"],
+            link=["a", "b"],
+            amount=[1, 1],
+            unit=["kg", ""],
+            amountGram=[None, 1000.0],
+            price=[2.0, 1.0],
+            order=[1, 2],
+        )
+    )
+
+    df = autoshop.tesco.choose_products(
+        requirements=requirements, candidates=candidates
+    )
+    assert df["link"].item() == "b"
+
+    df = autoshop.tesco.choose_products(
+        requirements=requirements, candidates=candidates, by=["order"]
+    )
+    assert df["link"].item() == "a"
+
+
+def test_choose_products_text_price():
+    """Test that prices given as text, as the food map sheet does, are coerced."""
+    requirements = pd.DataFrame(dict(food=["lentils"], amountGram=[1000.0]))
+    candidates = pd.DataFrame(
+        dict(
+            food=["lentils", "lentils", "lentils"],
+            link=["a", "b", "c"],
+            amount=[500, 1, 1],
+            unit=["g", "kg", "kg"],
+            price=["1.25", "2.00", "n/a"],
+        )
+    )
+
+    df = autoshop.tesco.choose_products(
+        requirements=requirements, candidates=candidates
+    )
+    assert df[["link", "packs"]].iloc[0].tolist() == ["b", 1]
+    assert df["cost"].dtype == float
+    assert df["cost"].item() == 2.0
+
+
+def test_choose_products_requirement_not_finite(mocker):
+    """Test that foods the plan could not convert are missing, not an error."""
+    requirements = pd.DataFrame(
+        dict(
+            food=["lentils", "garlic", "water"],
+            amountGram=[float("nan"), float("inf"), 500.0],
+        )
+    )
+    candidates = pd.DataFrame(
+        dict(
+            food=["lentils", "garlic", "water"],
+            link=["a", "b", "c"],
+            amount=[500, 45, 1],
+            unit=["g", "g", "kg"],
+            price=[1.0, 0.85, 0.5],
+        )
+    )
+    logger = mocker.patch.object(autoshop.tesco, "LOGGER")
+
+    df = autoshop.tesco.choose_products(
+        requirements=requirements, candidates=candidates
+    )
+
+    assert df["link"].iloc[:2].isna().all()
+    assert df[["link", "packs"]].iloc[2].tolist() == ["c", 1]
+    assert "lentils" in logger.warning.call_args.args[0]
+    assert "garlic" in logger.warning.call_args.args[0]
+
+
+def test_journal_read_last_entry_wins(tmp_path):
+    journal = autoshop.tesco.Journal(path=tmp_path / "journal.jsonl")
+    assert journal.read().empty
+
+    journal.record(link=TEST_URL, amount=1, outcome="pending")
+    journal.record(link=URL_GARLIC, amount=2, outcome="failed", seconds=1.5)
+    journal.record(link=TEST_URL, amount=1, outcome="added", seconds=3.0)
+    with journal.path.open("a") as file:
+        file.write('{"link": "https://cut')
+
+    df = journal.read()
+    assert list(df.columns) == autoshop.tesco.COLUMNS_JOURNAL
+    assert df[["link", "outcome"]].to_dict("records") == [
+        dict(link=URL_GARLIC, outcome="failed"),
+        dict(link=TEST_URL, outcome="added"),
+    ]
+    assert journal.get_done() == {TEST_URL}
+
+
+def test_add_foods_to_basket_resume(mocker, tmp_path):
+    """Test that a resumed run only tries the failed and pending items."""
+    journal = autoshop.tesco.Journal(path=tmp_path / "journal.jsonl")
+    journal.record(link=TEST_URL, amount=1, outcome="added")
+    journal.record(link=URL_GARLIC, amount=1, outcome="failed")
+    journal.record(link=URL_WATER, amount=1, outcome="pending")
+    foods = pd.DataFrame(dict(link=[TEST_URL, URL_GARLIC, URL_WATER], amount=[1, 1, 6]))
+    mock_add = mocker.patch(
+        "autoshop.tesco.add_food_to_basket_with_retry",
+        side_effect=[autoshop.tesco.OUTCOME_ADDED, autoshop.tesco.OUTCOME_OUT_OF_STOCK],
+    )
+
+    df = autoshop.tesco.add_foods_to_basket(
+        driver=mocker.Mock(), foods=foods, journal=journal, resume=True
+    )
+
+    assert [call.kwargs["url"] for call in mock_add.call_args_list] == [
+        URL_GARLIC,
+        URL_WATER,
+    ]
+    assert dict(zip(df["link"], df["outcome"])) == {
+        TEST_URL: "added",
+        URL_GARLIC: "added",
+        URL_WATER: "out_of_stock",
+    }
+    assert df["seconds"].notna().sum() == 2
+
+
+def test_add_foods_to_basket_restart(mocker, tmp_path):
+    """Test that a run without resume starts the journal afresh."""
+    journal = autoshop.tesco.Journal(path=tmp_path / "journal.jsonl")
+    journal.record(link=TEST_URL, amount=1, outcome="added")
+    mock_add = mocker.patch(
+        "autoshop.tesco.add_food_to_basket_with_retry",
+        side_effect=RuntimeError("browser crashed"),
+    )
+
+    df = autoshop.tesco.add_foods_to_basket(
+        driver=mocker.Mock(),
+        foods=pd.DataFrame(dict(link=[TEST_URL], amount=[1])),
+        journal=journal,
+    )
+
+    mock_add.assert_called_once()
+    assert df["outcome"].tolist() == ["failed"]
+    assert len(journal.path.read_text().splitlines()) == 2
+
+
+NOW_SLOTS = pd.Timestamp("2025-03-10 12:00", tz="Europe/London")
+
+
+def test_parse_delivery_slots():
+    """Test that every slot of the grid is read from a saved slots page."""
+    html = (PATH_FIXTURES / "slots_page.html").read_text()
+
+    df = autoshop.tesco.parse_delivery_slots(html, now=NOW_SLOTS)
+
+    assert df["start"].tolist() == [
+        pd.Timestamp("2025-03-14 20:00", tz="Europe/London"),
+        pd.Timestamp("2025-03-14 21:00", tz="Europe/London"),
+        pd.Timestamp("2025-03-14 23:00", tz="Europe/London"),
+        pd.Timestamp("2025-03-15 07:30", tz="Europe/London"),
+        pd.Timestamp("2025-03-15 10:00", tz="Europe/London"),
+    ]
+    assert df["end"].iloc[2] == pd.Timestamp("2025-03-15 00:00", tz="Europe/London")
+    assert df["price"].tolist() == [
+        4.5,
+        3.0,
+        0.0,
+        pytest.approx(math.nan, nan_ok=True),
+        6.0,
+    ]
+    assert df["available"].tolist() == [True, True, True, False, False]
+    assert df["label"].iloc[0] == "Friday 14 March, 8pm–9pm"
+
+
+def test_parse_delivery_slots_next_year():
+    """Test that a date earlier in the year than now is in the next year."""
+    html = '<button aria-label="Friday 2 January, 8am–9am">£1.00</button>'
+
+    df = autoshop.tesco.parse_delivery_slots(
+        html, now=pd.Timestamp("2025-12-29", tz="Europe/London")
+    )
+
+    assert df["start"].item() == pd.Timestamp("2026-01-02 08:00", tz="Europe/London")
+
+
+def test_get_delivery_slots(mocker):
+    """Test that each week is parsed once and the weeks are combined."""
+    mock_driver = mocker.Mock()
+    mock_driver.page_source = (PATH_FIXTURES / "slots_page.html").read_text()
+    mocker.patch("autoshop.tesco.wait_and_check_exists", return_value=True)
+    mock_next = mocker.patch("autoshop.tesco.go_to_next_slots_week")
+
+    df = autoshop.tesco.get_delivery_slots(driver=mock_driver, weeks=2)
+
+    assert list(df.columns) == autoshop.tesco.COLUMNS_SLOTS
+    mock_next.assert_called_once()
+    # The same grid twice, the duplicates are dropped
+    assert len(df) == 5
+    assert (df["week"] == 0).all()
+
+
+def test_book_slot(mocker):
+    """Test that the slot is clicked through its parsed label."""
+    mock_driver = mocker.Mock()
+    mock_driver.page_source = (PATH_FIXTURES / "slots_page.html").read_text()
+    slots = autoshop.tesco.parse_delivery_slots(
+        mock_driver.page_source, now=NOW_SLOTS
+    ).assign(week=[1, 1, 1, 1, 1])
+    mock_next = mocker.patch("autoshop.tesco.go_to_next_slots_week")
+    mock_click = mocker.patch("autoshop.tesco.wait_and_click")
+
+    slot = autoshop.tesco.book_slot(
+        driver=mock_driver,
+        start=pd.Timestamp("2025-03-14 21:00"),
+        slots=slots,
+    )
+
+    assert slot["price"] == 3.0
+    mock_next.assert_called_once()
+    assert (
+        mock_click.call_args.kwargs["value"]
+        == "//button[@aria-label='Friday 14 March, 9pm–10pm']"
+    )
+
+
+def test_book_slot_scrapes_calendar_weeks(mocker):
+    """Test that a slot a week of calendar days away scrapes the second grid."""
+    start = pd.Timestamp("2025-03-17 08:00", tz="Europe/London")
+    slots = pd.DataFrame(
+        dict(
+            start=[start],
+            end=[start + pd.Timedelta(hours=1)],
+            price=[3.0],
+            available=[True],
+            label=["Monday 17 March, 8am–9am"],
+            week=[1],
+        )
+    )
+    mock_get = mocker.patch("autoshop.tesco.get_delivery_slots", return_value=slots)
+    mock_next = mocker.patch("autoshop.tesco.go_to_next_slots_week")
+    mocker.patch("autoshop.tesco.wait_and_click")
+
+    slot = autoshop.tesco.book_slot(
+        driver=mocker.Mock(),
+        start=start,
+        now=pd.Timestamp("2025-03-10 21:00", tz="Europe/London"),
+    )
+
+    assert slot["label"] == "Monday 17 March, 8am–9am"
+    assert mock_get.call_args.kwargs["weeks"] == 2
+    # Already on the second grid after scraping it
+    mock_next.assert_not_called()
+
+
+@pytest.mark.parametrize("hour", [10, 12])
+def test_book_slot_not_bookable(mocker, hour):
+    slots = autoshop.tesco.parse_delivery_slots(
+        (PATH_FIXTURES / "slots_page.html").read_text(), now=NOW_SLOTS
+    ).assign(week=0)
+
+    with pytest.raises(ValueError):
+        autoshop.tesco.book_slot(
+            driver=mocker.Mock(),
+            start=pd.Timestamp(f"2025-03-15 {hour}:00"),
+            slots=slots,
+        )
+
+
+def test_to_xpath_literal():
+    assert autoshop.tesco.to_xpath_literal("a") == "'a'"
+    assert autoshop.tesco.to_xpath_literal("a'b") == '"a\'b"'
+    assert autoshop.tesco.to_xpath_literal("""a'b"c""") == """concat('a', "'", 'b"c')"""
+
+
+@pytest.fixture
+def store(tmp_path):
+    with autoshop.tesco.OrderStore(path=tmp_path / "orders.sqlite") as store:
+        yield store
+
+
+def test_parse_orders_page():
+    df = autoshop.tesco.parse_orders_page(
+        (PATH_FIXTURES / "orders_page.html").read_text()
+    )
+
+    assert df["id"].tolist() == ["1003", "1002", "1001"]
+    assert df["link"].iloc[0] == "https://www.tesco.com/groceries/en-GB/orders/1003"
+
+
+def test_parse_order_page():
+    """Test that the order details and items are read from a saved order page."""
+    order, items = autoshop.tesco.parse_order_page(
+        (PATH_FIXTURES / "order_page.html").read_text()
+    )
+
+    assert order == dict(
+        delivery_at=pd.Timestamp("2025-03-14T20:00:00+00:00"), total=6.35
+    )
+    assert items.to_dict("records") == [
+        dict(
+            link=TEST_URL,
+            description="Tesco Red Split Lentils 1Kg",
+            quantity=2,
+            price=3.0,
+        ),
+        dict(
+            link=URL_WATER,
+            description="Highland Spring Still Water 6 X 1.5L",
+            quantity=1,
+            price=3.35,
+        ),
+    ]
+
+
+def test_sync_orders_incremental(mocker, store):
+    """Test that only the orders newer than the last synced one are loaded."""
+    order_page = (PATH_FIXTURES / "order_page.html").read_text()
+    store.upsert_order(
+        order=dict(
+            id="1002",
+            link="https://www.tesco.com/groceries/en-GB/orders/1002",
+            delivery_at=pd.Timestamp("2025-03-07T20:00:00+00:00"),
+            total=1.5,
+        ),
+        items=pd.DataFrame(
+            dict(link=[URL_GARLIC], description=["Garlic"], quantity=[3], price=[0.5])
+        ),
+    )
+    mock_driver = mocker.Mock()
+    type(mock_driver).page_source = mocker.PropertyMock(
+        side_effect=[(PATH_FIXTURES / "orders_page.html").read_text(), order_page]
+    )
+    mocker.patch("autoshop.tesco.wait_and_check_exists", return_value=True)
+
+    df = autoshop.tesco.sync_orders(driver=mock_driver, store=store)
+
+    assert df["id"].tolist() == ["1003"]
+    assert [call.args[0] for call in mock_driver.get.call_args_list] == [
+        autoshop.tesco.URL_ORDERS,
+        "https://www.tesco.com/groceries/en-GB/orders/1003",
+    ]
+    assert store.get_orders()["id"].tolist() == ["1003", "1002"]
+    assert store.get_items()[["link", "quantity"]].to_dict("records") == [
+        dict(link=TEST_URL, quantity=2),
+        dict(link=URL_WATER, quantity=1),
+    ]
+    assert store.get_items(order_id="1002")["quantity"].tolist() == [3]
+
+
+def test_sync_orders_up_to_date(mocker, store):
+    store.upsert_order(order=dict(id="1003", link="https://1003"), items=pd.DataFrame())
+    mock_driver = mocker.Mock()
+    mock_driver.page_source = (PATH_FIXTURES / "orders_page.html").read_text()
+    mocker.patch("autoshop.tesco.wait_and_check_exists", return_value=True)
+
+    df = autoshop.tesco.sync_orders(driver=mock_driver, store=store)
+
+    assert df.empty
+    mock_driver.get.assert_called_once()
+
+
+def test_order_store_empty(store):
+    assert store.get_orders().empty
+    assert list(store.get_items().columns) == autoshop.tesco.COLUMNS_ORDER_ITEMS
+
+
+def make_slots_page(slots: list[tuple[pd.Timestamp, bool]]) -> str:
+    buttons = (
+        "".join(
+            f'<button type="button" aria-label="{start:%A} {start.day} {start:%B}, '
+            f"{start.hour % 12 or 12}{start:%p}–{(start.hour + 1) % 12 or 12}"
+            f'{start + pd.Timedelta(hours=1):%p}"'
+            f"{'' if available else ' disabled'} onclick=\"document.title = 'booked'\">"
+            "<span>£4.50</span></button>"
+            for start, available in slots
+        )
+        .replace("AM", "am")
+        .replace("PM", "pm")
+    )
+    return f"<html><head><title>Slots</title></head><body>{buttons}</body></html>"
+
+
+def next_friday_at(hour: int) -> pd.Timestamp:
+    now = pd.Timestamp.now(tz="Europe/London").normalize()
+    return now + pd.Timedelta(days=(4 - now.weekday()) % 7 + 7, hours=hour)
+
+
+def test_watch_slots_books_on_change(mocker):
+    """Test that the grid is parsed only when it changes and booked at once."""
+    first, second = next_friday_at(19), next_friday_at(20)
+    pages = [
+        make_slots_page([(first, False), (second, False)]),
+        make_slots_page([(first, False), (second, True)]),
+    ]
+    mock_driver = mocker.Mock()
+    mock_driver.execute_script.side_effect = [1, 1, 2]
+    type(mock_driver).page_source = mocker.PropertyMock(side_effect=pages)
+    mocker.patch("autoshop.tesco.wait_and_check_exists", return_value=True)
+    mocker.patch("autoshop.tesco.is_challenge", return_value=False)
+    mocker.patch("time.sleep")
+    mock_click = mocker.patch("autoshop.tesco.wait_and_click")
+
+    slot = autoshop.tesco.watch_slots(
+        driver=mock_driver, preferences=[first, second], poll_interval=0.01
+    )
+
+    assert slot["start"] == second
+    assert mock_driver.refresh.call_count == 2
+    mock_click.assert_called_once()
+    assert slot["label"] in mock_click.call_args.kwargs["value"]
+
+
+def test_watch_slots_deadline(mocker):
+    mock_driver = mocker.Mock()
+    mocker.patch("autoshop.tesco.wait_and_check_exists", return_value=False)
+
+    slot = autoshop.tesco.watch_slots(
+        driver=mock_driver,
+        preferences=[next_friday_at(20)],
+        poll_interval=0.01,
+        deadline=pd.Timestamp.now() + pd.Timedelta(seconds=0.05),
+    )
+
+    assert slot is None
+
+
+def test_find_preferred_slot():
+    first, second = next_friday_at(19), next_friday_at(20)
+    slots = autoshop.tesco.parse_delivery_slots(
+        make_slots_page([(first, True), (second, True)])
+    )
+
+    slot = autoshop.tesco.find_preferred_slot(
+        slots=slots, preferences=[second.tz_localize(None), first]
+    )
+
+    assert slot["start"] == second
+    assert (
+        autoshop.tesco.find_preferred_slot(slots=slots, preferences=[second.floor("D")])
+        is None
+    )
+
+
+class SlotsHandler(http.server.BaseHTTPRequestHandler):
+    """Serves a slots page whose preferred slot opens after a delay."""
+
+    started = 0.0
+    delay = 0.0
+    start = None
+
+    def do_GET(self):
+        available = time.monotonic() - self.started > self.delay
+        body = make_slots_page(
+            [(self.start - pd.Timedelta(hours=1), False), (self.start, available)]
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.mark.integration
+def test_watch_slots_against_local_page():
+    SlotsHandler.start = next_friday_at(20)
+    SlotsHandler.delay = 3.0
+    SlotsHandler.started = time.monotonic()
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), SlotsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    driver = autoshop.chrome.driver()
+    try:
+        slot = autoshop.tesco.watch_slots(
+            driver=driver,
+            preferences=[SlotsHandler.start],
+            poll_interval=0.5,
+            deadline=pd.Timestamp.now() + pd.Timedelta(seconds=30),
+            url=f"http://127.0.0.1:{server.server_address[1]}/",
+        )
+        assert slot["start"] == SlotsHandler.start
+        assert driver.title == "booked"
+    finally:
+        driver.quit()
+        server.shutdown()
+
+
 @pytest.mark.integration
 def test_login(driver):
     autoshop.tesco.login(driver=driver)
@@ -157,3 +1710,56 @@ def test_add_food_to_basket(driver_empty_basket):
         value=xpath_quantity,
     )
     assert element is not None
+
+
+class ReplayHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves a page that loads the recorded API responses in the fixtures."""
+
+    def do_GET(self):
+        if self.path == "/":
+            body = (
+                "<html><body><script>"
+                "fetch('/api/api_search.json').then(r => r.json())"
+                ".then(() => document.body.id = 'loaded')"
+                "</script></body></html>"
+            ).encode()
+            content_type = "text/html"
+        else:
+            body = (PATH_FIXTURES / Path(self.path).name).read_bytes()
+            content_type = "application/json"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def url_replay():
+    handler = functools.partial(ReplayHandler, directory=str(PATH_FIXTURES))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+
+@pytest.mark.integration
+def test_get_products_from_replayed_responses(url_replay):
+    driver = autoshop.chrome.driver(log_performance=True)
+    try:
+        driver.get(url_replay)
+        autoshop.selenium.wait_and_get(driver=driver, value="//body[@id='loaded']")
+        payloads = autoshop.tesco.get_api_payloads(
+            driver=driver, patterns=[f"{url_replay}api/*"]
+        )
+    finally:
+        driver.quit()
+
+    df = autoshop.tesco.get_products_from_payloads(payloads)
+    assert df["link"].tolist() == [
+        TEST_URL,
+        "https://www.tesco.com/groceries/en-GB/products/299845871",
+    ]
@@ -1,5 +1,7 @@
 import math
 
+import numpy as np
+import pandas as pd
 import pint
 import pytest
 
@@ -287,3 +289,139 @@ def test_invalid_units_return_nan(invalid_unit):
 
     assert math.isnan(result_grams)
     assert math.isnan(result_ml)
+
+
+# Tests for the parse_many function
+def test_parse_many():
+    """Test that amounts are converted row by row with a mask of failures."""
+    values, mask = autoshop.unit.parse_many(
+        amounts=np.array([1.0, 2.0, 500.0, 3.0, np.nan]),
+        units=np.array(["kg", "ml", "G", "kg", "g"]),
+        unit_to="g",
+    )
+
+    np.testing.assert_allclose(values, [1000.0, np.nan, 500.0, 3000.0, np.nan])
+    np.testing.assert_array_equal(mask, [False, True, False, False, False])
+
+
+def test_parse_many_series_with_missing_units():
+    """Test that missing units of a series cannot be converted."""
+    values, mask = autoshop.unit.parse_many(
+        amounts=pd.Series([1.0, 2.0], index=[5, 7]),
+        units=pd.Series(["ltr", None], index=[5, 7]),
+        unit_to="ml",
+    )
+
+    np.testing.assert_allclose(values, [1000.0, np.nan])
+    np.testing.assert_array_equal(mask, [False, True])
+
+
+def test_parse_many_empty():
+    """Test that nothing to convert gives empty arrays."""
+    values, mask = autoshop.unit.parse_many(amounts=[], units=[], unit_to="g")
+
+    assert values.shape == (0,)
+    assert mask.shape == (0,)
+
+
+def test_parse_many_parses_each_unit_once(mocker):
+    """Test that every distinct unit is only parsed once, even across calls."""
+    autoshop.unit.get_factor.cache_clear()
+    spy = mocker.spy(autoshop.unit, "parse_to")
+
+    for _ in range(2):
+        autoshop.unit.parse_many(
+            amounts=np.ones(6),
+            units=np.array(["kg", "g", "kg", "g", "kg", "lb"]),
+            unit_to="g",
+        )
+
+    assert sorted(call.kwargs["unit_from"] for call in spy.call_args_list) == [
+        "g",
+        "kg",
+        "lb",
+    ]
+
+
+def test_parse_many_with_custom_registry():
+    """Test parse_many with custom unit registry."""
+    custom_registry = pint.UnitRegistry()
+    custom_registry.define("special_unit = 2 * gram")
+
+    values, mask = autoshop.unit.parse_many(
+        amounts=np.array([1.0, 3.0]),
+        units=np.array(["special_unit", "special_unit"]),
+        unit_to="g",
+        unit_registry=custom_registry,
+    )
+
+    np.testing.assert_allclose(values, [2.0, 6.0])
+    assert not mask.any()
+
+
+# Tests for the built in units and the lazy registry
+def test_parse_to_builtin_skips_registry(mocker):
+    """Test that the units Tesco uses are converted without building pint."""
+    mock_registry = mocker.patch("autoshop.unit.registry")
+
+    assert autoshop.unit.parse_to_grams(1.5, " KG") == 1500
+    assert autoshop.unit.parse_to_milliliters(2, "Litres") == 2000
+    assert math.isnan(autoshop.unit.parse_to_grams(1, "ml"))
+    assert math.isnan(autoshop.unit.parse_to_grams(1, "pack"))
+    assert math.isnan(autoshop.unit.parse_to(1, "", ""))
+    mock_registry.assert_not_called()
+
+
+@pytest.mark.parametrize("unit", list(autoshop.unit.UNITS_BUILTIN))
+def test_units_builtin_match_pint(unit):
+    """Test that the built in units convert as pint would."""
+    unit_registry = autoshop.unit.registry()
+    for unit_to in ["g", "ml"]:
+        expected = autoshop.unit.parse_to(7, unit, unit_to, unit_registry=unit_registry)
+        actual = autoshop.unit.parse_to(7, unit, unit_to)
+        assert math.isclose(expected, actual) or (
+            math.isnan(expected) and math.isnan(actual)
+        )
+
+
+def test_registry_cache_folder(tmp_path):
+    """Test that the registry keeps its definitions in cache_folder."""
+    unit_registry = autoshop.unit.registry(cache_folder=tmp_path)
+
+    assert math.isclose(
+        autoshop.unit.parse_to(1, "lb", "g", unit_registry=unit_registry), 453.59237
+    )
+    assert any(tmp_path.iterdir())
+
+
+@pytest.mark.parametrize(
+    "cache_folder, expected",
+    [
+        (None, autoshop.unit.CACHE_FOLDER_DEFAULT),
+        (False, None),
+    ],
+)
+def test_registry_cache_folder_disabled(mocker, cache_folder, expected):
+    """Test that a cache_folder of False gives pint no folder to write to."""
+    mock_unit_registry = mocker.patch("pint.UnitRegistry")
+
+    # Unwrapped so the mock registry is not cached
+    autoshop.unit.registry.__wrapped__(cache_folder=cache_folder)
+
+    mock_unit_registry.assert_called_once_with(cache_folder=expected)
+
+
+@pytest.mark.parametrize(
+    "amount, unit_from, unit_to",
+    [
+        (1.0, float("nan"), "g"),
+        (1.0, None, "g"),
+        (1.0, "kg", None),
+        (None, "kg", "g"),
+        ("2", "kg", "g"),
+        (float("nan"), "kg", "g"),
+    ],
+)
+def test_parse_to_not_a_number_or_unit(amount, unit_from, unit_to):
+    """Test that amounts and units of other types are NaN rather than an error."""
+    assert math.isnan(autoshop.unit.parse_to(amount, unit_from, unit_to))